@@ -20,7 +20,7 @@ from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DocumentSegment
+from models.dataset import Dataset, DatasetCollectionBinding, DatasetKeywordTable, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -649,3 +649,48 @@ where sites.id is null limit 1000"""
                 break
 
     click.echo(click.style("Fix for missing app-related sites completed successfully!", fg="green"))
+
+
+@click.command("migrate-keyword-index", help="Migrate keyword tables to the jieba inverted index.")
+def migrate_keyword_index():
+    """
+    Migrate JSON keyword tables of all datasets to keyword postings of the jieba inverted index.
+    """
+    from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+
+    click.echo(click.style("Starting keyword index migration.", fg="green"))
+    migrated_count = 0
+    page = 1
+    while True:
+        try:
+            keyword_tables = DatasetKeywordTable.query.order_by(DatasetKeywordTable.id).paginate(page=page, per_page=50)
+        except NotFound:
+            break
+
+        page += 1
+        for dataset_keyword_table in keyword_tables:
+            try:
+                dataset = Dataset.query.filter_by(id=dataset_keyword_table.dataset_id).first()
+                keyword_table_dict = dataset_keyword_table.keyword_table_dict
+                if not dataset or not keyword_table_dict:
+                    continue
+                node_keywords: dict[str, list[str]] = {}
+                for keyword, node_ids in keyword_table_dict["__data__"]["table"].items():
+                    for node_id in node_ids:
+                        node_keywords.setdefault(node_id, []).append(keyword)
+                JiebaInvertedIndex(dataset).add_postings(node_keywords)
+                migrated_count += 1
+                click.echo(f"Migrated keyword index of dataset {dataset.id} with {len(node_keywords)} segments.")
+            except Exception as e:
+                db.session.rollback()
+                click.echo(
+                    click.style(
+                        "Failed to migrate keyword index of dataset {}: {} {}".format(
+                            dataset_keyword_table.dataset_id, e.__class__.__name__, str(e)
+                        ),
+                        fg="red",
+                    )
+                )
+                continue
+
+    click.echo(click.style(f"Keyword index migration complete. Migrated {migrated_count} datasets.", fg="green"))
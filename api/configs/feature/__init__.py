@@ -61,6 +61,10 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of concurrent active requests per app (0 for unlimited)",
         default=0,
     )
+    APP_MAX_REQUESTS_PER_SECOND: NonNegativeInt = Field(
+        description="Maximum number of requests per second per app, also the allowed burst (0 for unlimited)",
+        default=0,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -93,6 +97,37 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=10.0,
     )
 
+    CODE_EXECUTION_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections kept by the shared code execution client",
+        default=100,
+    )
+
+    CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of idle keep-alive connections kept by the shared code execution client",
+        default=20,
+    )
+
+    CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds after which idle keep-alive connections of the code execution client are closed",
+        default=5.0,
+    )
+
+    TEMPLATE_TRANSFORM_MAX_LENGTH: PositiveInt = Field(
+        description="Maximum length of the output of a template transform",
+        default=80000,
+    )
+
+    JINJA2_IN_PROCESS_RENDERING_ENABLED: bool = Field(
+        description="Render simple Jinja2 templates in process with a sandboxed environment,"
+        " other templates are still rendered by the code execution sandbox",
+        default=False,
+    )
+
+    JINJA2_TEMPLATE_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of compiled Jinja2 templates cached for in process rendering",
+        default=256,
+    )
+
     CODE_MAX_NUMBER: PositiveInt = Field(
         description="Maximum allowed numeric value in code execution",
         default=9223372036854775807,
@@ -314,6 +349,26 @@ class HttpConfig(BaseSettings):
         default=5,
     )
 
+    SSRF_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections kept by the shared SSRF proxy client",
+        default=100,
+    )
+
+    SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of idle keep-alive connections kept by the shared SSRF proxy client",
+        default=20,
+    )
+
+    SSRF_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds after which idle keep-alive connections of the SSRF proxy client are closed",
+        default=5.0,
+    )
+
+    SSRF_HTTP2_ENABLED: bool = Field(
+        description="Enable HTTP/2 for requests sent through the SSRF proxy client, requires the h2 package",
+        default=False,
+    )
+
     RESPECT_XFORWARD_HEADERS_ENABLED: bool = Field(
         description="Enable handling of X-Forwarded-For, X-Forwarded-Proto, and X-Forwarded-Port headers"
         " when the app is behind a single trusted reverse proxy.",
@@ -441,6 +496,11 @@ class WorkflowConfig(BaseSettings):
         default=200 * 1024,
     )
 
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of parsed and compiled workflow graphs cached per process (0 to disable)",
+        default=128,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -655,6 +715,35 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    DATASET_RETRIEVAL_STATS_BUFFER_ENABLED: bool = Field(
+        description="Buffer segment hit counts and dataset queries of retrievals in Redis"
+        " and write them to the database periodically with the celery beat",
+        default=False,
+    )
+
+    DATASET_RETRIEVAL_STATS_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval in seconds for writing buffered dataset retrieval stats to the database",
+        default=60,
+    )
+
+    DATASET_RETRIEVAL_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of threads of the process-wide pools for retrieving datasets"
+        " and for the search methods of a dataset",
+        default=32,
+    )
+
+    DATASET_RETRIEVAL_MAX_WORKERS_PER_BULKHEAD: PositiveInt = Field(
+        description="Maximum number of retrieval threads held by one dataset or one vector store,"
+        " including searches abandoned after their deadline, so a stalled store can not take the whole pool",
+        default=8,
+    )
+
+    DATASET_RETRIEVAL_BRANCH_TIMEOUT: PositiveFloat = Field(
+        description="Deadline in seconds for a search method of a dataset, results of slower searches are dropped."
+        " Retrieving multiple datasets waits twice as long for each dataset",
+        default=30,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -677,11 +766,32 @@ class IndexingConfig(BaseSettings):
         default=4000,
     )
 
+    INDEXING_BATCH_CHARACTERS: PositiveInt = Field(
+        description="Number of characters of extracted text cleaned, split and embedded per batch"
+        " when indexing a document incrementally",
+        default=1000000,
+    )
+
     CHILD_CHUNKS_PREVIEW_NUMBER: PositiveInt = Field(
         description="Maximum number of child chunks to preview",
         default=50,
     )
 
+    EMBEDDING_CACHE_LOOKUP_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of text hashes looked up or written back per query against the embedding cache",
+        default=1000,
+    )
+
+    EMBEDDING_CACHE_REDIS_ENABLED: bool = Field(
+        description="Enable Redis as a first-level cache in front of the embeddings table for document embeddings",
+        default=False,
+    )
+
+    EMBEDDING_CACHE_REDIS_TTL: PositiveInt = Field(
+        description="Expiration time in seconds for document embeddings cached in Redis",
+        default=600,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -79,14 +79,33 @@ class VectorStoreConfig(BaseSettings):
         default=False,
     )
 
+    VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL: NonNegativeInt = Field(
+        description="Minimum interval in seconds between health checks of shared vector store clients."
+        " Set to 0 to check on every use.",
+        default=30,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
         description="Method for keyword extraction and storage."
-        " Default is 'jieba', a Chinese text segmentation library.",
+        " Default is 'jieba', a Chinese text segmentation library."
+        " 'jieba_inverted_index' stores keyword postings per segment for incremental updates.",
         default="jieba",
     )
 
+    KEYWORD_TABLE_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of parsed jieba keyword tables cached in process for keyword search."
+        " Set to 0 to disable the cache.",
+        default=32,
+    )
+
+    WEIGHT_RERANK_KEYWORDS_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of jieba keyword sets of documents cached in process for weighted rerank."
+        " Set to 0 to disable the cache.",
+        default=4096,
+    )
+
 
 class DatabaseConfig(BaseSettings):
     DB_HOST: str = Field(
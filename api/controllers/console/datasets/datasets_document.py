@@ -198,18 +198,28 @@ class DatasetDocumentListApi(Resource):
 
         paginated_documents = query.paginate(page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
+        Document.load_aggregates(documents)
         if fetch:
-            for document in documents:
-                completed_segments = DocumentSegment.query.filter(
-                    DocumentSegment.completed_at.isnot(None),
-                    DocumentSegment.document_id == str(document.id),
+            segment_counts = {
+                row.document_id: row
+                for row in db.session.query(
+                    DocumentSegment.document_id,
+                    db.func.count(DocumentSegment.id)
+                    .filter(DocumentSegment.completed_at.isnot(None))
+                    .label("completed_segments"),
+                    db.func.count(DocumentSegment.id).label("total_segments"),
+                )
+                .filter(
+                    DocumentSegment.document_id.in_([str(document.id) for document in documents]),
                     DocumentSegment.status != "re_segment",
-                ).count()
-                total_segments = DocumentSegment.query.filter(
-                    DocumentSegment.document_id == str(document.id), DocumentSegment.status != "re_segment"
-                ).count()
-                document.completed_segments = completed_segments
-                document.total_segments = total_segments
+                )
+                .group_by(DocumentSegment.document_id)
+                .all()
+            }
+            for document in documents:
+                segment_count = segment_counts.get(str(document.id))
+                document.completed_segments = segment_count.completed_segments if segment_count else 0
+                document.total_segments = segment_count.total_segments if segment_count else 0
             data = marshal(documents, document_with_segments_fields)
         else:
             data = marshal(documents, document_fields)
@@ -10,35 +10,77 @@ from extensions.ext_redis import redis_client
 
 logger = logging.getLogger(__name__)
 
+# Expire the stale active requests, check the active requests and the request tokens and admit the request
+# in one atomic call.
+# KEYS[1]: active requests sorted set (request id: enter time), KEYS[2]: request token bucket hash
+# ARGV: now, request id, max active requests, request max alive time, max requests per second, key ttl
+# returns 1 if admitted, 0 if too many active requests, -1 if too many requests per second
+_ENTER_SCRIPT = """
+local now = tonumber(ARGV[1])
+local max_active_requests = tonumber(ARGV[3])
+local max_requests_per_second = tonumber(ARGV[5])
+
+if max_active_requests > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[4]))
+    if redis.call('ZCARD', KEYS[1]) >= max_active_requests then
+        return 0
+    end
+end
+
+if max_requests_per_second > 0 then
+    local bucket = redis.call('HMGET', KEYS[2], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or max_requests_per_second
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(max_requests_per_second, tokens + math.max(0, now - updated_at) * max_requests_per_second)
+    if tokens < 1 then
+        return -1
+    end
+    redis.call('HSET', KEYS[2], 'tokens', tostring(tokens - 1), 'updated_at', ARGV[1])
+    redis.call('EXPIRE', KEYS[2], ARGV[6])
+end
+
+if max_active_requests > 0 then
+    redis.call('ZADD', KEYS[1], now, ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[6])
+end
+return 1
+"""
+
 
 class RateLimit:
     _MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:max_active_requests"
-    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_requests"
+    # hash tagged, the keys of a script call must share a slot on redis clusters
+    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{{{}}}:active_request_times"
+    _REQUEST_TOKENS_KEY = "dify:rate_limit:{{{}}}:request_tokens"
     _UNLIMITED_REQUEST_ID = "unlimited_request_id"
     _REQUEST_MAX_ALIVE_TIME = 10 * 60  # 10 minutes
     _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # recalculate request_count from request_detail every 5 minutes
+    _KEY_TTL = int(timedelta(days=1).total_seconds())
     _instance_dict: dict[str, "RateLimit"] = {}
 
-    def __new__(cls: type["RateLimit"], client_id: str, max_active_requests: int):
+    def __new__(cls: type["RateLimit"], client_id: str, max_active_requests: int, max_requests_per_second: int = 0):
         if client_id not in cls._instance_dict:
             instance = super().__new__(cls)
             cls._instance_dict[client_id] = instance
         return cls._instance_dict[client_id]
 
-    def __init__(self, client_id: str, max_active_requests: int):
+    def __init__(self, client_id: str, max_active_requests: int, max_requests_per_second: int = 0):
         self.max_active_requests = max_active_requests
+        self.max_requests_per_second = max_requests_per_second
         if hasattr(self, "initialized"):
             return
         self.initialized = True
         self.client_id = client_id
         self.active_requests_key = self._ACTIVE_REQUESTS_KEY.format(client_id)
         self.max_active_requests_key = self._MAX_ACTIVE_REQUESTS_KEY.format(client_id)
+        self.request_tokens_key = self._REQUEST_TOKENS_KEY.format(client_id)
+        self.enter_script = redis_client.register_script(_ENTER_SCRIPT)
         self.last_recalculate_time = float("-inf")
         self.flush_cache(use_local_value=True)
 
     def flush_cache(self, use_local_value=False):
         self.last_recalculate_time = time.time()
-        # flush max active requests
+        # flush max active requests, stale active requests are expired on enter
         if use_local_value or not redis_client.exists(self.max_active_requests_key):
             with redis_client.pipeline() as pipe:
                 pipe.set(self.max_active_requests_key, self.max_active_requests)
@@ -49,40 +91,43 @@ class RateLimit:
                 self.max_active_requests = int(redis_client.get(self.max_active_requests_key).decode("utf-8"))
                 redis_client.expire(self.max_active_requests_key, timedelta(days=1))
 
-        # flush max active requests (in-transit request list)
-        if not redis_client.exists(self.active_requests_key):
-            return
-        request_details = redis_client.hgetall(self.active_requests_key)
-        redis_client.expire(self.active_requests_key, timedelta(days=1))
-        timeout_requests = [
-            k
-            for k, v in request_details.items()
-            if time.time() - float(v.decode("utf-8")) > RateLimit._REQUEST_MAX_ALIVE_TIME
-        ]
-        if timeout_requests:
-            redis_client.hdel(self.active_requests_key, *timeout_requests)
-
     def enter(self, request_id: Optional[str] = None) -> str:
         if time.time() - self.last_recalculate_time > RateLimit._ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL:
             self.flush_cache()
-        if self.max_active_requests <= 0:
+        if self.max_active_requests <= 0 and self.max_requests_per_second <= 0:
             return RateLimit._UNLIMITED_REQUEST_ID
         if not request_id:
             request_id = RateLimit.gen_request_key()
 
-        active_requests_count = redis_client.hlen(self.active_requests_key)
-        if active_requests_count >= self.max_active_requests:
+        result = self.enter_script(
+            keys=[self.active_requests_key, self.request_tokens_key],
+            args=[
+                time.time(),
+                request_id,
+                max(self.max_active_requests, 0),
+                RateLimit._REQUEST_MAX_ALIVE_TIME,
+                max(self.max_requests_per_second, 0),
+                RateLimit._KEY_TTL,
+            ],
+        )
+        if result == 0:
             raise AppInvokeQuotaExceededError(
                 "Too many requests. Please try again later. The current maximum "
                 "concurrent requests allowed is {}.".format(self.max_active_requests)
             )
-        redis_client.hset(self.active_requests_key, request_id, str(time.time()))
+        if result == -1:
+            raise AppInvokeQuotaExceededError(
+                "Too many requests. Please try again later. The current maximum "
+                "requests per second allowed is {}.".format(self.max_requests_per_second)
+            )
+        if self.max_active_requests <= 0:
+            return RateLimit._UNLIMITED_REQUEST_ID
         return request_id
 
     def exit(self, request_id: str):
         if request_id == RateLimit._UNLIMITED_REQUEST_ID:
             return
-        redis_client.hdel(self.active_requests_key, request_id)
+        redis_client.zrem(self.active_requests_key, request_id)
 
     @staticmethod
     def gen_request_key() -> str:
@@ -1,21 +1,65 @@
+import asyncio
 import logging
+import weakref
 from collections.abc import Mapping
 from enum import StrEnum
 from threading import Lock
 from typing import Any, Optional
 
-from httpx import Timeout, post
+import httpx
+from httpx import Response, Timeout
 from pydantic import BaseModel
 from yarl import URL
 
 from configs import dify_config
 from core.helper.code_executor.javascript.javascript_transformer import NodeJsTemplateTransformer
+from core.helper.code_executor.jinja2.jinja2_sandbox import Jinja2SandboxRenderer
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
 from core.helper.code_executor.template_transformer import TemplateTransformer
 
 logger = logging.getLogger(__name__)
 
+_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_clients_lock = Lock()
+
+
+def _get_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=dify_config.CODE_EXECUTION_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=dify_config.CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=dify_config.CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_client() -> httpx.Client:
+    """
+    Get the shared client of the sandbox, it is thread-safe and keeps the connections alive between executions.
+    """
+    global _client
+    client = _client
+    if client is None:
+        with _clients_lock:
+            client = _client
+            if client is None:
+                client = httpx.Client(limits=_get_limits())
+                _client = client
+    return client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Get the shared async client of the sandbox for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(limits=_get_limits())
+            _async_clients[loop] = client
+    return client
+
 
 class CodeExecutionError(Exception):
     pass
@@ -63,6 +107,38 @@ class CodeExecutor:
         :param code: code
         :return:
         """
+        try:
+            response = get_client().post(**cls._build_request(language, preload, code))
+        except Exception as e:
+            raise CodeExecutionError(
+                "Failed to execute code, which is likely a network issue,"
+                " please check if the sandbox service is running."
+                f" ( Error: {str(e)} )"
+            )
+
+        return cls._parse_response(response)
+
+    @classmethod
+    async def execute_code_async(cls, language: CodeLanguage, preload: str, code: str) -> str:
+        """
+        Execute code with the async client of the running event loop
+        :param language: code language
+        :param code: code
+        :return:
+        """
+        try:
+            response = await get_async_client().post(**cls._build_request(language, preload, code))
+        except Exception as e:
+            raise CodeExecutionError(
+                "Failed to execute code, which is likely a network issue,"
+                " please check if the sandbox service is running."
+                f" ( Error: {str(e)} )"
+            )
+
+        return cls._parse_response(response)
+
+    @classmethod
+    def _build_request(cls, language: CodeLanguage, preload: str, code: str) -> dict[str, Any]:
         url = URL(str(dify_config.CODE_EXECUTION_ENDPOINT)) / "v1" / "sandbox" / "run"
 
         headers = {"X-Api-Key": dify_config.CODE_EXECUTION_API_KEY}
@@ -74,32 +150,28 @@ class CodeExecutor:
             "enable_network": True,
         }
 
-        try:
-            response = post(
-                str(url),
-                json=data,
-                headers=headers,
-                timeout=Timeout(
-                    connect=dify_config.CODE_EXECUTION_CONNECT_TIMEOUT,
-                    read=dify_config.CODE_EXECUTION_READ_TIMEOUT,
-                    write=dify_config.CODE_EXECUTION_WRITE_TIMEOUT,
-                    pool=None,
-                ),
-            )
-            if response.status_code == 503:
-                raise CodeExecutionError("Code execution service is unavailable")
-            elif response.status_code != 200:
-                raise Exception(
-                    f"Failed to execute code, got status code {response.status_code},"
-                    f" please check if the sandbox service is running"
-                )
-        except CodeExecutionError as e:
-            raise e
-        except Exception as e:
+        return {
+            "url": str(url),
+            "json": data,
+            "headers": headers,
+            "timeout": Timeout(
+                connect=dify_config.CODE_EXECUTION_CONNECT_TIMEOUT,
+                read=dify_config.CODE_EXECUTION_READ_TIMEOUT,
+                write=dify_config.CODE_EXECUTION_WRITE_TIMEOUT,
+                pool=None,
+            ),
+        }
+
+    @staticmethod
+    def _parse_response(response: Response) -> str:
+        if response.status_code == 503:
+            raise CodeExecutionError("Code execution service is unavailable")
+        elif response.status_code != 200:
             raise CodeExecutionError(
                 "Failed to execute code, which is likely a network issue,"
                 " please check if the sandbox service is running."
-                f" ( Error: {str(e)} )"
+                f" ( Error: Failed to execute code, got status code {response.status_code},"
+                f" please check if the sandbox service is running )"
             )
 
         try:
@@ -126,6 +198,11 @@ class CodeExecutor:
         :param inputs: inputs
         :return:
         """
+        if language == CodeLanguage.JINJA2 and dify_config.JINJA2_IN_PROCESS_RENDERING_ENABLED:
+            result = Jinja2SandboxRenderer.render(code, inputs)
+            if result is not None:
+                return {"result": result}
+
         template_transformer = cls.code_template_transformers.get(language)
         if not template_transformer:
             raise CodeExecutionError(f"Unsupported language {language}")
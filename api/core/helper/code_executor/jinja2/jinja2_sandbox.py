@@ -0,0 +1,245 @@
+import json
+import logging
+import operator
+import time
+from collections.abc import Callable, Mapping
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Any, Optional
+
+from jinja2 import TemplateError, nodes
+from jinja2.environment import Template
+from jinja2.sandbox import SandboxedEnvironment, SecurityError
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+# only templates made of these nodes are rendered in process, the others are sent to the remote sandbox
+_ALLOWED_NODES: tuple[type[nodes.Node], ...] = (
+    nodes.Template,
+    nodes.Output,
+    nodes.TemplateData,
+    nodes.If,
+    nodes.For,
+    nodes.Assign,
+    nodes.Name,
+    nodes.Const,
+    nodes.Tuple,
+    nodes.List,
+    nodes.Dict,
+    nodes.Pair,
+    nodes.Keyword,
+    nodes.CondExpr,
+    nodes.Getattr,
+    nodes.Getitem,
+    nodes.Slice,
+    nodes.Filter,
+    nodes.Test,
+    nodes.Compare,
+    nodes.Operand,
+    nodes.And,
+    nodes.Or,
+    nodes.Not,
+    nodes.Neg,
+    nodes.Pos,
+    nodes.Add,
+    nodes.Sub,
+    nodes.Mul,
+    nodes.Div,
+    nodes.FloorDiv,
+    nodes.Mod,
+    nodes.Concat,
+)
+
+# filters without size arguments, the others (center, indent, wordwrap, truncate...) are left to the remote sandbox
+_ALLOWED_FILTERS = frozenset(
+    [
+        "abs",
+        "capitalize",
+        "count",
+        "d",
+        "default",
+        "dictsort",
+        "e",
+        "escape",
+        "first",
+        "float",
+        "int",
+        "join",
+        "last",
+        "length",
+        "list",
+        "lower",
+        "max",
+        "min",
+        "reverse",
+        "round",
+        "safe",
+        "sort",
+        "string",
+        "striptags",
+        "sum",
+        "title",
+        "tojson",
+        "trim",
+        "unique",
+        "upper",
+        "wordcount",
+    ]
+)
+
+# time budget of an in process rendering, longer renderings are left to the remote sandbox
+_RENDER_TIMEOUT = 1.0
+
+_render_deadline: ContextVar[float] = ContextVar("jinja2_render_deadline", default=float("inf"))
+
+
+def _check_size_and_deadline(value: Any) -> None:
+    if isinstance(value, str | list | tuple | dict) and len(value) > dify_config.TEMPLATE_TRANSFORM_MAX_LENGTH:
+        raise SecurityError("the value exceeds the template output limit")
+    if time.perf_counter() > _render_deadline.get():
+        raise SecurityError("the rendering exceeds its time budget")
+
+
+def _size_limited_filter(func: Callable) -> Callable:
+    # wraps copies the pass_context / pass_environment markers of the filter
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        result = func(*args, **kwargs)
+        _check_size_and_deadline(result)
+        return result
+
+    return wrapper
+
+
+class _Jinja2SandboxedEnvironment(SandboxedEnvironment):
+    """
+    Sandboxed environment refusing to repeat sequences beyond the template output limit,
+    so a template can not exhaust the memory of the process rendering it, and failing on
+    unsafe attributes so they are rendered by the remote sandbox.
+    """
+
+    intercepted_binops = frozenset(["*", "+"])
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.filters = {name: _size_limited_filter(self.filters[name]) for name in _ALLOWED_FILTERS}
+
+    def call_binop(self, context, operator_name: str, left: Any, right: Any) -> Any:
+        if operator_name == "*":
+            for sequence, times in ((left, right), (right, left)):
+                if (
+                    isinstance(sequence, str | list | tuple)
+                    and isinstance(times, int)
+                    and len(sequence) * times > dify_config.TEMPLATE_TRANSFORM_MAX_LENGTH
+                ):
+                    raise SecurityError("the repeated sequence exceeds the template output limit")
+            result = operator.mul(left, right)
+        elif operator_name == "+":
+            result = operator.add(left, right)
+        else:
+            return super().call_binop(context, operator_name, left, right)
+
+        _check_size_and_deadline(result)
+        return result
+
+    def unsafe_undefined(self, obj: Any, attribute: str) -> Any:
+        # the remote sandbox resolves unsafe attributes, raise instead of rendering them as undefined
+        raise SecurityError(f"access to attribute {attribute!r} of {type(obj).__name__!r} object is unsafe")
+
+
+class Jinja2SandboxRenderer:
+    """
+    Render Jinja2 templates in process with a sandboxed environment instead of the remote sandbox.
+
+    Only templates made of plain substitutions, conditions, single loops, filters without size arguments
+    and tests are rendered in process, other templates (calls, macros, nested loops, includes, growing
+    assignments...) and templates failing the sandbox size and time checks are left to the remote sandbox.
+    Compiled templates are cached by template.
+    """
+
+    _environment = _Jinja2SandboxedEnvironment()
+
+    @classmethod
+    def render(cls, template: str, inputs: Mapping[str, Any]) -> Optional[str]:
+        """
+        Render the template in process
+        :param template: template
+        :param inputs: inputs
+        :return: rendered template, None if the template must be rendered by the remote sandbox
+        """
+        compiled_template = cls._compile(template)
+        if compiled_template is None:
+            return None
+
+        deadline_token = _render_deadline.set(time.perf_counter() + _RENDER_TIMEOUT)
+        try:
+            # the remote sandbox receives the inputs as json
+            chunks = []
+            length = 0
+            for chunk in compiled_template.generate(**json.loads(json.dumps(inputs, ensure_ascii=False))):
+                length += len(chunk)
+                if length > dify_config.TEMPLATE_TRANSFORM_MAX_LENGTH or time.perf_counter() > _render_deadline.get():
+                    # leave the output size and time limits to the remote sandbox
+                    return None
+                chunks.append(chunk)
+            return "".join(chunks)
+        except (SecurityError, TemplateError, TypeError, ValueError, ArithmeticError):
+            logger.debug("Failed to render template in process, fallback to the remote sandbox", exc_info=True)
+            return None
+        finally:
+            _render_deadline.reset(deadline_token)
+
+    @staticmethod
+    @lru_cache(maxsize=dify_config.JINJA2_TEMPLATE_CACHE_SIZE)
+    def _compile(template: str) -> Optional[Template]:
+        # the remote sandbox embeds the template in a python string literal, escapes would be interpreted
+        if "\\" in template or "'''" in template:
+            return None
+
+        environment = Jinja2SandboxRenderer._environment
+        try:
+            ast = environment.parse(template)
+        except TemplateError:
+            return None
+        if not Jinja2SandboxRenderer._is_allowed(ast, in_loop=False, in_assign=False):
+            return None
+
+        try:
+            return environment.from_string(ast)
+        except TemplateError:
+            return None
+
+    @staticmethod
+    def _is_allowed(node: nodes.Node, in_loop: bool, in_assign: bool) -> bool:
+        if not isinstance(node, _ALLOWED_NODES):
+            return False
+        if isinstance(node, nodes.Filter) and node.name not in _ALLOWED_FILTERS:
+            return False
+        if isinstance(node, nodes.For):
+            # nested and recursive loops may run far longer than the remote sandbox allows
+            if in_loop or node.recursive:
+                return False
+            in_loop = True
+        # repeating sequences in a loop multiplies the output beyond its limit
+        if isinstance(node, nodes.Mul) and in_loop:
+            return False
+        if isinstance(node, nodes.Assign):
+            in_assign = True
+        # assigned values may double on each assignment, only numbers are added in assignments
+        if in_assign and isinstance(node, nodes.Concat):
+            return False
+        if in_assign and isinstance(node, nodes.Add) and not Jinja2SandboxRenderer._is_number_addition(node):
+            return False
+        return all(Jinja2SandboxRenderer._is_allowed(child, in_loop, in_assign) for child in node.iter_child_nodes())
+
+    @staticmethod
+    def _is_number_addition(node: nodes.Add) -> bool:
+        # adding a number constant fails on anything but numbers
+        return any(
+            isinstance(operand, nodes.Const)
+            and isinstance(operand.value, int | float)
+            and not isinstance(operand.value, bool)
+            for operand in (node.left, node.right)
+        )
@@ -2,8 +2,13 @@
 Proxy requests to avoid SSRF
 """
 
+import asyncio
 import logging
+import threading
 import time
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Optional
 
 import httpx
 
@@ -21,7 +26,74 @@ class MaxRetriesExceededError(ValueError):
     pass
 
 
-def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+def _get_proxy_config() -> tuple[Optional[str], Optional[str], Optional[str]]:
+    return dify_config.SSRF_PROXY_ALL_URL, dify_config.SSRF_PROXY_HTTP_URL, dify_config.SSRF_PROXY_HTTPS_URL
+
+
+def _build_client_kwargs(proxy_config: tuple[Optional[str], Optional[str], Optional[str]], is_async: bool) -> dict:
+    proxy_all_url, proxy_http_url, proxy_https_url = proxy_config
+    limits = httpx.Limits(
+        max_connections=dify_config.SSRF_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=dify_config.SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=dify_config.SSRF_POOL_KEEPALIVE_EXPIRY,
+    )
+    client_kwargs: dict = {
+        "limits": limits,
+        "http2": dify_config.SSRF_HTTP2_ENABLED,
+        # the client is shared by all callers, so never keep cookies set by responses
+        "cookies": CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    }
+    if proxy_all_url:
+        client_kwargs["proxy"] = proxy_all_url
+    elif proxy_http_url and proxy_https_url:
+        transport_class = httpx.AsyncHTTPTransport if is_async else httpx.HTTPTransport
+        transport_kwargs = {"limits": limits, "http2": dify_config.SSRF_HTTP2_ENABLED}
+        client_kwargs["mounts"] = {
+            "http://": transport_class(proxy=proxy_http_url, **transport_kwargs),
+            "https://": transport_class(proxy=proxy_https_url, **transport_kwargs),
+        }
+    return client_kwargs
+
+
+_clients: dict[tuple, httpx.Client] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """
+    Get the shared client for the current proxy configuration.
+    The client is thread-safe and keeps connections alive between requests.
+    """
+    proxy_config = _get_proxy_config()
+    client = _clients.get(proxy_config)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(proxy_config)
+            if client is None:
+                client = httpx.Client(**_build_client_kwargs(proxy_config, is_async=False))
+                _clients[proxy_config] = client
+    return client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Get the shared async client for the current proxy configuration and running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    proxy_config = _get_proxy_config()
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(proxy_config)
+        if client is None:
+            client = httpx.AsyncClient(**_build_client_kwargs(proxy_config, is_async=True))
+            loop_clients[proxy_config] = client
+    return client
+
+
+def _prepare_request_kwargs(kwargs: dict) -> dict:
     if "allow_redirects" in kwargs:
         allow_redirects = kwargs.pop("allow_redirects")
         if "follow_redirects" not in kwargs:
@@ -35,23 +107,17 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
             write=dify_config.SSRF_DEFAULT_WRITE_TIME_OUT,
         )
 
+    kwargs.pop("stream", False)
+    return kwargs
+
+
+def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    kwargs = _prepare_request_kwargs(kwargs)
+
     retries = 0
-    stream = kwargs.pop("stream", False)
     while retries <= max_retries:
         try:
-            if dify_config.SSRF_PROXY_ALL_URL:
-                with httpx.Client(proxy=dify_config.SSRF_PROXY_ALL_URL) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
-                proxy_mounts = {
-                    "http://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTP_URL),
-                    "https://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTPS_URL),
-                }
-                with httpx.Client(mounts=proxy_mounts) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            else:
-                with httpx.Client() as client:
-                    response = client.request(method=method, url=url, **kwargs)
+            response = get_client().request(method=method, url=url, **kwargs)
 
             if response.status_code not in STATUS_FORCELIST:
                 return response
@@ -69,6 +135,30 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
 
 
+async def make_async_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    kwargs = _prepare_request_kwargs(kwargs)
+
+    retries = 0
+    while retries <= max_retries:
+        try:
+            response = await get_async_client().request(method=method, url=url, **kwargs)
+
+            if response.status_code not in STATUS_FORCELIST:
+                return response
+            else:
+                logging.warning(f"Received status code {response.status_code} for URL {url} which is in the force list")
+
+        except httpx.RequestError as e:
+            logging.warning(f"Request to URL {url} failed on attempt {retries + 1}: {e}")
+            if max_retries == 0:
+                raise
+
+        retries += 1
+        if retries <= max_retries:
+            await asyncio.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
+    raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
+
+
 def get(url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     return make_request("GET", url, max_retries=max_retries, **kwargs)
 
@@ -6,10 +6,12 @@ import re
 import threading
 import time
 import uuid
+from collections.abc import Iterator
 from typing import Any, Optional, cast
 
-from flask import current_app
+from flask import Flask, current_app
 from flask_login import current_user  # type: ignore
+from sqlalchemy import func
 from sqlalchemy.orm.exc import ObjectDeletedError
 
 from configs import dify_config
@@ -66,23 +68,8 @@ class IndexingRunner:
                     raise ValueError("no process rule found")
                 index_type = dataset_document.doc_form
                 index_processor = IndexProcessorFactory(index_type).init_index_processor()
-                # extract
-                text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
-
-                # transform
-                documents = self._transform(
-                    index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
-                )
-                # save segment
-                self._load_segments(dataset, dataset_document, documents)
-
-                # load
-                self._load(
-                    index_processor=index_processor,
-                    dataset=dataset,
-                    dataset_document=dataset_document,
-                    documents=documents,
-                )
+                # extract, transform, save segments and load
+                self._index_document(index_processor, dataset, dataset_document, processing_rule.to_dict())
             except DocumentIsPausedError:
                 raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
             except ProviderTokenNotInitError as e:
@@ -108,11 +95,23 @@ class IndexingRunner:
             if not dataset:
                 raise ValueError("no dataset found")
 
+            index_type = dataset_document.doc_form
+            index_processor = IndexProcessorFactory(index_type).init_index_processor()
+
             # get exist document_segment list and delete
             document_segments = DocumentSegment.query.filter_by(
                 dataset_id=dataset.id, document_id=dataset_document.id
             ).all()
 
+            if document_segments:
+                # batches may have been loaded before the interruption, delete them from the index
+                index_processor.clean(
+                    dataset,
+                    [document_segment.index_node_id for document_segment in document_segments],
+                    with_keywords=True,
+                    delete_child_chunks=True,
+                )
+
             for document_segment in document_segments:
                 db.session.delete(document_segment)
                 if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
@@ -128,22 +127,8 @@ class IndexingRunner:
             if not processing_rule:
                 raise ValueError("no process rule found")
 
-            index_type = dataset_document.doc_form
-            index_processor = IndexProcessorFactory(index_type).init_index_processor()
-            # extract
-            text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
-
-            # transform
-            documents = self._transform(
-                index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
-            )
-            # save segment
-            self._load_segments(dataset, dataset_document, documents)
-
-            # load
-            self._load(
-                index_processor=index_processor, dataset=dataset, dataset_document=dataset_document, documents=documents
-            )
+            # extract, transform, save segments and load
+            self._index_document(index_processor, dataset, dataset_document, processing_rule.to_dict())
         except DocumentIsPausedError:
             raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
         except ProviderTokenNotInitError as e:
@@ -327,15 +312,180 @@ class IndexingRunner:
             return IndexingEstimate(total_segments=total_segments * 20, qa_preview=preview_texts, preview=[])
         return IndexingEstimate(total_segments=total_segments, preview=preview_texts)  # type: ignore
 
+    def _index_document(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        if not index_processor.supports_batch_transform(process_rule):
+            # extract
+            text_docs = self._extract(index_processor, dataset_document, process_rule)
+
+            # transform
+            documents = self._transform(
+                index_processor, dataset, text_docs, dataset_document.doc_language, process_rule
+            )
+            # save segment
+            self._load_segments(dataset, dataset_document, documents)
+
+            # load
+            self._load(
+                index_processor=index_processor, dataset=dataset, dataset_document=dataset_document, documents=documents
+            )
+            return
+
+        self._index_document_in_batches(index_processor, dataset, dataset_document, process_rule)
+
+    def _index_document_in_batches(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        """
+        Extract, transform, save and load the document in batches of INDEXING_BATCH_CHARACTERS characters,
+        a batch is loaded into the index while the next one is extracted, so at most two batches are in memory.
+
+        The document stays in splitting status until the extraction finished, an interrupted run is recovered
+        from the start, then in indexing status until the last batch is loaded.
+        """
+        extract_setting = self._get_extract_setting(dataset_document)
+        if extract_setting is None:
+            text_docs_iter: Iterator[Document] = iter([])
+        else:
+            text_docs_iter = index_processor.extract_iter(extract_setting, process_rule_mode=process_rule["mode"])
+        embedding_model_instance = self._get_embedding_model_instance(dataset)
+        doc_store = DatasetDocumentStore(
+            dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+        )
+        flask_app = current_app._get_current_object()  # type: ignore
+
+        self._update_document_index_status(document_id=dataset_document.id, after_indexing_status="splitting")
+        indexing_start_at = time.perf_counter()
+        word_count = 0
+        tokens = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="indexing_load") as executor:
+            load_future: Optional[concurrent.futures.Future] = None
+            for text_docs in self._batch_text_docs(text_docs_iter, dify_config.INDEXING_BATCH_CHARACTERS):
+                self._check_document_paused_status(dataset_document.id)
+                word_count += sum(len(text_doc.page_content) for text_doc in text_docs)
+                for text_doc in text_docs:
+                    if text_doc.metadata is not None:
+                        text_doc.metadata["document_id"] = dataset_document.id
+                        text_doc.metadata["dataset_id"] = dataset_document.dataset_id
+
+                documents = index_processor.transform(
+                    text_docs,
+                    embedding_model_instance=embedding_model_instance,
+                    process_rule=process_rule,
+                    tenant_id=dataset.tenant_id,
+                    doc_language=dataset_document.doc_language,
+                )
+                if not documents:
+                    continue
+                doc_store.add_documents(
+                    docs=documents, save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX
+                )
+                self._update_segments_by_index_node_ids(
+                    dataset_document.id,
+                    [document.metadata["doc_id"] for document in documents if document.metadata],
+                    {
+                        DocumentSegment.status: "indexing",
+                        DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                    },
+                )
+
+                # wait for the previous batch before handing over this one, bounding the batches in memory
+                if load_future is not None:
+                    tokens += load_future.result()
+                load_future = executor.submit(
+                    self._load_documents_in_context,
+                    flask_app,
+                    index_processor,
+                    dataset.id,
+                    dataset_document.id,
+                    documents,
+                    embedding_model_instance,
+                )
+
+            cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            self._update_document_index_status(
+                document_id=dataset_document.id,
+                after_indexing_status="indexing",
+                extra_update_params={
+                    DatasetDocument.word_count: word_count,
+                    DatasetDocument.parsing_completed_at: cur_time,
+                    DatasetDocument.cleaning_completed_at: cur_time,
+                    DatasetDocument.splitting_completed_at: cur_time,
+                },
+            )
+            if load_future is not None:
+                tokens += load_future.result()
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    @staticmethod
+    def _batch_text_docs(text_docs: Iterator[Document], batch_characters: int) -> Iterator[list[Document]]:
+        """Group the extracted documents into batches of about batch_characters characters."""
+        batch: list[Document] = []
+        batch_size = 0
+        for text_doc in text_docs:
+            batch.append(text_doc)
+            batch_size += len(text_doc.page_content)
+            if batch_size >= batch_characters:
+                yield batch
+                batch = []
+                batch_size = 0
+        if batch:
+            yield batch
+
     def _extract(
         self, index_processor: BaseIndexProcessor, dataset_document: DatasetDocument, process_rule: dict
     ) -> list[Document]:
+        extract_setting = self._get_extract_setting(dataset_document)
+        text_docs = []
+        if extract_setting is not None:
+            text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
+        # update document status to splitting
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="splitting",
+            extra_update_params={
+                DatasetDocument.word_count: sum(len(text_doc.page_content) for text_doc in text_docs),
+                DatasetDocument.parsing_completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+            },
+        )
+
+        # replace doc id to document model id
+        text_docs = cast(list[Document], text_docs)
+        for text_doc in text_docs:
+            if text_doc.metadata is not None:
+                text_doc.metadata["document_id"] = dataset_document.id
+                text_doc.metadata["dataset_id"] = dataset_document.dataset_id
+
+        return text_docs
+
+    @staticmethod
+    def _get_extract_setting(dataset_document: DatasetDocument) -> Optional[ExtractSetting]:
         # load file
         if dataset_document.data_source_type not in {"upload_file", "notion_import", "website_crawl"}:
-            return []
+            return None
 
         data_source_info = dataset_document.data_source_info_dict
-        text_docs = []
         if dataset_document.data_source_type == "upload_file":
             if not data_source_info or "upload_file_id" not in data_source_info:
                 raise ValueError("no upload file found")
@@ -344,11 +494,11 @@ class IndexingRunner:
                 db.session.query(UploadFile).filter(UploadFile.id == data_source_info["upload_file_id"]).one_or_none()
             )
 
-            if file_detail:
-                extract_setting = ExtractSetting(
-                    datasource_type="upload_file", upload_file=file_detail, document_model=dataset_document.doc_form
-                )
-                text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
+            if not file_detail:
+                return None
+            return ExtractSetting(
+                datasource_type="upload_file", upload_file=file_detail, document_model=dataset_document.doc_form
+            )
         elif dataset_document.data_source_type == "notion_import":
             if (
                 not data_source_info
@@ -356,7 +506,7 @@ class IndexingRunner:
                 or "notion_page_id" not in data_source_info
             ):
                 raise ValueError("no notion import info found")
-            extract_setting = ExtractSetting(
+            return ExtractSetting(
                 datasource_type="notion_import",
                 notion_info={
                     "notion_workspace_id": data_source_info["notion_workspace_id"],
@@ -367,8 +517,7 @@ class IndexingRunner:
                 },
                 document_model=dataset_document.doc_form,
             )
-            text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
-        elif dataset_document.data_source_type == "website_crawl":
+        else:
             if (
                 not data_source_info
                 or "provider" not in data_source_info
@@ -376,7 +525,7 @@ class IndexingRunner:
                 or "job_id" not in data_source_info
             ):
                 raise ValueError("no website import info found")
-            extract_setting = ExtractSetting(
+            return ExtractSetting(
                 datasource_type="website_crawl",
                 website_info={
                     "provider": data_source_info["provider"],
@@ -388,25 +537,6 @@ class IndexingRunner:
                 },
                 document_model=dataset_document.doc_form,
             )
-            text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
-        # update document status to splitting
-        self._update_document_index_status(
-            document_id=dataset_document.id,
-            after_indexing_status="splitting",
-            extra_update_params={
-                DatasetDocument.word_count: sum(len(text_doc.page_content) for text_doc in text_docs),
-                DatasetDocument.parsing_completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-            },
-        )
-
-        # replace doc id to document model id
-        text_docs = cast(list[Document], text_docs)
-        for text_doc in text_docs:
-            if text_doc.metadata is not None:
-                text_doc.metadata["document_id"] = dataset_document.id
-                text_doc.metadata["dataset_id"] = dataset_document.dataset_id
-
-        return text_docs
 
     @staticmethod
     def filter_string(text):
@@ -529,6 +659,53 @@ class IndexingRunner:
 
         # chunk nodes by chunk size
         indexing_start_at = time.perf_counter()
+        tokens = self._load_documents(index_processor, dataset, dataset_document, documents, embedding_model_instance)
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    def _load_documents_in_context(
+        self,
+        flask_app: Flask,
+        index_processor: BaseIndexProcessor,
+        dataset_id: str,
+        dataset_document_id: str,
+        documents: list[Document],
+        embedding_model_instance: Optional[ModelInstance],
+    ) -> int:
+        with flask_app.app_context():
+            # the models are loaded in the session of this thread, the caller keeps committing its own
+            dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+            if not dataset:
+                raise ValueError("no dataset found")
+            dataset_document = (
+                db.session.query(DatasetDocument).filter(DatasetDocument.id == dataset_document_id).first()
+            )
+            if not dataset_document:
+                raise DocumentIsDeletedPausedError()
+            return self._load_documents(index_processor, dataset, dataset_document, documents, embedding_model_instance)
+
+    def _load_documents(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        documents: list[Document],
+        embedding_model_instance: Optional[ModelInstance],
+    ) -> int:
+        """
+        insert index of the documents and update their segment status to completed, return the used tokens
+        """
         tokens = 0
         if dataset_document.doc_form != IndexType.PARENT_CHILD_INDEX:
             # create keyword index
@@ -570,19 +747,8 @@ class IndexingRunner:
                     tokens += future.result()
         if dataset_document.doc_form != IndexType.PARENT_CHILD_INDEX:
             create_keyword_thread.join()
-        indexing_end_at = time.perf_counter()
 
-        # update document status to completed
-        self._update_document_index_status(
-            document_id=dataset_document.id,
-            after_indexing_status="completed",
-            extra_update_params={
-                DatasetDocument.tokens: tokens,
-                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
-                DatasetDocument.error: None,
-            },
-        )
+        return tokens
 
     @staticmethod
     def _process_keyword_index(flask_app, dataset_id, document_id, documents):
@@ -616,17 +782,24 @@ class IndexingRunner:
             # check document is paused
             self._check_document_paused_status(dataset_document.id)
 
+            document_ids = [document.metadata["doc_id"] for document in chunk_documents]
             tokens = 0
             if embedding_model_instance:
-                tokens += sum(
-                    embedding_model_instance.get_text_embedding_num_tokens([document.page_content])
-                    for document in chunk_documents
+                # the token counts were computed when the segments were saved
+                tokens = (
+                    db.session.query(func.sum(DocumentSegment.tokens))
+                    .filter(
+                        DocumentSegment.document_id == dataset_document.id,
+                        DocumentSegment.dataset_id == dataset.id,
+                        DocumentSegment.index_node_id.in_(document_ids),
+                    )
+                    .scalar()
+                    or 0
                 )
 
             # load index
             index_processor.load(dataset, chunk_documents, with_keywords=False)
 
-            document_ids = [document.metadata["doc_id"] for document in chunk_documents]
             db.session.query(DocumentSegment).filter(
                 DocumentSegment.document_id == dataset_document.id,
                 DocumentSegment.dataset_id == dataset.id,
@@ -681,6 +854,16 @@ class IndexingRunner:
         DocumentSegment.query.filter_by(document_id=dataset_document_id).update(update_params)
         db.session.commit()
 
+    @staticmethod
+    def _update_segments_by_index_node_ids(dataset_document_id: str, index_node_ids: list[str], update_params: dict):
+        """
+        Update the document segments of the index node ids.
+        """
+        DocumentSegment.query.filter(
+            DocumentSegment.document_id == dataset_document_id, DocumentSegment.index_node_id.in_(index_node_ids)
+        ).update(update_params, synchronize_session=False)
+        db.session.commit()
+
     def _transform(
         self,
         index_processor: BaseIndexProcessor,
@@ -689,25 +872,9 @@ class IndexingRunner:
         doc_language: str,
         process_rule: dict,
     ) -> list[Document]:
-        # get embedding model instance
-        embedding_model_instance = None
-        if dataset.indexing_technique == "high_quality":
-            if dataset.embedding_model_provider:
-                embedding_model_instance = self.model_manager.get_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    provider=dataset.embedding_model_provider,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                    model=dataset.embedding_model,
-                )
-            else:
-                embedding_model_instance = self.model_manager.get_default_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                )
-
         documents = index_processor.transform(
             text_docs,
-            embedding_model_instance=embedding_model_instance,
+            embedding_model_instance=self._get_embedding_model_instance(dataset),
             process_rule=process_rule,
             tenant_id=dataset.tenant_id,
             doc_language=doc_language,
@@ -715,6 +882,22 @@ class IndexingRunner:
 
         return documents
 
+    def _get_embedding_model_instance(self, dataset: Dataset) -> Optional[ModelInstance]:
+        # get embedding model instance
+        if dataset.indexing_technique != "high_quality":
+            return None
+        if dataset.embedding_model_provider:
+            return self.model_manager.get_model_instance(
+                tenant_id=dataset.tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model,
+            )
+        return self.model_manager.get_default_model_instance(
+            tenant_id=dataset.tenant_id,
+            model_type=ModelType.TEXT_EMBEDDING,
+        )
+
     def _load_segments(self, dataset, dataset_document, documents):
         # save node to document segment
         doc_store = DatasetDocumentStore(
@@ -1,8 +1,9 @@
+import logging
 from collections.abc import Sequence
 from typing import Optional
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
-from core.file import file_manager
+from core.file import FileUploadConfig, file_manager
 from core.model_manager import ModelInstance
 from core.model_runtime.entities import (
     AssistantPromptMessage,
@@ -15,9 +16,14 @@ from core.model_runtime.entities import (
 )
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from factories import file_factory
 from models.model import AppMode, Conversation, Message, MessageFile
-from models.workflow import WorkflowRun
+from models.workflow import Workflow, WorkflowRun
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_NUM_TOKENS_CACHE_TTL = 86400
 
 
 class TokenBufferMemory:
@@ -67,24 +73,29 @@ class TokenBufferMemory:
             thread_messages.pop(0)
 
         messages = list(reversed(thread_messages))
+        if not messages:
+            return []
+
+        message_files_map: dict[str, list[MessageFile]] = {}
+        message_files = db.session.query(MessageFile).filter(MessageFile.message_id.in_([m.id for m in messages])).all()
+        for message_file in message_files:
+            message_files_map.setdefault(message_file.message_id, []).append(message_file)
+
+        workflow_file_extra_configs = {}
+        if self.conversation.mode in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
+            workflow_run_ids = {m.workflow_run_id for m in messages if m.workflow_run_id and m.id in message_files_map}
+            workflow_file_extra_configs = self._get_workflow_file_extra_configs(workflow_run_ids)
 
         prompt_messages: list[PromptMessage] = []
+        token_cache_keys: list[str] = []
         for message in messages:
-            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
+            files = message_files_map.get(message.id)
             if files:
                 file_extra_config = None
                 if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
                     file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
-                else:
-                    if message.workflow_run_id:
-                        workflow_run = (
-                            db.session.query(WorkflowRun).filter(WorkflowRun.id == message.workflow_run_id).first()
-                        )
-
-                        if workflow_run and workflow_run.workflow:
-                            file_extra_config = FileUploadConfigManager.convert(
-                                workflow_run.workflow.features_dict, is_vision=False
-                            )
+                elif message.workflow_run_id:
+                    file_extra_config = workflow_file_extra_configs.get(message.workflow_run_id)
 
                 detail = ImagePromptMessageContent.DETAIL.LOW
                 if file_extra_config and app_record:
@@ -114,20 +125,101 @@ class TokenBufferMemory:
                 prompt_messages.append(UserPromptMessage(content=message.query))
 
             prompt_messages.append(AssistantPromptMessage(content=message.answer))
+            token_cache_keys.append(self._get_token_cache_key(message.id, PromptMessageRole.USER))
+            token_cache_keys.append(self._get_token_cache_key(message.id, PromptMessageRole.ASSISTANT))
 
-        if not prompt_messages:
-            return []
+        return self._prune_prompt_messages(prompt_messages, token_cache_keys, max_token_limit)
 
-        # prune the chat message if it exceeds the max token limit
+    def _prune_prompt_messages(
+        self, prompt_messages: list[PromptMessage], token_cache_keys: list[str], max_token_limit: int
+    ) -> list[PromptMessage]:
+        """
+        Drop the oldest prompt messages until the history fits into max_token_limit.
+        Token counts of single messages are cached, so every message is counted at most once.
+        """
         curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        if curr_message_tokens <= max_token_limit:
+            return prompt_messages
+
+        excess_tokens = curr_message_tokens - max_token_limit
+        message_num_tokens = self._get_cached_message_num_tokens(token_cache_keys)
+        # counting a single message includes the per request overhead, it is subtracted to cache the message alone
+        request_num_tokens: Optional[int] = None
+        pruned_count = 0
+        pruned_tokens = 0
+        while pruned_tokens < excess_tokens and pruned_count < len(prompt_messages) - 1:
+            num_tokens = message_num_tokens[pruned_count]
+            if num_tokens is None:
+                if request_num_tokens is None:
+                    request_num_tokens = self.model_instance.get_llm_num_tokens([])
+                num_tokens = max(
+                    self.model_instance.get_llm_num_tokens([prompt_messages[pruned_count]]) - request_num_tokens, 0
+                )
+                self._set_cached_message_num_tokens(token_cache_keys[pruned_count], num_tokens)
+            pruned_tokens += num_tokens
+            pruned_count += 1
+
+        # single message counts are estimates, verify the total, then drop or put back messages to fit exactly
+        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages[pruned_count:])
+        while curr_message_tokens > max_token_limit and pruned_count < len(prompt_messages) - 1:
+            pruned_count += 1
+            curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages[pruned_count:])
+        if curr_message_tokens <= max_token_limit:
+            while (
+                pruned_count > 0
+                and self.model_instance.get_llm_num_tokens(prompt_messages[pruned_count - 1 :]) <= max_token_limit
+            ):
+                pruned_count -= 1
+
+        return prompt_messages[pruned_count:]
+
+    def _get_workflow_file_extra_configs(self, workflow_run_ids: set[str]) -> dict[str, FileUploadConfig]:
+        """
+        Get file upload configs of the workflows that produced the given workflow runs.
+        """
+        if not workflow_run_ids:
+            return {}
+
+        workflow_runs = (
+            db.session.query(WorkflowRun.id, WorkflowRun.workflow_id).filter(WorkflowRun.id.in_(workflow_run_ids)).all()
+        )
+        workflows = (
+            db.session.query(Workflow).filter(Workflow.id.in_({run.workflow_id for run in workflow_runs})).all()
+            if workflow_runs
+            else []
+        )
+        workflow_configs = {
+            workflow.id: FileUploadConfigManager.convert(workflow.features_dict, is_vision=False)
+            for workflow in workflows
+        }
+
+        file_extra_configs = {}
+        for workflow_run in workflow_runs:
+            file_extra_config = workflow_configs.get(workflow_run.workflow_id)
+            if file_extra_config:
+                file_extra_configs[workflow_run.id] = file_extra_config
+        return file_extra_configs
+
+    def _get_token_cache_key(self, message_id: str, role: PromptMessageRole) -> str:
+        # counts exclude the per request overhead
+        model_key = f"{self.model_instance.provider}:{self.model_instance.model}"
+        return f"message_net_num_tokens:{model_key}:{message_id}:{role.value}"
 
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+    @staticmethod
+    def _get_cached_message_num_tokens(cache_keys: list[str]) -> list[Optional[int]]:
+        try:
+            values = redis_client.mget(cache_keys)
+        except Exception:
+            logger.exception("Failed to get message token counts from redis")
+            return [None] * len(cache_keys)
+        return [int(value) if value is not None else None for value in values]
 
-        return prompt_messages
+    @staticmethod
+    def _set_cached_message_num_tokens(cache_key: str, num_tokens: int) -> None:
+        try:
+            redis_client.setex(cache_key, MESSAGE_NUM_TOKENS_CACHE_TTL, num_tokens)
+        except Exception:
+            logger.exception("Failed to set message token count to redis")
 
     def get_history_prompt_text(
         self,
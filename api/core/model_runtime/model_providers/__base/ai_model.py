@@ -1,11 +1,10 @@
 import decimal
-import os
 from abc import ABC, abstractmethod
 from typing import Optional
 
 from pydantic import ConfigDict
 
-from core.helper.position_helper import get_position_map, sort_by_position_map
+from core.helper.position_helper import sort_by_position_map
 from core.model_runtime.entities.common_entities import I18nObject
 from core.model_runtime.entities.defaults import PARAMETER_RULE_TEMPLATE
 from core.model_runtime.entities.model_entities import (
@@ -19,7 +18,7 @@ from core.model_runtime.entities.model_entities import (
 )
 from core.model_runtime.errors.invoke import InvokeAuthorizationError, InvokeError
 from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
-from core.tools.utils.yaml_utils import load_yaml_file
+from core.model_runtime.model_providers.model_schema_registry import model_schema_registry
 
 
 class AIModel(ABC):
@@ -144,31 +143,11 @@ class AIModel(ABC):
         # get provider name
         provider_name = self.__class__.__module__.split(".")[-3]
 
-        # get the path of current classes
-        current_path = os.path.abspath(__file__)
-        # get parent path of the current path
-        provider_model_type_path = os.path.join(
-            os.path.dirname(os.path.dirname(current_path)), provider_name, model_type
-        )
-
-        # get all yaml files path under provider_model_type_path that do not start with __
-        model_schema_yaml_paths = [
-            os.path.join(provider_model_type_path, model_schema_yaml)
-            for model_schema_yaml in os.listdir(provider_model_type_path)
-            if not model_schema_yaml.startswith("__")
-            and not model_schema_yaml.startswith("_")
-            and os.path.isfile(os.path.join(provider_model_type_path, model_schema_yaml))
-            and model_schema_yaml.endswith(".yaml")
-        ]
-
-        # get _position.yaml file path
-        position_map = get_position_map(provider_model_type_path)
-
-        # traverse all model_schema_yaml_paths
-        for model_schema_yaml_path in model_schema_yaml_paths:
-            # read yaml data from yaml file
-            yaml_data = load_yaml_file(model_schema_yaml_path)
+        # get model schemas and _position.yaml data from the precompiled schema registry
+        model_schema_yamls, position_map = model_schema_registry.get_model_schemas(provider_name, model_type)
 
+        # traverse all model schemas
+        for model_schema_yaml_file_name, yaml_data in model_schema_yamls:
             new_parameter_rules = []
             for parameter_rule in yaml_data.get("parameter_rules", []):
                 if "use_template" in parameter_rule:
@@ -197,7 +176,7 @@ class AIModel(ABC):
                 # yaml_data to entity
                 model_schema = AIModelEntity(**yaml_data)
             except Exception as e:
-                model_schema_yaml_file_name = os.path.basename(model_schema_yaml_path).rstrip(".yaml")
+                model_schema_yaml_file_name = model_schema_yaml_file_name.rstrip(".yaml")
                 raise Exception(
                     f"Invalid model schema for {provider_name}.{model_type}.{model_schema_yaml_file_name}: {str(e)}"
                 )
@@ -6,7 +6,7 @@ from core.helper.module_import_helper import get_subclasses_from_module, import_
 from core.model_runtime.entities.model_entities import AIModelEntity, ModelType
 from core.model_runtime.entities.provider_entities import ProviderEntity
 from core.model_runtime.model_providers.__base.ai_model import AIModel
-from core.tools.utils.yaml_utils import load_yaml_file
+from core.model_runtime.model_providers.model_schema_registry import model_schema_registry
 
 
 class ModelProvider(ABC):
@@ -38,13 +38,8 @@ class ModelProvider(ABC):
         # get dirname of the current path
         provider_name = self.__class__.__module__.split(".")[-1]
 
-        # get the path of the model_provider classes
-        base_path = os.path.abspath(__file__)
-        current_path = os.path.join(os.path.dirname(os.path.dirname(base_path)), provider_name)
-
-        # read provider schema from yaml file
-        yaml_path = os.path.join(current_path, f"{provider_name}.yaml")
-        yaml_data = load_yaml_file(yaml_path)
+        # read provider schema of the yaml file from the precompiled schema registry
+        yaml_data = model_schema_registry.get_provider_schema(provider_name)
 
         try:
             # yaml_data to entity
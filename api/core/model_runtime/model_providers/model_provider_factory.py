@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 from collections.abc import Sequence
 from typing import Optional
 
@@ -25,7 +26,10 @@ class ModelProviderExtension(BaseModel):
 
 
 class ModelProviderFactory:
+    # providers and their schemas are shared by all factories of the process
     model_provider_extensions: Optional[dict[str, ModelProviderExtension]] = None
+    providers: Optional[list[ProviderEntity]] = None
+    _lock = threading.Lock()
 
     def __init__(self) -> None:
         # for cache in memory
@@ -36,6 +40,16 @@ class ModelProviderFactory:
         Get all providers
         :return: list of providers
         """
+        if ModelProviderFactory.providers is not None:
+            return list(ModelProviderFactory.providers)
+
+        with ModelProviderFactory._lock:
+            if ModelProviderFactory.providers is None:
+                ModelProviderFactory.providers = self._build_providers()
+
+        return list(ModelProviderFactory.providers)
+
+    def _build_providers(self) -> list[ProviderEntity]:
         # scan all providers
         model_provider_extensions = self._get_model_provider_map()
 
@@ -45,8 +59,9 @@ class ModelProviderFactory:
             # get model_provider instance
             model_provider_instance = model_provider_extension.provider_instance
 
-            # get provider schema
+            # get provider schema, copy it to keep the cached provider schema without models
             provider_schema = model_provider_instance.get_provider_schema()
+            provider_schema = provider_schema.model_copy(update={"models": list(provider_schema.models)})
 
             for model_type in provider_schema.supported_model_types:
                 # get predefined models for given model type
@@ -56,7 +71,6 @@ class ModelProviderFactory:
 
             providers.append(provider_schema)
 
-        # return providers
         return providers
 
     def provider_credentials_validate(self, *, provider: str, credentials: dict) -> dict:
@@ -218,8 +232,8 @@ class ModelProviderFactory:
         Raises:
             None.
         """
-        if self.model_provider_extensions:
-            return self.model_provider_extensions
+        if ModelProviderFactory.model_provider_extensions:
+            return ModelProviderFactory.model_provider_extensions
 
         # get the path of current classes
         current_path = os.path.abspath(__file__)
@@ -274,6 +288,6 @@ class ModelProviderFactory:
 
         sorted_extensions = sort_to_dict_by_position_map(position_map, model_providers, lambda x: x.name)
 
-        self.model_provider_extensions = sorted_extensions
+        ModelProviderFactory.model_provider_extensions = sorted_extensions
 
         return sorted_extensions
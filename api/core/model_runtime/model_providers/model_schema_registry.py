@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from core.helper.position_helper import get_position_map
+from core.tools.utils.yaml_utils import load_yaml_file
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSchemaRegistry:
+    """
+    Registry of the provider and model schemas defined in the YAML files of the model providers.
+
+    The YAML files of a provider are parsed once and compiled into a JSON artifact, which is loaded
+    instead of the YAML files as long as their content does not change. Providers are loaded lazily,
+    and every call returns new objects, so callers are free to modify the returned schemas.
+    """
+
+    def __init__(self, model_providers_path: str, artifact_path: str) -> None:
+        self._model_providers_path = model_providers_path
+        self._artifact_path = artifact_path
+        self._compiled_providers: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get_provider_schema(self, provider: str) -> dict:
+        """
+        Get the provider schema defined in `{provider}.yaml`
+
+        :param provider: provider name
+        :return: provider schema data, empty if the file is missing or invalid
+        """
+        return self._load_provider(provider)["provider_schema"]
+
+    def get_model_schemas(self, provider: str, model_type: str) -> tuple[list[tuple[str, dict]], dict[str, int]]:
+        """
+        Get the predefined model schemas of a provider for given model type
+
+        :param provider: provider name
+        :param model_type: model type directory name, such as `llm` or `text_embedding`
+        :return: list of (yaml file name, model schema data) and the position map of the models
+        """
+        model_type_data = self._load_provider(provider)["model_types"].get(model_type)
+        if not model_type_data:
+            return [], {}
+
+        model_schemas = [(file_name, schema) for file_name, schema in model_type_data["model_schemas"]]
+        return model_schemas, model_type_data["position_map"]
+
+    def build(self) -> None:
+        """
+        Compile the schemas of all providers, used to create the artifacts at build time.
+        """
+        for provider in sorted(os.listdir(self._model_providers_path)):
+            if provider.startswith("__") or not os.path.isdir(os.path.join(self._model_providers_path, provider)):
+                continue
+            self._load_provider(provider)
+
+    def _load_provider(self, provider: str) -> dict[str, Any]:
+        with self._lock:
+            compiled = self._compiled_providers.get(provider)
+            if compiled is None:
+                compiled = self._compile_provider(provider)
+                self._compiled_providers[provider] = compiled
+
+        return json.loads(compiled)
+
+    def _compile_provider(self, provider: str) -> str:
+        provider_path = os.path.join(self._model_providers_path, provider)
+        yaml_paths = self._get_yaml_paths(provider_path)
+        fingerprint = self._get_fingerprint(provider_path, yaml_paths)
+
+        artifact_file_path = os.path.join(self._artifact_path, f"{provider}.json")
+        compiled = self._read_artifact(artifact_file_path, fingerprint)
+        if compiled is not None:
+            return compiled
+
+        model_types: dict[str, dict[str, Any]] = {}
+        for yaml_path in yaml_paths:
+            model_type, _, file_name = os.path.relpath(yaml_path, provider_path).rpartition(os.sep)
+            if not model_type or os.sep in model_type or file_name.startswith("_"):
+                continue
+            model_type_data = model_types.setdefault(
+                model_type,
+                {"model_schemas": [], "position_map": get_position_map(os.path.dirname(yaml_path))},
+            )
+            model_type_data["model_schemas"].append((file_name, load_yaml_file(yaml_path)))
+
+        compiled = json.dumps(
+            {
+                "fingerprint": fingerprint,
+                "provider_schema": load_yaml_file(os.path.join(provider_path, f"{provider}.yaml")),
+                "model_types": model_types,
+            },
+            ensure_ascii=False,
+        )
+        self._write_artifact(artifact_file_path, compiled)
+
+        return compiled
+
+    @staticmethod
+    def _get_yaml_paths(provider_path: str) -> list[str]:
+        yaml_paths = []
+        for dir_path, dir_names, file_names in os.walk(provider_path):
+            dir_names[:] = sorted(dir_name for dir_name in dir_names if not dir_name.startswith("__"))
+            yaml_paths.extend(
+                os.path.join(dir_path, file_name) for file_name in sorted(file_names) if file_name.endswith(".yaml")
+            )
+        return yaml_paths
+
+    @staticmethod
+    def _get_fingerprint(provider_path: str, yaml_paths: list[str]) -> str:
+        fingerprint = hashlib.sha256()
+        for yaml_path in yaml_paths:
+            fingerprint.update(os.path.relpath(yaml_path, provider_path).encode())
+            fingerprint.update(hashlib.sha256(Path(yaml_path).read_bytes()).digest())
+        return fingerprint.hexdigest()
+
+    @staticmethod
+    def _read_artifact(artifact_file_path: str, fingerprint: str) -> Optional[str]:
+        try:
+            compiled = Path(artifact_file_path).read_text(encoding="utf-8")
+            if json.loads(compiled).get("fingerprint") == fingerprint:
+                return compiled
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning(f"Invalid model schema artifact {artifact_file_path}, recompiling it")
+        return None
+
+    @staticmethod
+    def _write_artifact(artifact_file_path: str, compiled: str) -> None:
+        # the artifact is only a cache, providers still work when it can not be written
+        try:
+            os.makedirs(os.path.dirname(artifact_file_path), exist_ok=True)
+            tmp_file_path = f"{artifact_file_path}.{os.getpid()}.tmp"
+            Path(tmp_file_path).write_text(compiled, encoding="utf-8")
+            os.replace(tmp_file_path, artifact_file_path)
+        except OSError:
+            logger.warning(f"Failed to write model schema artifact {artifact_file_path}")
+
+
+_model_providers_path = os.path.dirname(os.path.abspath(__file__))
+
+# the compiled artifacts are stored next to the bytecode cache of the model providers
+model_schema_registry = ModelSchemaRegistry(
+    model_providers_path=_model_providers_path,
+    artifact_path=os.path.join(_model_providers_path, "__pycache__", "model_schemas"),
+)
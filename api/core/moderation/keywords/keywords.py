@@ -1,12 +1,21 @@
-from collections.abc import Sequence
-from typing import Any
+import threading
+from typing import Optional
 
 from core.moderation.base import Moderation, ModerationAction, ModerationInputsResult, ModerationOutputsResult
+from core.moderation.keywords.keywords_matcher import KeywordsMatcher, get_keywords_matcher
 
 
 class KeywordsModeration(Moderation):
     name: str = "keywords"
 
+    def __init__(self, app_id: str, tenant_id: str, config: Optional[dict] = None) -> None:
+        super().__init__(app_id, tenant_id, config)
+        # output moderation is called with the growing output, the text scanned so far and the state to resume from
+        self._scanned_output: Optional[str] = None
+        self._output_flagged = False
+        self._output_state = KeywordsMatcher.INITIAL_STATE
+        self._output_lock = threading.Lock()
+
     @classmethod
     def validate_config(cls, tenant_id: str, config: dict) -> None:
         """
@@ -40,10 +49,7 @@ class KeywordsModeration(Moderation):
             if query:
                 inputs["query__"] = query
 
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
-
-            flagged = self._is_violated(inputs, keywords_list)
+            flagged = self._is_violated(inputs)
 
         return ModerationInputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
@@ -56,18 +62,36 @@ class KeywordsModeration(Moderation):
             raise ValueError("The config is not set.")
 
         if self.config["outputs_config"]["enabled"]:
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
-
-            flagged = self._is_violated({"text": text}, keywords_list)
+            flagged = self._is_output_violated(text)
             preset_response = self.config["outputs_config"]["preset_response"]
 
         return ModerationOutputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
         )
 
-    def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
-        return any(self._check_keywords_in_value(keywords_list, value) for value in inputs.values())
+    def _is_violated(self, inputs: dict) -> bool:
+        matcher = self._get_matcher()
+        return any(matcher.search(str(value)) for value in inputs.values())
+
+    def _is_output_violated(self, text: str) -> bool:
+        matcher = self._get_matcher()
+        with self._output_lock:
+            # only scan the text appended to the output since the last call
+            if self._scanned_output is None or not text.startswith(self._scanned_output):
+                self._scanned_output = ""
+                self._output_flagged = False
+                self._output_state = KeywordsMatcher.INITIAL_STATE
+
+            if not self._output_flagged:
+                self._output_flagged, self._output_state = matcher.feed(
+                    text[len(self._scanned_output) :], self._output_state
+                )
+            self._scanned_output = text
+
+            return self._output_flagged
+
+    def _get_matcher(self) -> KeywordsMatcher:
+        if self.config is None:
+            raise ValueError("The config is not set.")
 
-    def _check_keywords_in_value(self, keywords_list: Sequence[str], value: Any) -> bool:
-        return any(keyword.lower() in str(value).lower() for keyword in keywords_list)
+        return get_keywords_matcher(self.config["keywords"])
@@ -0,0 +1,91 @@
+from collections import deque
+from collections.abc import Sequence
+from functools import lru_cache
+
+
+class KeywordsMatcher:
+    """
+    Aho–Corasick automaton matching the keywords of a keywords moderation, case insensitive.
+
+    A text is scanned once for all the keywords, and can be fed in chunks by passing the state
+    returned for a chunk to the next one, so a streamed output only scans its new text.
+    """
+
+    INITIAL_STATE = 0
+
+    def __init__(self, keywords: Sequence[str]) -> None:
+        # state: character to next state, state 0 is the root
+        self._transitions: list[dict[str, int]] = [{}]
+        self._fail_states: list[int] = [0]
+        # whether a keyword ends at the state, or at the states its fail states lead to
+        self._matched_states: list[bool] = [False]
+
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+
+            state = 0
+            for char in keyword:
+                next_state = self._transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self._transitions)
+                    self._transitions.append({})
+                    self._fail_states.append(0)
+                    self._matched_states.append(False)
+                    self._transitions[state][char] = next_state
+                state = next_state
+            self._matched_states[state] = True
+
+        # breadth first, the fail state of a state is the longest proper suffix of it in the trie
+        states = deque(self._transitions[0].values())
+        while states:
+            state = states.popleft()
+            for char, next_state in self._transitions[state].items():
+                fail_state = self._fail_states[state]
+                while fail_state and char not in self._transitions[fail_state]:
+                    fail_state = self._fail_states[fail_state]
+                fail_state = self._transitions[fail_state].get(char, 0)
+                self._fail_states[next_state] = fail_state
+                self._matched_states[next_state] = self._matched_states[next_state] or self._matched_states[fail_state]
+                states.append(next_state)
+
+    def feed(self, text: str, state: int = INITIAL_STATE) -> tuple[bool, int]:
+        """
+        Scan a text, or the next chunk of a text
+
+        :param text: text or chunk
+        :param state: state returned for the previous chunk
+        :return: whether a keyword matched, state to scan the next chunk from
+        """
+        transitions = self._transitions
+        fail_states = self._fail_states
+        matched_states = self._matched_states
+        for char in text.lower():
+            while state and char not in transitions[state]:
+                state = fail_states[state]
+            state = transitions[state].get(char, 0)
+            if matched_states[state]:
+                return True, state
+
+        return False, state
+
+    def search(self, text: str) -> bool:
+        """
+        Whether a keyword is in the text
+
+        :param text: text
+        :return: whether a keyword matched
+        """
+        return self.feed(text)[0]
+
+
+@lru_cache(maxsize=128)
+def get_keywords_matcher(keywords: str) -> KeywordsMatcher:
+    """
+    Get the matcher of the keywords config of a keywords moderation, built once per keywords config
+
+    :param keywords: keywords config, one keyword per line
+    :return: keywords matcher
+    """
+    return KeywordsMatcher(keywords.split("\n"))
@@ -32,6 +32,7 @@ class OutputModeration(BaseModel):
     buffer: str = ""
     is_final_chunk: bool = False
     final_output: Optional[str] = None
+    moderation_factory: Optional[ModerationFactory] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def should_direct_output(self) -> bool:
@@ -119,11 +120,13 @@ class OutputModeration(BaseModel):
 
     def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
         try:
-            moderation_factory = ModerationFactory(
-                name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
-            )
+            # the moderation is reused for the whole output, it may only check the text appended since the last call
+            if self.moderation_factory is None:
+                self.moderation_factory = ModerationFactory(
+                    name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
+                )
 
-            result: ModerationOutputsResult = moderation_factory.moderation_for_outputs(moderation_buffer)
+            result: ModerationOutputsResult = self.moderation_factory.moderation_for_outputs(moderation_buffer)
             return result
         except Exception as e:
             logger.exception(f"Moderation Output error, app_id: {app_id}")
@@ -89,4 +89,5 @@ class OpikConfig(BaseTracingConfig):
 
 
 OPS_FILE_PATH = "ops_trace/"
+OPS_BATCH_FILE_PATH = f"{OPS_FILE_PATH}batch/"
 OPS_TRACE_FAILED_KEY = "FAILED_OPS_TRACE"
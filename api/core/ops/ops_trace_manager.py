@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
+    OPS_BATCH_FILE_PATH,
     OPS_FILE_PATH,
     LangfuseConfig,
     LangSmithConfig,
@@ -741,6 +742,9 @@ trace_manager_timer: Optional[threading.Timer] = None
 trace_manager_queue: queue.Queue = queue.Queue()
 trace_manager_interval = int(os.getenv("TRACE_QUEUE_MANAGER_INTERVAL", 5))
 trace_manager_batch_size = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_SIZE", 100))
+# upload the collected trace tasks as one NDJSON file and process them with one celery task
+trace_manager_batch_upload_enabled = os.getenv("TRACE_QUEUE_MANAGER_BATCH_UPLOAD_ENABLED", "false").lower() == "true"
+trace_manager_batch_max_bytes = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_MAX_BYTES", 8 * 1024 * 1024))
 
 
 class TraceQueueManager:
@@ -778,7 +782,10 @@ class TraceQueueManager:
         try:
             tasks = self.collect_tasks()
             if tasks:
-                self.send_to_celery(tasks)
+                if trace_manager_batch_upload_enabled:
+                    self.send_batch_to_celery(tasks)
+                else:
+                    self.send_to_celery(tasks)
         except Exception as e:
             logging.exception("Error processing trace tasks")
 
@@ -809,3 +816,37 @@ class TraceQueueManager:
                     "app_id": task.app_id,
                 }
                 process_trace_tasks.delay(file_info)
+
+    def send_batch_to_celery(self, tasks: list[TraceTask]):
+        """
+        Upload trace infos as NDJSON batches bounded by trace_manager_batch_max_bytes,
+        one storage file and one celery task per batch.
+        """
+        with self.flask_app.app_context():
+            batch: list[bytes] = []
+            batch_bytes = 0
+            for task in tasks:
+                if task.app_id is None:
+                    continue
+                trace_info = task.execute()
+                task_data = TaskData(
+                    app_id=task.app_id,
+                    trace_info_type=type(trace_info).__name__,
+                    trace_info=trace_info.model_dump() if trace_info else None,
+                )
+                line = task_data.model_dump_json().encode("utf-8") + b"\n"
+                if batch and batch_bytes + len(line) > trace_manager_batch_max_bytes:
+                    self._send_batch(batch)
+                    batch = []
+                    batch_bytes = 0
+                batch.append(line)
+                batch_bytes += len(line)
+
+            if batch:
+                self._send_batch(batch)
+
+    @staticmethod
+    def _send_batch(batch: list[bytes]):
+        file_id = uuid4().hex
+        storage.save(f"{OPS_BATCH_FILE_PATH}{file_id}.ndjson", b"".join(batch))
+        process_trace_tasks.delay({"file_id": file_id, "batch": True})
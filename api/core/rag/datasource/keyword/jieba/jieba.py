@@ -1,10 +1,13 @@
 import json
+import threading
+import uuid
 from collections import defaultdict
 from typing import Any, Optional
 
 from pydantic import BaseModel
 
 from configs import dify_config
+from core.helper.lru_cache import LRUCache
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.models.document import Document
@@ -13,6 +16,12 @@ from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from models.dataset import Dataset, DatasetKeywordTable, DocumentSegment
 
+KEYWORD_TABLE_VERSION_TTL = 86400
+
+# parsed keyword tables shared by keyword searches of this process, keyed by dataset id
+_keyword_table_cache = LRUCache(capacity=dify_config.KEYWORD_TABLE_CACHE_SIZE)
+_keyword_table_cache_lock = threading.Lock()
+
 
 class KeywordTableConfig(BaseModel):
     max_keywords_per_chunk: int = 10
@@ -85,19 +94,26 @@ class Jieba(BaseKeyword):
             self._save_dataset_keyword_table(keyword_table)
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
-        keyword_table = self._get_dataset_keyword_table()
+        keyword_table = self._get_cached_dataset_keyword_table()
 
         k = kwargs.get("top_k", 4)
 
         sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table or {}, query, k)
+        if not sorted_chunk_indices:
+            return []
+
+        segments = (
+            db.session.query(DocumentSegment)
+            .filter(
+                DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id.in_(sorted_chunk_indices)
+            )
+            .all()
+        )
+        segment_map = {segment.index_node_id: segment for segment in segments}
 
         documents = []
         for chunk_index in sorted_chunk_indices:
-            segment = (
-                db.session.query(DocumentSegment)
-                .filter(DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id == chunk_index)
-                .first()
-            )
+            segment = segment_map.get(chunk_index)
 
             if segment:
                 documents.append(
@@ -124,6 +140,7 @@ class Jieba(BaseKeyword):
                 if dataset_keyword_table.data_source_type != "database":
                     file_key = "keyword_files/" + self.dataset.tenant_id + "/" + self.dataset.id + ".txt"
                     storage.delete(file_key)
+            self._bump_keyword_table_version()
 
     def _save_dataset_keyword_table(self, keyword_table):
         keyword_table_dict = {
@@ -140,6 +157,40 @@ class Jieba(BaseKeyword):
             if storage.exists(file_key):
                 storage.delete(file_key)
             storage.save(file_key, json.dumps(keyword_table_dict, cls=SetEncoder).encode("utf-8"))
+        self._bump_keyword_table_version()
+
+    def _get_cached_dataset_keyword_table(self) -> Optional[dict]:
+        """
+        Get the keyword table for read-only use, reusing the parsed table while its version is unchanged.
+        The returned table is shared between threads and must not be modified.
+        """
+        if not dify_config.KEYWORD_TABLE_CACHE_SIZE:
+            return self._get_dataset_keyword_table()
+
+        version_key = self._keyword_table_version_key()
+        version = redis_client.get(version_key)
+        if version is None:
+            redis_client.set(version_key, uuid.uuid4().hex, ex=KEYWORD_TABLE_VERSION_TTL, nx=True)
+            version = redis_client.get(version_key)
+        version = version.decode() if isinstance(version, bytes) else version
+
+        with _keyword_table_cache_lock:
+            cached = _keyword_table_cache.get(self.dataset.id)
+        if cached and version and cached[0] == version:
+            return cached[1]
+
+        keyword_table = self._get_dataset_keyword_table()
+        if version:
+            with _keyword_table_cache_lock:
+                _keyword_table_cache.capacity = dify_config.KEYWORD_TABLE_CACHE_SIZE
+                _keyword_table_cache.put(self.dataset.id, (version, keyword_table))
+        return keyword_table
+
+    def _bump_keyword_table_version(self):
+        redis_client.set(self._keyword_table_version_key(), uuid.uuid4().hex, ex=KEYWORD_TABLE_VERSION_TTL)
+
+    def _keyword_table_version_key(self) -> str:
+        return f"keyword_table_version_{self.dataset.id}"
 
     def _get_dataset_keyword_table(self) -> Optional[dict]:
         dataset_keyword_table = self.dataset.dataset_keyword_table
@@ -197,7 +248,7 @@ class Jieba(BaseKeyword):
 
         # go through text chunks in order of most matching keywords
         chunk_indices_count: dict[str, int] = defaultdict(int)
-        keywords_list = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
+        keywords_list = [keyword for keyword in keywords if keyword in keyword_table]
         for keyword in keywords_list:
             for node_id in keyword_table[keyword]:
                 chunk_indices_count[node_id] += 1
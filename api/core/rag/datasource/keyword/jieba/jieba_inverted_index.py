@@ -0,0 +1,184 @@
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetKeywordPosting, DocumentSegment
+
+
+class InvertedIndexConfig(BaseModel):
+    max_keywords_per_chunk: int = 10
+    max_keyword_length: int = 255
+    insert_batch_size: int = 1000
+
+
+class JiebaInvertedIndex(BaseKeyword):
+    """
+    Jieba keyword index stored as one posting row per (keyword, index node).
+
+    Unlike the JSON keyword table, every write only touches the postings of the
+    affected nodes, so concurrent indexing tasks of a dataset do not need a lock.
+    """
+
+    def __init__(self, dataset: Dataset):
+        super().__init__(dataset)
+        self._config = InvertedIndexConfig()
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self.add_texts(texts, **kwargs)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords_list = kwargs.get("keywords_list")
+        node_keywords: dict[str, list[str]] = {}
+        for i, text in enumerate(texts):
+            if text.metadata is None:
+                continue
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            node_keywords[text.metadata["doc_id"]] = list(keywords)
+
+        self._update_segments_keywords(node_keywords)
+        self.add_postings(node_keywords)
+
+    def text_exists(self, id: str) -> bool:
+        return db.session.query(
+            db.session.query(DatasetKeywordPosting)
+            .filter(DatasetKeywordPosting.dataset_id == self.dataset.id, DatasetKeywordPosting.index_node_id == id)
+            .exists()
+        ).scalar()
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        db.session.execute(
+            delete(DatasetKeywordPosting).where(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.index_node_id.in_(ids),
+            )
+        )
+        db.session.commit()
+
+    def delete(self) -> None:
+        db.session.execute(delete(DatasetKeywordPosting).where(DatasetKeywordPosting.dataset_id == self.dataset.id))
+        db.session.commit()
+
+    def search(self, query: str, **kwargs: Any) -> list[Document]:
+        k = kwargs.get("top_k", 4)
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = [
+            keyword
+            for keyword in keyword_table_handler.extract_keywords(query)
+            if len(keyword) <= self._config.max_keyword_length
+        ]
+        if not keywords:
+            return []
+
+        # go through text chunks in order of most matching keywords
+        match_count = func.count(DatasetKeywordPosting.id).label("match_count")
+        rows = (
+            db.session.query(DatasetKeywordPosting.index_node_id, match_count)
+            .filter(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.keyword.in_(keywords),
+            )
+            .group_by(DatasetKeywordPosting.index_node_id)
+            .order_by(match_count.desc(), DatasetKeywordPosting.index_node_id)
+            .limit(k)
+            .all()
+        )
+        sorted_chunk_indices = [row.index_node_id for row in rows]
+        if not sorted_chunk_indices:
+            return []
+
+        segments = (
+            db.session.query(DocumentSegment)
+            .filter(
+                DocumentSegment.dataset_id == self.dataset.id,
+                DocumentSegment.index_node_id.in_(sorted_chunk_indices),
+            )
+            .all()
+        )
+        segment_map = {segment.index_node_id: segment for segment in segments}
+
+        documents = []
+        for chunk_index in sorted_chunk_indices:
+            segment = segment_map.get(chunk_index)
+            if segment:
+                documents.append(
+                    Document(
+                        page_content=segment.content,
+                        metadata={
+                            "doc_id": chunk_index,
+                            "doc_hash": segment.index_node_hash,
+                            "document_id": segment.document_id,
+                            "dataset_id": segment.dataset_id,
+                        },
+                    )
+                )
+
+        return documents
+
+    def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        self._update_segments_keywords({node_id: keywords})
+        self.add_postings({node_id: keywords})
+
+    def multi_create_segment_keywords(self, pre_segment_data_list: list):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        node_keywords: dict[str, list[str]] = {}
+        for pre_segment_data in pre_segment_data_list:
+            segment = pre_segment_data["segment"]
+            if pre_segment_data["keywords"]:
+                segment.keywords = pre_segment_data["keywords"]
+            else:
+                keywords = keyword_table_handler.extract_keywords(segment.content, self._config.max_keywords_per_chunk)
+                segment.keywords = list(keywords)
+            node_keywords[segment.index_node_id] = segment.keywords
+        self.add_postings(node_keywords)
+
+    def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        self.add_postings({node_id: keywords})
+
+    def add_postings(self, node_keywords: dict[str, list[str]]) -> None:
+        rows = [
+            {"dataset_id": self.dataset.id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in node_keywords.items()
+            for keyword in set(keywords)
+            if keyword and len(keyword) <= self._config.max_keyword_length
+        ]
+        if not rows:
+            return
+        batch_size = self._config.insert_batch_size
+        for i in range(0, len(rows), batch_size):
+            stmt = (
+                insert(DatasetKeywordPosting)
+                .values(rows[i : i + batch_size])
+                .on_conflict_do_nothing(index_elements=["dataset_id", "keyword", "index_node_id"])
+            )
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def _update_segments_keywords(self, node_keywords: dict[str, list[str]]) -> None:
+        if not node_keywords:
+            return
+        segments = (
+            db.session.query(DocumentSegment)
+            .filter(
+                DocumentSegment.dataset_id == self.dataset.id,
+                DocumentSegment.index_node_id.in_(list(node_keywords.keys())),
+            )
+            .all()
+        )
+        for segment in segments:
+            segment.keywords = node_keywords[segment.index_node_id]
+        if segments:
+            db.session.commit()
@@ -0,0 +1,105 @@
+import threading
+from typing import Optional
+
+from sqlalchemy import inspect
+
+from core.model_manager import ModelManager
+from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.embedding.embedding_base import Embeddings
+from extensions.ext_database import db
+from models.dataset import Dataset
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """
+    Embeddings that embed every query text only once, concurrent calls for the same text wait for the first one.
+    """
+
+    def __init__(self, embeddings: Embeddings) -> None:
+        self._embeddings = embeddings
+        self._query_embeddings: dict[str, list[float]] = {}
+        self._text_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        with self._lock:
+            query_embedding = self._query_embeddings.get(text)
+            if query_embedding is not None:
+                return query_embedding
+            text_lock = self._text_locks.setdefault(text, threading.Lock())
+
+        # locked per text, different queries are embedded concurrently
+        with text_lock:
+            with self._lock:
+                query_embedding = self._query_embeddings.get(text)
+            if query_embedding is None:
+                query_embedding = self._embeddings.embed_query(text)
+                with self._lock:
+                    self._query_embeddings[text] = query_embedding
+        return query_embedding
+
+
+def _detached_dataset(dataset: Dataset) -> Dataset:
+    """
+    Copy the columns of a dataset into an instance bound to no session.
+
+    The branches of a retrieval run in threads with their own scoped sessions, an instance loaded
+    in one of them would be expired by its commits and lazy loaded through the wrong session.
+    """
+    return Dataset(**{attr.key: getattr(dataset, attr.key) for attr in inspect(Dataset).column_attrs})
+
+
+class RetrievalContext:
+    """
+    Resources resolved once per retrieval request and shared by its search branches and datasets.
+
+    Datasets are resolved once per dataset and shared as copies bound to no session, embedding model
+    instances once per embedding model, so datasets sharing an embedding model embed the query only once.
+    """
+
+    def __init__(self) -> None:
+        self._datasets: dict[str, Optional[Dataset]] = {}
+        self._embeddings: dict[tuple[str, str, str], Embeddings] = {}
+        self._lock = threading.Lock()
+        self._embeddings_lock = threading.Lock()
+
+    def get_dataset(self, dataset_id: str) -> Optional[Dataset]:
+        with self._lock:
+            if dataset_id in self._datasets:
+                return self._datasets[dataset_id]
+
+        dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+        with self._lock:
+            return self._datasets.setdefault(dataset_id, _detached_dataset(dataset) if dataset else None)
+
+    def add_dataset(self, dataset: Dataset) -> None:
+        with self._lock:
+            self._datasets[dataset.id] = _detached_dataset(dataset)
+
+    def create_vector(self, dataset: Dataset) -> Vector:
+        """
+        Create a vector for one search branch, vectors are not shared between threads,
+        their vector store clients are shared through the vector client registry.
+        """
+        return Vector(dataset=dataset, embeddings=self.get_embeddings(dataset))
+
+    def get_embeddings(self, dataset: Dataset) -> Embeddings:
+        key = (dataset.tenant_id, dataset.embedding_model_provider, dataset.embedding_model)
+        # resolved under the lock, datasets of the same embedding model wait for the first resolution
+        with self._embeddings_lock:
+            embeddings = self._embeddings.get(key)
+            if embeddings is None:
+                embedding_model = ModelManager().get_model_instance(
+                    tenant_id=dataset.tenant_id,
+                    provider=dataset.embedding_model_provider,
+                    model_type=ModelType.TEXT_EMBEDDING,
+                    model=dataset.embedding_model,
+                )
+                embeddings = QueryCachedEmbeddings(CacheEmbedding(embedding_model))
+                self._embeddings[key] = embeddings
+        return embeddings
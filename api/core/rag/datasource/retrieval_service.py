@@ -1,22 +1,28 @@
 import json
-import threading
+import logging
+from collections.abc import Callable
+from functools import partial
 from typing import Optional
 
 from flask import Flask, current_app
 
+from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
-from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.datasource.retrieval_context import RetrievalContext
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
+from core.rag.retrieval.retrieval_executor import search_retrieval_executor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from extensions.ext_database import db
 from models.dataset import ChildChunk, Dataset, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -38,73 +44,81 @@ class RetrievalService:
         reranking_model: Optional[dict] = None,
         reranking_mode: str = "reranking_model",
         weights: Optional[dict] = None,
+        retrieval_context: Optional[RetrievalContext] = None,
     ):
         if not query:
             return []
-        dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+        # the search branches share the dataset, vector client and query embedding of the context
+        retrieval_context = retrieval_context or RetrievalContext()
+        dataset = retrieval_context.get_dataset(dataset_id)
         if not dataset:
             return []
 
-        if not dataset or dataset.available_document_count == 0 or dataset.available_segment_count == 0:
+        if not dataset or not dataset.available_for_retrieval:
             return []
-        all_documents: list[Document] = []
-        threads: list[threading.Thread] = []
-        exceptions: list[str] = []
+        flask_app = current_app._get_current_object()  # type: ignore
+        branches: dict[str, Callable[[], list[Document]]] = {}
         # retrieval_model source with keyword
         if retrieval_method == "keyword_search":
-            keyword_thread = threading.Thread(
-                target=RetrievalService.keyword_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            branches["keyword_search"] = partial(
+                cls.keyword_search,
+                flask_app=flask_app,
+                dataset_id=dataset_id,
+                query=query,
+                top_k=top_k,
+                retrieval_context=retrieval_context,
             )
-            threads.append(keyword_thread)
-            keyword_thread.start()
         # retrieval_model source with semantic
         if RetrievalMethod.is_support_semantic_search(retrieval_method):
-            embedding_thread = threading.Thread(
-                target=RetrievalService.embedding_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "score_threshold": score_threshold,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "retrieval_method": retrieval_method,
-                    "exceptions": exceptions,
-                },
+            branches["embedding_search"] = partial(
+                cls.embedding_search,
+                flask_app=flask_app,
+                dataset_id=dataset_id,
+                query=query,
+                top_k=top_k,
+                score_threshold=score_threshold,
+                reranking_model=reranking_model,
+                retrieval_method=retrieval_method,
+                retrieval_context=retrieval_context,
             )
-            threads.append(embedding_thread)
-            embedding_thread.start()
 
         # retrieval source with full text
         if RetrievalMethod.is_support_fulltext_search(retrieval_method):
-            full_text_index_thread = threading.Thread(
-                target=RetrievalService.full_text_index_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "retrieval_method": retrieval_method,
-                    "score_threshold": score_threshold,
-                    "top_k": top_k,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            branches["full_text_index_search"] = partial(
+                cls.full_text_index_search,
+                flask_app=flask_app,
+                dataset_id=dataset_id,
+                query=query,
+                retrieval_method=retrieval_method,
+                score_threshold=score_threshold,
+                top_k=top_k,
+                reranking_model=reranking_model,
+                retrieval_context=retrieval_context,
             )
-            threads.append(full_text_index_thread)
-            full_text_index_thread.start()
 
-        for thread in threads:
-            thread.join()
+        # searches share a bulkhead per backend, a stalled vector store can not take the workers of the others
+        index_struct = dataset.index_struct_dict
+        vector_store = index_struct["type"] if index_struct else dify_config.VECTOR_STORE
+        bulkheads = {
+            "keyword_search": "keyword",
+            "embedding_search": vector_store,
+            "full_text_index_search": vector_store,
+        }
+
+        all_documents: list[Document] = []
+        exceptions: list[str] = []
+        # searches that miss the deadline are dropped, the results of the other searches are returned
+        for branch_result in search_retrieval_executor.run(
+            branches, timeout=dify_config.DATASET_RETRIEVAL_BRANCH_TIMEOUT, bulkheads=bulkheads
+        ):
+            if branch_result.timed_out:
+                logger.warning(f"{branch_result.name} of dataset {dataset_id} timed out, its results are dropped")
+            elif branch_result.rejected:
+                logger.warning(f"{branch_result.name} of dataset {dataset_id} rejected, its store is saturated")
+            elif branch_result.error is not None:
+                exceptions.append(str(branch_result.error))
+            elif branch_result.result:
+                all_documents.extend(branch_result.result)
 
         if exceptions:
             exception_message = ";\n".join(exceptions)
@@ -135,20 +149,22 @@ class RetrievalService:
 
     @classmethod
     def keyword_search(
-        cls, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list, exceptions: list
-    ):
+        cls,
+        flask_app: Flask,
+        dataset_id: str,
+        query: str,
+        top_k: int,
+        retrieval_context: Optional[RetrievalContext] = None,
+    ) -> list[Document]:
         with flask_app.app_context():
-            try:
-                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-                if not dataset:
-                    raise ValueError("dataset not found")
+            retrieval_context = retrieval_context or RetrievalContext()
+            dataset = retrieval_context.get_dataset(dataset_id)
+            if not dataset:
+                raise ValueError("dataset not found")
 
-                keyword = Keyword(dataset=dataset)
+            keyword = Keyword(dataset=dataset)
 
-                documents = keyword.search(cls.escape_query_for_search(query), top_k=top_k)
-                all_documents.extend(documents)
-            except Exception as e:
-                exceptions.append(str(e))
+            return keyword.search(cls.escape_query_for_search(query), top_k=top_k)
 
     @classmethod
     def embedding_search(
@@ -159,48 +175,42 @@ class RetrievalService:
         top_k: int,
         score_threshold: Optional[float],
         reranking_model: Optional[dict],
-        all_documents: list,
         retrieval_method: str,
-        exceptions: list,
-    ):
+        retrieval_context: Optional[RetrievalContext] = None,
+    ) -> list[Document]:
         with flask_app.app_context():
-            try:
-                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-                if not dataset:
-                    raise ValueError("dataset not found")
+            retrieval_context = retrieval_context or RetrievalContext()
+            dataset = retrieval_context.get_dataset(dataset_id)
+            if not dataset:
+                raise ValueError("dataset not found")
 
-                vector = Vector(dataset=dataset)
+            vector = retrieval_context.create_vector(dataset)
 
-                documents = vector.search_by_vector(
-                    query,
-                    search_type="similarity_score_threshold",
-                    top_k=top_k,
+            documents = vector.search_by_vector(
+                query,
+                search_type="similarity_score_threshold",
+                top_k=top_k,
+                score_threshold=score_threshold,
+                filter={"group_id": [dataset.id]},
+            )
+
+            if (
+                documents
+                and reranking_model
+                and reranking_model.get("reranking_model_name")
+                and reranking_model.get("reranking_provider_name")
+                and retrieval_method == RetrievalMethod.SEMANTIC_SEARCH.value
+            ):
+                data_post_processor = DataPostProcessor(
+                    str(dataset.tenant_id), RerankMode.RERANKING_MODEL.value, reranking_model, None, False
+                )
+                return data_post_processor.invoke(
+                    query=query,
+                    documents=documents,
                     score_threshold=score_threshold,
-                    filter={"group_id": [dataset.id]},
+                    top_n=len(documents),
                 )
-
-                if documents:
-                    if (
-                        reranking_model
-                        and reranking_model.get("reranking_model_name")
-                        and reranking_model.get("reranking_provider_name")
-                        and retrieval_method == RetrievalMethod.SEMANTIC_SEARCH.value
-                    ):
-                        data_post_processor = DataPostProcessor(
-                            str(dataset.tenant_id), RerankMode.RERANKING_MODEL.value, reranking_model, None, False
-                        )
-                        all_documents.extend(
-                            data_post_processor.invoke(
-                                query=query,
-                                documents=documents,
-                                score_threshold=score_threshold,
-                                top_n=len(documents),
-                            )
-                        )
-                    else:
-                        all_documents.extend(documents)
-            except Exception as e:
-                exceptions.append(str(e))
+            return documents
 
     @classmethod
     def full_text_index_search(
@@ -211,43 +221,35 @@ class RetrievalService:
         top_k: int,
         score_threshold: Optional[float],
         reranking_model: Optional[dict],
-        all_documents: list,
         retrieval_method: str,
-        exceptions: list,
-    ):
+        retrieval_context: Optional[RetrievalContext] = None,
+    ) -> list[Document]:
         with flask_app.app_context():
-            try:
-                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-                if not dataset:
-                    raise ValueError("dataset not found")
+            retrieval_context = retrieval_context or RetrievalContext()
+            dataset = retrieval_context.get_dataset(dataset_id)
+            if not dataset:
+                raise ValueError("dataset not found")
 
-                vector_processor = Vector(
-                    dataset=dataset,
-                )
+            vector_processor = retrieval_context.create_vector(dataset)
 
-                documents = vector_processor.search_by_full_text(cls.escape_query_for_search(query), top_k=top_k)
-                if documents:
-                    if (
-                        reranking_model
-                        and reranking_model.get("reranking_model_name")
-                        and reranking_model.get("reranking_provider_name")
-                        and retrieval_method == RetrievalMethod.FULL_TEXT_SEARCH.value
-                    ):
-                        data_post_processor = DataPostProcessor(
-                            str(dataset.tenant_id), RerankMode.RERANKING_MODEL.value, reranking_model, None, False
-                        )
-                        all_documents.extend(
-                            data_post_processor.invoke(
-                                query=query,
-                                documents=documents,
-                                score_threshold=score_threshold,
-                                top_n=len(documents),
-                            )
-                        )
-                    else:
-                        all_documents.extend(documents)
-            except Exception as e:
-                exceptions.append(str(e))
+            documents = vector_processor.search_by_full_text(cls.escape_query_for_search(query), top_k=top_k)
+            if (
+                documents
+                and reranking_model
+                and reranking_model.get("reranking_model_name")
+                and reranking_model.get("reranking_provider_name")
+                and retrieval_method == RetrievalMethod.FULL_TEXT_SEARCH.value
+            ):
+                data_post_processor = DataPostProcessor(
+                    str(dataset.tenant_id), RerankMode.RERANKING_MODEL.value, reranking_model, None, False
+                )
+                return data_post_processor.invoke(
+                    query=query,
+                    documents=documents,
+                    score_threshold=score_threshold,
+                    top_n=len(documents),
+                )
+            return documents
 
     @staticmethod
     def escape_query_for_search(query: str) -> str:
@@ -255,86 +257,111 @@ class RetrievalService:
 
     @staticmethod
     def format_retrieval_documents(documents: list[Document]) -> list[RetrievalSegments]:
+        if not documents:
+            return []
+
         records = []
         include_segment_ids = []
         segment_child_map = {}
+
+        # resolve all dataset documents, segments and child chunks with a constant number of queries
+        document_ids = {document.metadata.get("document_id") for document in documents}
+        dataset_documents = {
+            dataset_document.id: dataset_document
+            for dataset_document in db.session.query(
+                DatasetDocument.id, DatasetDocument.dataset_id, DatasetDocument.doc_form
+            )
+            .filter(DatasetDocument.id.in_(document_ids))
+            .all()
+        }
+
+        child_index_node_ids = set()
+        index_node_ids = set()
         for document in documents:
-            document_id = document.metadata.get("document_id")
-            dataset_document = db.session.query(DatasetDocument).filter(DatasetDocument.id == document_id).first()
-            if dataset_document:
-                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
-                    child_index_node_id = document.metadata.get("doc_id")
-                    result = (
-                        db.session.query(ChildChunk, DocumentSegment)
-                        .join(DocumentSegment, ChildChunk.segment_id == DocumentSegment.id)
-                        .filter(
-                            ChildChunk.index_node_id == child_index_node_id,
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                        )
-                        .first()
-                    )
-                    if result:
-                        child_chunk, segment = result
-                        if not segment:
-                            continue
-                        if segment.id not in include_segment_ids:
-                            include_segment_ids.append(segment.id)
-                            child_chunk_detail = {
-                                "id": child_chunk.id,
-                                "content": child_chunk.content,
-                                "position": child_chunk.position,
-                                "score": document.metadata.get("score", 0.0),
-                            }
-                            map_detail = {
-                                "max_score": document.metadata.get("score", 0.0),
-                                "child_chunks": [child_chunk_detail],
-                            }
-                            segment_child_map[segment.id] = map_detail
-                            record = {
-                                "segment": segment,
-                            }
-                            records.append(record)
-                        else:
-                            child_chunk_detail = {
-                                "id": child_chunk.id,
-                                "content": child_chunk.content,
-                                "position": child_chunk.position,
-                                "score": document.metadata.get("score", 0.0),
-                            }
-                            segment_child_map[segment.id]["child_chunks"].append(child_chunk_detail)
-                            segment_child_map[segment.id]["max_score"] = max(
-                                segment_child_map[segment.id]["max_score"], document.metadata.get("score", 0.0)
-                            )
-                    else:
-                        continue
-                else:
-                    index_node_id = document.metadata["doc_id"]
-
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .filter(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.index_node_id == index_node_id,
-                        )
-                        .first()
-                    )
+            dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+            if not dataset_document:
+                continue
+            if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                child_index_node_ids.add(document.metadata.get("doc_id"))
+            else:
+                index_node_ids.add(document.metadata["doc_id"])
 
-                    if not segment:
-                        continue
+        child_chunk_map: dict[tuple[str, str], tuple[ChildChunk, DocumentSegment]] = {}
+        if child_index_node_ids:
+            results = (
+                db.session.query(ChildChunk, DocumentSegment)
+                .join(DocumentSegment, ChildChunk.segment_id == DocumentSegment.id)
+                .filter(
+                    ChildChunk.index_node_id.in_(child_index_node_ids),
+                    DocumentSegment.enabled == True,
+                    DocumentSegment.status == "completed",
+                )
+                .all()
+            )
+            for child_chunk, segment in results:
+                child_chunk_map.setdefault((segment.dataset_id, child_chunk.index_node_id), (child_chunk, segment))
+
+        segment_map: dict[tuple[str, str], DocumentSegment] = {}
+        if index_node_ids:
+            segments = (
+                db.session.query(DocumentSegment)
+                .filter(
+                    DocumentSegment.enabled == True,
+                    DocumentSegment.status == "completed",
+                    DocumentSegment.index_node_id.in_(index_node_ids),
+                )
+                .all()
+            )
+            for segment in segments:
+                segment_map.setdefault((segment.dataset_id, segment.index_node_id), segment)
+
+        for document in documents:
+            dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+            if not dataset_document:
+                continue
+            if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                child_index_node_id = document.metadata.get("doc_id")
+                result = child_chunk_map.get((dataset_document.dataset_id, child_index_node_id))
+                if not result:
+                    continue
+                child_chunk, segment = result
+                child_chunk_detail = {
+                    "id": child_chunk.id,
+                    "content": child_chunk.content,
+                    "position": child_chunk.position,
+                    "score": document.metadata.get("score", 0.0),
+                }
+                if segment.id not in include_segment_ids:
                     include_segment_ids.append(segment.id)
+                    map_detail = {
+                        "max_score": document.metadata.get("score", 0.0),
+                        "child_chunks": [child_chunk_detail],
+                    }
+                    segment_child_map[segment.id] = map_detail
                     record = {
                         "segment": segment,
-                        "score": document.metadata.get("score", None),
                     }
-
                     records.append(record)
-            for record in records:
-                if record["segment"].id in segment_child_map:
-                    record["child_chunks"] = segment_child_map[record["segment"].id].get("child_chunks", None)
-                    record["score"] = segment_child_map[record["segment"].id]["max_score"]
+                else:
+                    segment_child_map[segment.id]["child_chunks"].append(child_chunk_detail)
+                    segment_child_map[segment.id]["max_score"] = max(
+                        segment_child_map[segment.id]["max_score"], document.metadata.get("score", 0.0)
+                    )
+            else:
+                segment = segment_map.get((dataset_document.dataset_id, document.metadata["doc_id"]))
+                if not segment:
+                    continue
+                include_segment_ids.append(segment.id)
+                record = {
+                    "segment": segment,
+                    "score": document.metadata.get("score", None),
+                }
+
+                records.append(record)
+
+        for record in records:
+            if record["segment"].id in segment_child_map:
+                record["child_chunks"] = segment_child_map[record["segment"].id].get("child_chunks", None)
+                record["score"] = segment_child_map[record["segment"].id]["max_score"]
 
         return [RetrievalSegments(**record) for record in records]
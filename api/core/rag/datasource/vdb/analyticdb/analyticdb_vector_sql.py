@@ -7,6 +7,12 @@ import psycopg2.extras  # type: ignore
 import psycopg2.pool  # type: ignore
 from pydantic import BaseModel, model_validator
 
+from core.rag.datasource.vdb.vector_client_registry import (
+    RetirableConnectionPool,
+    check_connection_pool,
+    vector_client_registry,
+)
+from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
 
@@ -63,14 +69,19 @@ class AnalyticdbVectorBySql:
             redis_client.set(database_exist_cache_key, 1, ex=3600)
 
     def _create_connection_pool(self):
-        return psycopg2.pool.SimpleConnectionPool(
-            self.config.min_connection,
-            self.config.max_connection,
-            host=self.config.host,
-            port=self.config.port,
-            user=self.config.account,
-            password=self.config.account_password,
-            database=self.databaseName,
+        return vector_client_registry.get_or_create(
+            key=(VectorType.ANALYTICDB, self.config.model_dump_json(), self.databaseName),
+            factory=lambda: RetirableConnectionPool(
+                self.config.min_connection,
+                self.config.max_connection,
+                host=self.config.host,
+                port=self.config.port,
+                user=self.config.account,
+                password=self.config.account_password,
+                database=self.databaseName,
+            ),
+            health_check=check_connection_pool,
+            close=lambda pool: pool.retire(),
         )
 
     @contextmanager
@@ -10,6 +10,7 @@ from pymilvus.milvus_client import IndexParams  # type: ignore
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -334,8 +335,13 @@ class MilvusVector(BaseVector):
         """
         Initialize and return a Milvus client.
         """
-        client = MilvusClient(uri=config.uri, user=config.user, password=config.password, db_name=config.database)
-        return client
+        return vector_client_registry.get_or_create(
+            key=(VectorType.MILVUS, config.model_dump_json()),
+            factory=lambda: MilvusClient(
+                uri=config.uri, user=config.user, password=config.password, db_name=config.database
+            ),
+            close=lambda client: client.close(),
+        )
 
 
 class MilvusVectorFactory(AbstractVectorFactory):
@@ -9,6 +9,7 @@ from pydantic import BaseModel
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -36,13 +37,19 @@ class MyScaleVector(BaseVector):
         self._config = config
         self._metric = metric
         self._vec_order = SortOrder.ASC if metric.upper() in {"COSINE", "L2"} else SortOrder.DESC
-        self._client = get_client(
-            host=config.host,
-            port=config.port,
-            username=config.user,
-            password=config.password,
+        # the client is shared between threads, so settings are sent with every query instead of a session
+        self._client = vector_client_registry.get_or_create(
+            key=(VectorType.MYSCALE, config.model_dump_json()),
+            factory=lambda: get_client(
+                host=config.host,
+                port=config.port,
+                username=config.user,
+                password=config.password,
+                autogenerate_session_id=False,
+                settings={"allow_experimental_object_type": 1},
+            ),
+            close=lambda client: client.close(),
         )
-        self._client.command("SET allow_experimental_object_type=1")
 
     def get_type(self) -> str:
         return VectorType.MYSCALE
@@ -12,6 +12,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -103,13 +104,17 @@ class OracleVector(BaseVector):
             )
 
     def _create_connection_pool(self, config: OracleVectorConfig):
-        return oracledb.create_pool(
-            user=config.user,
-            password=config.password,
-            dsn="{}:{}/{}".format(config.host, config.port, config.database),
-            min=1,
-            max=50,
-            increment=1,
+        return vector_client_registry.get_or_create(
+            key=(VectorType.ORACLE, config.model_dump_json()),
+            factory=lambda: oracledb.create_pool(
+                user=config.user,
+                password=config.password,
+                dsn="{}:{}/{}".format(config.host, config.port, config.database),
+                min=1,
+                max=50,
+                increment=1,
+            ),
+            close=lambda pool: pool.close(force=True),
         )
 
     @contextmanager
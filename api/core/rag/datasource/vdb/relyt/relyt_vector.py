@@ -8,6 +8,7 @@ from sqlalchemy import text as sql_text
 from sqlalchemy.dialects.postgresql import JSON, TEXT
 from sqlalchemy.orm import Session
 
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -57,7 +58,11 @@ class RelytVector(BaseVector):
         self._url = (
             f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
         )
-        self.client = create_engine(self._url)
+        self.client = vector_client_registry.get_or_create(
+            key=(VectorType.RELYT, self._url),
+            factory=lambda: create_engine(self._url, pool_pre_ping=True),
+            close=lambda engine: engine.dispose(),
+        )
         self._fields: list[str] = []
         self._group_id = group_id
 
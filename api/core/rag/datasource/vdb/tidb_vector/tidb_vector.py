@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session, declarative_base
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -78,7 +79,11 @@ class TiDBVector(BaseVector):
             f"ssl_verify_cert=true&ssl_verify_identity=true&program_name={config.program_name}"
         )
         self._distance_func = distance_func.lower()
-        self._engine = create_engine(self._url)
+        self._engine = vector_client_registry.get_or_create(
+            key=(VectorType.TIDB_VECTOR, self._url),
+            factory=lambda: create_engine(self._url, pool_pre_ping=True),
+            close=lambda engine: engine.dispose(),
+        )
         self._orm_base = declarative_base()
         self._dimension = 1536
 
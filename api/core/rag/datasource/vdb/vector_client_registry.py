@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Optional, TypeVar
+
+import psycopg2.pool  # type: ignore
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _RegistryEntry:
+    client: Any
+    health_check: Optional[Callable[[Any], bool]]
+    close: Optional[Callable[[Any], None]]
+    last_checked_at: float
+
+
+class VectorClientRegistry:
+    """
+    Process-wide registry of vector store clients and connection pools.
+
+    Vector instances are created for every retrieval and indexing call, so clients are
+    shared by key (vector type plus connection config) instead of being rebuilt each time.
+    Clients registered here must be safe to use from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[Hashable, _RegistryEntry] = {}
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(
+        self,
+        key: Hashable,
+        factory: Callable[[], T],
+        health_check: Optional[Callable[[T], bool]] = None,
+        close: Optional[Callable[[T], None]] = None,
+    ) -> T:
+        """
+        Return the client registered under key, creating it with factory if needed.
+
+        :param key: registry key, usually the vector type and the connection config
+        :param factory: creates a new client
+        :param health_check: returns False or raises when the client must be recreated
+        :param close: releases the resources of a discarded client
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_healthy(entry):
+                logger.warning("Shared vector store client failed its health check, recreating it")
+                self._entries.pop(key, None)
+                self._close(entry)
+                entry = None
+
+            if entry is None:
+                entry = _RegistryEntry(
+                    client=factory(),
+                    health_check=health_check,
+                    close=close,
+                    last_checked_at=time.monotonic(),
+                )
+                self._entries[key] = entry
+
+            return entry.client
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._close(entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._close(entry)
+
+    @staticmethod
+    def _is_healthy(entry: _RegistryEntry) -> bool:
+        if entry.health_check is None:
+            return True
+        now = time.monotonic()
+        if now - entry.last_checked_at < dify_config.VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL:
+            return True
+        entry.last_checked_at = now
+        try:
+            return entry.health_check(entry.client)
+        except Exception:
+            logger.exception("Vector store client health check failed")
+            return False
+
+    @staticmethod
+    def _close(entry: _RegistryEntry) -> None:
+        if entry.close is None:
+            return
+        try:
+            entry.close(entry.client)
+        except Exception:
+            logger.exception("Failed to close vector store client")
+
+
+class RetirableConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread-safe psycopg2 connection pool shared through the registry.
+
+    A pool discarded by the registry is retired instead of closed, other threads may still run queries
+    on connections checked out of it. A retired pool closes once all its connections are returned.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._checkout_lock = threading.Lock()
+        self._checked_out = 0
+        self._retired = False
+
+    def getconn(self, key=None):
+        with self._checkout_lock:
+            conn = super().getconn(key)
+            self._checked_out += 1
+        return conn
+
+    def putconn(self, conn=None, key=None, close=False):
+        with self._checkout_lock:
+            super().putconn(conn, key, close=close or self._retired)
+            self._checked_out -= 1
+            self._close_if_unused()
+
+    def retire(self) -> None:
+        with self._checkout_lock:
+            self._retired = True
+            self._close_if_unused()
+
+    def _close_if_unused(self) -> None:
+        if self._retired and self._checked_out == 0 and not self.closed:
+            self.closeall()
+
+
+def check_connection_pool(pool: Any) -> bool:
+    """
+    Health check for psycopg2 connection pools: borrow a connection and run a trivial query.
+
+    An exhausted pool is busy, not broken, and a stale connection is discarded alone,
+    the pool opens a new one when needed. Only a closed pool is unhealthy.
+    """
+    if pool.closed:
+        return False
+    try:
+        conn = pool.getconn()
+    except psycopg2.pool.PoolError:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+    except Exception:
+        logger.warning("Discarding a stale connection of a shared connection pool", exc_info=True)
+        pool.putconn(conn, close=True)
+        return True
+    pool.putconn(conn)
+    return True
+
+
+vector_client_registry = VectorClientRegistry()
@@ -26,11 +26,11 @@ class AbstractVectorFactory(ABC):
 
 
 class Vector:
-    def __init__(self, dataset: Dataset, attributes: Optional[list] = None):
+    def __init__(self, dataset: Dataset, attributes: Optional[list] = None, embeddings: Optional[Embeddings] = None):
         if attributes is None:
             attributes = ["doc_id", "dataset_id", "document_id", "doc_hash"]
         self._dataset = dataset
-        self._embeddings = self._get_embeddings()
+        self._embeddings = embeddings or self._get_embeddings()
         self._attributes = attributes
         self._vector_processor = self._init_vector()
 
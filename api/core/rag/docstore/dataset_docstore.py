@@ -1,7 +1,8 @@
+import uuid
 from collections.abc import Sequence
 from typing import Any, Optional
 
-from sqlalchemy import func
+from sqlalchemy import func, insert
 
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
@@ -11,6 +12,8 @@ from models.dataset import ChildChunk, Dataset, DocumentSegment
 
 
 class DatasetDocumentStore:
+    INSERT_BATCH_SIZE = 1000
+
     def __init__(
         self,
         dataset: Dataset,
@@ -61,24 +64,6 @@ class DatasetDocumentStore:
         return output
 
     def add_documents(self, docs: Sequence[Document], allow_update: bool = True, save_child: bool = False) -> None:
-        max_position = (
-            db.session.query(func.max(DocumentSegment.position))
-            .filter(DocumentSegment.document_id == self._document_id)
-            .scalar()
-        )
-
-        if max_position is None:
-            max_position = 0
-        embedding_model = None
-        if self._dataset.indexing_technique == "high_quality":
-            model_manager = ModelManager()
-            embedding_model = model_manager.get_model_instance(
-                tenant_id=self._dataset.tenant_id,
-                provider=self._dataset.embedding_model_provider,
-                model_type=ModelType.TEXT_EMBEDDING,
-                model=self._dataset.embedding_model,
-            )
-
         for doc in docs:
             if not isinstance(doc, Document):
                 raise ValueError("doc must be a Document")
@@ -86,91 +71,128 @@ class DatasetDocumentStore:
             if doc.metadata is None:
                 raise ValueError("doc.metadata must be a dict")
 
-            segment_document = self.get_document_segment(doc_id=doc.metadata["doc_id"])
+        if not docs:
+            return
 
-            # NOTE: doc could already exist in the store, but we overwrite it
-            if not allow_update and segment_document:
-                raise ValueError(
-                    f"doc_id {doc.metadata['doc_id']} already exists. Set allow_update to True to overwrite."
-                )
-
-            # calc embedding use tokens
-            if embedding_model:
-                tokens = embedding_model.get_text_embedding_num_tokens(texts=[doc.page_content])
-            else:
-                tokens = 0
+        max_position = (
+            db.session.query(func.max(DocumentSegment.position))
+            .filter(DocumentSegment.document_id == self._document_id)
+            .scalar()
+        )
 
-            if not segment_document:
-                max_position += 1
+        if max_position is None:
+            max_position = 0
 
-                segment_document = DocumentSegment(
-                    tenant_id=self._dataset.tenant_id,
-                    dataset_id=self._dataset.id,
-                    document_id=self._document_id,
-                    index_node_id=doc.metadata["doc_id"],
+        # prefetch the existing segments of the docs in one query
+        existing_segments = {
+            segment.index_node_id: segment
+            for segment in self.get_document_segments([doc.metadata["doc_id"] for doc in docs if doc.metadata])
+        }
+        if not allow_update and existing_segments:
+            doc_id = next(iter(existing_segments))
+            raise ValueError(f"doc_id {doc_id} already exists. Set allow_update to True to overwrite.")
+
+        # calc embedding use tokens, the counts are stored with the segments and reused when loading the index
+        tokens_list = self._get_tokens_list(docs)
+
+        segment_rows: dict[str, dict[str, Any]] = {}
+        child_rows: dict[str, list[dict[str, Any]]] = {}
+        updated_segment_ids = []
+        for doc, tokens in zip(docs, tokens_list):
+            assert doc.metadata is not None
+            doc_id = doc.metadata["doc_id"]
+            answer = doc.metadata.pop("answer", "") if doc.metadata.get("answer") else None
+
+            segment_document = existing_segments.get(doc_id)
+            if segment_document:
+                segment_document.content = doc.page_content
+                if answer:
+                    segment_document.answer = answer
+                segment_document.index_node_hash = doc.metadata.get("doc_hash")
+                segment_document.word_count = len(doc.page_content)
+                segment_document.tokens = tokens
+                segment_id = segment_document.id
+                if save_child and doc.children:
+                    updated_segment_ids.append(segment_id)
+            elif doc_id in segment_rows:
+                # NOTE: doc could already exist in the docs, but we overwrite it
+                segment_row = segment_rows[doc_id]
+                segment_row.update(
                     index_node_hash=doc.metadata["doc_hash"],
-                    position=max_position,
                     content=doc.page_content,
                     word_count=len(doc.page_content),
                     tokens=tokens,
-                    enabled=False,
-                    created_by=self._user_id,
                 )
-                if doc.metadata.get("answer"):
-                    segment_document.answer = doc.metadata.pop("answer", "")
-
-                db.session.add(segment_document)
-                db.session.flush()
-                if save_child:
-                    if doc.children:
-                        for postion, child in enumerate(doc.children, start=1):
-                            child_segment = ChildChunk(
-                                tenant_id=self._dataset.tenant_id,
-                                dataset_id=self._dataset.id,
-                                document_id=self._document_id,
-                                segment_id=segment_document.id,
-                                position=postion,
-                                index_node_id=child.metadata.get("doc_id"),
-                                index_node_hash=child.metadata.get("doc_hash"),
-                                content=child.page_content,
-                                word_count=len(child.page_content),
-                                type="automatic",
-                                created_by=self._user_id,
-                            )
-                            db.session.add(child_segment)
+                if answer:
+                    segment_row["answer"] = answer
+                segment_id = segment_row["id"]
             else:
-                segment_document.content = doc.page_content
-                if doc.metadata.get("answer"):
-                    segment_document.answer = doc.metadata.pop("answer", "")
-                segment_document.index_node_hash = doc.metadata.get("doc_hash")
-                segment_document.word_count = len(doc.page_content)
-                segment_document.tokens = tokens
-                if save_child and doc.children:
-                    # delete the existing child chunks
-                    db.session.query(ChildChunk).filter(
-                        ChildChunk.tenant_id == self._dataset.tenant_id,
-                        ChildChunk.dataset_id == self._dataset.id,
-                        ChildChunk.document_id == self._document_id,
-                        ChildChunk.segment_id == segment_document.id,
-                    ).delete()
-                    # add new child chunks
-                    for position, child in enumerate(doc.children, start=1):
-                        child_segment = ChildChunk(
-                            tenant_id=self._dataset.tenant_id,
-                            dataset_id=self._dataset.id,
-                            document_id=self._document_id,
-                            segment_id=segment_document.id,
-                            position=position,
-                            index_node_id=child.metadata.get("doc_id"),
-                            index_node_hash=child.metadata.get("doc_hash"),
-                            content=child.page_content,
-                            word_count=len(child.page_content),
-                            type="automatic",
-                            created_by=self._user_id,
-                        )
-                        db.session.add(child_segment)
-
-            db.session.commit()
+                max_position += 1
+                segment_id = str(uuid.uuid4())
+                segment_rows[doc_id] = {
+                    "id": segment_id,
+                    "tenant_id": self._dataset.tenant_id,
+                    "dataset_id": self._dataset.id,
+                    "document_id": self._document_id,
+                    "index_node_id": doc_id,
+                    "index_node_hash": doc.metadata["doc_hash"],
+                    "position": max_position,
+                    "content": doc.page_content,
+                    "answer": answer,
+                    "word_count": len(doc.page_content),
+                    "tokens": tokens,
+                    "enabled": False,
+                    "created_by": self._user_id,
+                }
+
+            if save_child and doc.children:
+                child_rows[segment_id] = [
+                    {
+                        "tenant_id": self._dataset.tenant_id,
+                        "dataset_id": self._dataset.id,
+                        "document_id": self._document_id,
+                        "segment_id": segment_id,
+                        "position": position,
+                        "index_node_id": child.metadata.get("doc_id") if child.metadata else None,
+                        "index_node_hash": child.metadata.get("doc_hash") if child.metadata else None,
+                        "content": child.page_content,
+                        "word_count": len(child.page_content),
+                        "type": "automatic",
+                        "created_by": self._user_id,
+                    }
+                    for position, child in enumerate(doc.children, start=1)
+                ]
+
+        if updated_segment_ids:
+            # delete the existing child chunks
+            db.session.query(ChildChunk).filter(
+                ChildChunk.tenant_id == self._dataset.tenant_id,
+                ChildChunk.dataset_id == self._dataset.id,
+                ChildChunk.document_id == self._document_id,
+                ChildChunk.segment_id.in_(updated_segment_ids),
+            ).delete(synchronize_session=False)
+
+        new_segment_rows = list(segment_rows.values())
+        for i in range(0, len(new_segment_rows), self.INSERT_BATCH_SIZE):
+            db.session.execute(insert(DocumentSegment), new_segment_rows[i : i + self.INSERT_BATCH_SIZE])
+        new_child_rows = [row for rows in child_rows.values() for row in rows]
+        for i in range(0, len(new_child_rows), self.INSERT_BATCH_SIZE):
+            db.session.execute(insert(ChildChunk), new_child_rows[i : i + self.INSERT_BATCH_SIZE])
+
+        db.session.commit()
+
+    def _get_tokens_list(self, docs: Sequence[Document]) -> list[int]:
+        if self._dataset.indexing_technique != "high_quality":
+            return [0] * len(docs)
+
+        model_manager = ModelManager()
+        embedding_model = model_manager.get_model_instance(
+            tenant_id=self._dataset.tenant_id,
+            provider=self._dataset.embedding_model_provider,
+            model_type=ModelType.TEXT_EMBEDDING,
+            model=self._dataset.embedding_model,
+        )
+        return [embedding_model.get_text_embedding_num_tokens(texts=[doc.page_content]) for doc in docs]
 
     def document_exists(self, doc_id: str) -> bool:
         """Check if document exists."""
@@ -227,6 +249,16 @@ class DatasetDocumentStore:
         data: Optional[str] = document_segment.index_node_hash
         return data
 
+    def get_document_segments(self, doc_ids: list[str]) -> list[DocumentSegment]:
+        if not doc_ids:
+            return []
+
+        return (
+            db.session.query(DocumentSegment)
+            .filter(DocumentSegment.dataset_id == self._dataset.id, DocumentSegment.index_node_id.in_(set(doc_ids)))
+            .all()
+        )
+
     def get_document_segment(self, doc_id: str) -> Optional[DocumentSegment]:
         document_segment = (
             db.session.query(DocumentSegment)
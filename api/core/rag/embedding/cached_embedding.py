@@ -1,8 +1,10 @@
 import base64
 import logging
+import pickle
 from typing import Any, Optional, cast
 
 import numpy as np
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
 from configs import dify_config
@@ -28,18 +30,12 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings: list[Any] = [None for _ in range(len(texts))]
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(set(text_hashes))
         embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
             else:
                 embedding_queue_indices.append(i)
         if embedding_queue_indices:
@@ -76,23 +72,11 @@ class CacheEmbedding(Embeddings):
                             db.session.rollback()
                         except Exception as e:
                             logging.exception("Failed transform embedding")
-                cache_embeddings = []
-                try:
-                    for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
-                        text_embeddings[i] = n_embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(
-                                model_name=self._model_instance.model,
-                                hash=hash,
-                                provider_name=self._model_instance.provider,
-                            )
-                            embedding_cache.set_embedding(n_embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+                new_embeddings: dict[str, list[float]] = {}
+                for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
+                    text_embeddings[i] = n_embedding
+                    new_embeddings.setdefault(text_hashes[i], n_embedding)
+                self._store_embeddings(new_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.exception("Failed to embed documents: %s")
@@ -100,6 +84,100 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _get_cached_embeddings(self, hashes: set[str]) -> dict[str, list[float]]:
+        """
+        Look up document embeddings by text hash, first in Redis (when enabled) and then in the
+        embeddings table with one IN query per batch.
+        """
+        cached_embeddings: dict[str, list[float]] = {}
+        if not hashes:
+            return cached_embeddings
+
+        missed_hashes = list(hashes)
+        if dify_config.EMBEDDING_CACHE_REDIS_ENABLED:
+            missed_hashes = []
+            hash_list = list(hashes)
+            try:
+                cached_values = redis_client.mget([self._document_cache_key(hash) for hash in hash_list])
+            except Exception:
+                logger.exception("Failed to get document embeddings from redis")
+                cached_values = [None] * len(hash_list)
+            for hash, cached_value in zip(hash_list, cached_values):
+                if cached_value:
+                    cached_embeddings[hash] = pickle.loads(cached_value)
+                else:
+                    missed_hashes.append(hash)
+
+        batch_size = dify_config.EMBEDDING_CACHE_LOOKUP_BATCH_SIZE
+        db_embeddings: dict[str, list[float]] = {}
+        for i in range(0, len(missed_hashes), batch_size):
+            embeddings = (
+                db.session.query(Embedding)
+                .filter(
+                    Embedding.model_name == self._model_instance.model,
+                    Embedding.provider_name == self._model_instance.provider,
+                    Embedding.hash.in_(missed_hashes[i : i + batch_size]),
+                )
+                .all()
+            )
+            for embedding in embeddings:
+                db_embeddings[embedding.hash] = embedding.get_embedding()
+
+        if db_embeddings:
+            self._set_redis_embeddings(db_embeddings)
+            cached_embeddings.update(db_embeddings)
+        return cached_embeddings
+
+    def _store_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """
+        Write newly computed document embeddings back to the embeddings table with bulk inserts,
+        ignoring rows that a concurrent indexing task has already stored.
+        """
+        if not embeddings:
+            return
+
+        rows = [
+            {
+                "model_name": self._model_instance.model,
+                "hash": hash,
+                "provider_name": self._model_instance.provider,
+                "embedding": pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL),
+            }
+            for hash, embedding in embeddings.items()
+        ]
+        batch_size = dify_config.EMBEDDING_CACHE_LOOKUP_BATCH_SIZE
+        try:
+            for i in range(0, len(rows), batch_size):
+                stmt = (
+                    insert(Embedding)
+                    .values(rows[i : i + batch_size])
+                    .on_conflict_do_nothing(index_elements=["model_name", "hash", "provider_name"])
+                )
+                db.session.execute(stmt)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+        self._set_redis_embeddings(embeddings)
+
+    def _set_redis_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        if not dify_config.EMBEDDING_CACHE_REDIS_ENABLED:
+            return
+        try:
+            with redis_client.pipeline(transaction=False) as pipe:
+                for hash, embedding in embeddings.items():
+                    pipe.setex(
+                        self._document_cache_key(hash),
+                        dify_config.EMBEDDING_CACHE_REDIS_TTL,
+                        pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL),
+                    )
+                pipe.execute()
+        except Exception:
+            logger.exception("Failed to set document embeddings to redis")
+
+    def _document_cache_key(self, hash: str) -> str:
+        return f"document_embedding:{self._model_instance.provider}_{self._model_instance.model}_{hash}"
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
         # use doc embedding cache or store if not exists
@@ -1,6 +1,8 @@
 """Abstract interface for document loader implementations."""
 
 import csv
+import itertools
+from collections.abc import Iterator
 from typing import Optional
 
 import pandas as pd
@@ -18,6 +20,8 @@ class CSVExtractor(BaseExtractor):
         file_path: Path to the file to load.
     """
 
+    CHUNK_SIZE = 10000
+
     def __init__(
         self,
         file_path: str,
@@ -35,44 +39,46 @@ class CSVExtractor(BaseExtractor):
 
     def extract(self) -> list[Document]:
         """Load data into document objects."""
-        docs = []
+        return list(self.extract_iter())
+
+    def extract_iter(self) -> Iterator[Document]:
+        """Lazily load the rows of the csv file, the file is read in chunks of rows."""
+        yielded = 0
         try:
             with open(self._file_path, newline="", encoding=self._encoding) as csvfile:
-                docs = self._read_from_file(csvfile)
+                for doc in self._read_from_file(csvfile):
+                    yield doc
+                    yielded += 1
         except UnicodeDecodeError as e:
             if self._autodetect_encoding:
                 detected_encodings = detect_file_encodings(self._file_path)
                 for encoding in detected_encodings:
                     try:
                         with open(self._file_path, newline="", encoding=encoding.encoding) as csvfile:
-                            docs = self._read_from_file(csvfile)
+                            # the rows read before the decoding error were already yielded
+                            for doc in itertools.islice(self._read_from_file(csvfile), yielded, None):
+                                yield doc
+                                yielded += 1
                         break
                     except UnicodeDecodeError:
                         continue
             else:
                 raise RuntimeError(f"Error loading {self._file_path}") from e
 
-        return docs
-
-    def _read_from_file(self, csvfile) -> list[Document]:
-        docs = []
+    def _read_from_file(self, csvfile) -> Iterator[Document]:
         try:
-            # load csv file into pandas dataframe
-            df = pd.read_csv(csvfile, on_bad_lines="skip", **self.csv_args)
+            # load csv file into pandas dataframes of CHUNK_SIZE rows
+            with pd.read_csv(csvfile, on_bad_lines="skip", chunksize=self.CHUNK_SIZE, **self.csv_args) as reader:
+                for df in reader:
+                    # check source column exists
+                    if self.source_column and self.source_column not in df.columns:
+                        raise ValueError(f"Source column '{self.source_column}' not found in CSV file.")
 
-            # check source column exists
-            if self.source_column and self.source_column not in df.columns:
-                raise ValueError(f"Source column '{self.source_column}' not found in CSV file.")
-
-            # create document objects
-
-            for i, row in df.iterrows():
-                content = ";".join(f"{col.strip()}: {str(row[col]).strip()}" for col in df.columns)
-                source = row[self.source_column] if self.source_column else ""
-                metadata = {"source": source, "row": i}
-                doc = Document(page_content=content, metadata=metadata)
-                docs.append(doc)
+                    # create document objects
+                    for i, row in df.iterrows():
+                        content = ";".join(f"{col.strip()}: {str(row[col]).strip()}" for col in df.columns)
+                        source = row[self.source_column] if self.source_column else ""
+                        metadata = {"source": source, "row": i}
+                        yield Document(page_content=content, metadata=metadata)
         except csv.Error as e:
             raise e
-
-        return docs
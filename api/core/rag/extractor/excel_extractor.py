@@ -1,14 +1,24 @@
 """Abstract interface for document loader implementations."""
 
 import os
-from typing import Optional, cast
+import zipfile
+from collections.abc import Iterator
+from typing import Optional
 
 import pandas as pd
 from openpyxl import load_workbook  # type: ignore
+from openpyxl.packaging.relationship import get_dependents, get_rels_path  # type: ignore
+from openpyxl.utils.cell import range_boundaries  # type: ignore
+from openpyxl.xml.constants import ARC_ROOT_RELS, REL_NS, SHEET_MAIN_NS  # type: ignore
+from openpyxl.xml.functions import iterparse  # type: ignore
 
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.models.document import Document
 
+_HYPERLINK_TAG = f"{{{SHEET_MAIN_NS}}}hyperlink"
+_SHEET_TAG = f"{{{SHEET_MAIN_NS}}}sheet"
+_RELATIONSHIP_ID = f"{{{REL_NS}}}id"
+
 
 class ExcelExtractor(BaseExtractor):
     """Load Excel files.
@@ -26,38 +36,14 @@ class ExcelExtractor(BaseExtractor):
 
     def extract(self) -> list[Document]:
         """Load from Excel file in xls or xlsx format using Pandas and openpyxl."""
-        documents = []
+        return list(self.extract_iter())
+
+    def extract_iter(self) -> Iterator[Document]:
+        """Lazily load the rows of an Excel file, xlsx sheets are streamed row by row."""
         file_extension = os.path.splitext(self._file_path)[-1].lower()
 
         if file_extension == ".xlsx":
-            wb = load_workbook(self._file_path, data_only=True)
-            for sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
-                data = sheet.values
-                try:
-                    cols = next(data)
-                except StopIteration:
-                    continue
-                df = pd.DataFrame(data, columns=cols)
-
-                df.dropna(how="all", inplace=True)
-
-                for index, row in df.iterrows():
-                    page_content = []
-                    for col_index, (k, v) in enumerate(row.items()):
-                        if pd.notna(v):
-                            cell = sheet.cell(
-                                row=cast(int, index) + 2, column=col_index + 1
-                            )  # +2 to account for header and 1-based index
-                            if cell.hyperlink:
-                                value = f"[{v}]({cell.hyperlink.target})"
-                                page_content.append(f'"{k}":"{value}"')
-                            else:
-                                page_content.append(f'"{k}":"{v}"')
-                    documents.append(
-                        Document(page_content=";".join(page_content), metadata={"source": self._file_path})
-                    )
-
+            yield from self._extract_xlsx()
         elif file_extension == ".xls":
             excel_file = pd.ExcelFile(self._file_path, engine="xlrd")
             for excel_sheet_name in excel_file.sheet_names:
@@ -69,10 +55,86 @@ class ExcelExtractor(BaseExtractor):
                     for k, v in row.items():
                         if pd.notna(v):
                             page_content.append(f'"{k}":"{v}"')
-                    documents.append(
-                        Document(page_content=";".join(page_content), metadata={"source": self._file_path})
-                    )
+                    yield Document(page_content=";".join(page_content), metadata={"source": self._file_path})
         else:
             raise ValueError(f"Unsupported file extension: {file_extension}")
 
-        return documents
+    def _extract_xlsx(self) -> Iterator[Document]:
+        # read-only workbooks parse the sheets lazily instead of building every cell in memory
+        wb = load_workbook(self._file_path, read_only=True, data_only=True)
+        try:
+            with zipfile.ZipFile(self._file_path) as archive:
+                sheet_paths = self._read_sheet_paths(archive)
+                for sheet in wb.worksheets:
+                    # read-only sheets stop at the dimension recorded in the file, which generators often leave stale
+                    sheet.reset_dimensions()
+                    sheet_path = sheet_paths.get(sheet.title)
+                    hyperlinks = self._read_hyperlinks(archive, sheet_path) if sheet_path else {}
+                    rows = sheet.iter_rows(values_only=True)
+                    try:
+                        cols = next(rows)
+                    except StopIteration:
+                        continue
+
+                    # +2 to account for header and 1-based index
+                    for row_index, row in enumerate(rows, start=2):
+                        page_content = []
+                        for col_index, (k, v) in enumerate(zip(cols, row), start=1):
+                            if v is None:
+                                continue
+                            target = hyperlinks.get((row_index, col_index))
+                            if target:
+                                page_content.append(f'"{k}":"[{v}]({target})"')
+                            else:
+                                page_content.append(f'"{k}":"{v}"')
+                        if page_content:
+                            yield Document(page_content=";".join(page_content), metadata={"source": self._file_path})
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _read_sheet_paths(archive: zipfile.ZipFile) -> dict[str, str]:
+        """
+        Read the archive paths of the sheets by sheet name, from the package relationships and the workbook xml.
+        """
+        root_rels = get_dependents(archive, ARC_ROOT_RELS)
+        workbook_path = next(rel.target for rel in root_rels if rel.Type.endswith("/officeDocument"))
+        workbook_rels = get_dependents(archive, get_rels_path(workbook_path))
+        sheet_paths = {}
+        with archive.open(workbook_path) as source:
+            for _, element in iterparse(source):
+                if element.tag == _SHEET_TAG:
+                    try:
+                        sheet_paths[element.get("name")] = workbook_rels.get(element.get(_RELATIONSHIP_ID)).target
+                    except KeyError:
+                        pass
+                element.clear()
+        return sheet_paths
+
+    @staticmethod
+    def _read_hyperlinks(archive: zipfile.ZipFile, sheet_path: str) -> dict[tuple[int, int], str]:
+        """
+        Read the hyperlink targets of a sheet by (row, column), read-only sheets do not bind hyperlinks to cells,
+        the hyperlinks are parsed from the sheet xml without keeping its rows.
+        """
+        refs: list[tuple[str, str]] = []
+        with archive.open(sheet_path) as source:
+            for _, element in iterparse(source):
+                if element.tag == _HYPERLINK_TAG and element.get(_RELATIONSHIP_ID) and element.get("ref"):
+                    refs.append((element.get("ref"), element.get(_RELATIONSHIP_ID)))
+                element.clear()
+        if not refs:
+            return {}
+
+        rels = get_dependents(archive, get_rels_path(sheet_path))
+        hyperlinks = {}
+        for ref, rel_id in refs:
+            try:
+                target = rels.get(rel_id).Target
+            except KeyError:
+                continue
+            min_col, min_row, max_col, max_row = range_boundaries(ref)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    hyperlinks[(row, col)] = target
+        return hyperlinks
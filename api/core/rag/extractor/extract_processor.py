@@ -1,5 +1,6 @@
 import re
 import tempfile
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Optional, Union
 from urllib.parse import unquote
@@ -91,74 +92,7 @@ class ExtractProcessor:
         cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
     ) -> list[Document]:
         if extract_setting.datasource_type == DatasourceType.FILE.value:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                if not file_path:
-                    assert extract_setting.upload_file is not None, "upload_file is required"
-                    upload_file: UploadFile = extract_setting.upload_file
-                    suffix = Path(upload_file.key).suffix
-                    # FIXME mypy: Cannot determine type of 'tempfile._get_candidate_names' better not use it here
-                    file_path = f"{temp_dir}/{next(tempfile._get_candidate_names())}{suffix}"  # type: ignore
-                    storage.download(upload_file.key, file_path)
-                input_file = Path(file_path)
-                file_extension = input_file.suffix.lower()
-                etl_type = dify_config.ETL_TYPE
-                extractor: Optional[BaseExtractor] = None
-                if etl_type == "Unstructured":
-                    unstructured_api_url = dify_config.UNSTRUCTURED_API_URL
-                    unstructured_api_key = dify_config.UNSTRUCTURED_API_KEY or ""
-
-                    if file_extension in {".xlsx", ".xls"}:
-                        extractor = ExcelExtractor(file_path)
-                    elif file_extension == ".pdf":
-                        extractor = PdfExtractor(file_path)
-                    elif file_extension in {".md", ".markdown", ".mdx"}:
-                        extractor = (
-                            UnstructuredMarkdownExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                            if is_automatic
-                            else MarkdownExtractor(file_path, autodetect_encoding=True)
-                        )
-                    elif file_extension in {".htm", ".html"}:
-                        extractor = HtmlExtractor(file_path)
-                    elif file_extension == ".docx":
-                        extractor = WordExtractor(file_path, upload_file.tenant_id, upload_file.created_by)
-                    elif file_extension == ".csv":
-                        extractor = CSVExtractor(file_path, autodetect_encoding=True)
-                    elif file_extension == ".msg":
-                        extractor = UnstructuredMsgExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                    elif file_extension == ".eml":
-                        extractor = UnstructuredEmailExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                    elif file_extension == ".ppt":
-                        extractor = UnstructuredPPTExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                        # You must first specify the API key
-                        # because unstructured_api_key is necessary to parse .ppt documents
-                    elif file_extension == ".pptx":
-                        extractor = UnstructuredPPTXExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                    elif file_extension == ".xml":
-                        extractor = UnstructuredXmlExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                    elif file_extension == ".epub":
-                        extractor = UnstructuredEpubExtractor(file_path, unstructured_api_url, unstructured_api_key)
-                    else:
-                        # txt
-                        extractor = TextExtractor(file_path, autodetect_encoding=True)
-                else:
-                    if file_extension in {".xlsx", ".xls"}:
-                        extractor = ExcelExtractor(file_path)
-                    elif file_extension == ".pdf":
-                        extractor = PdfExtractor(file_path)
-                    elif file_extension in {".md", ".markdown", ".mdx"}:
-                        extractor = MarkdownExtractor(file_path, autodetect_encoding=True)
-                    elif file_extension in {".htm", ".html"}:
-                        extractor = HtmlExtractor(file_path)
-                    elif file_extension == ".docx":
-                        extractor = WordExtractor(file_path, upload_file.tenant_id, upload_file.created_by)
-                    elif file_extension == ".csv":
-                        extractor = CSVExtractor(file_path, autodetect_encoding=True)
-                    elif file_extension == ".epub":
-                        extractor = UnstructuredEpubExtractor(file_path)
-                    else:
-                        # txt
-                        extractor = TextExtractor(file_path, autodetect_encoding=True)
-                return extractor.extract()
+            return list(cls.extract_iter(extract_setting, is_automatic, file_path))
         elif extract_setting.datasource_type == DatasourceType.NOTION.value:
             assert extract_setting.notion_info is not None, "notion_info is required"
             extractor = NotionExtractor(
@@ -193,3 +127,92 @@ class ExtractProcessor:
                 raise ValueError(f"Unsupported website provider: {extract_setting.website_info.provider}")
         else:
             raise ValueError(f"Unsupported datasource type: {extract_setting.datasource_type}")
+
+    @classmethod
+    def extract_iter(
+        cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
+    ) -> Iterator[Document]:
+        """
+        Lazily extract the documents, uploaded files are downloaded to a temporary file which is parsed
+        incrementally by the extractors supporting it, so large files are not held in memory.
+        """
+        if extract_setting.datasource_type != DatasourceType.FILE.value:
+            yield from cls.extract(extract_setting, is_automatic, file_path)
+            return
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            upload_file: Optional[UploadFile] = None
+            if not file_path:
+                assert extract_setting.upload_file is not None, "upload_file is required"
+                upload_file = extract_setting.upload_file
+                suffix = Path(upload_file.key).suffix
+                # FIXME mypy: Cannot determine type of 'tempfile._get_candidate_names' better not use it here
+                file_path = f"{temp_dir}/{next(tempfile._get_candidate_names())}{suffix}"  # type: ignore
+                storage.download(upload_file.key, file_path)
+            extractor = cls._get_file_extractor(file_path, upload_file, is_automatic)
+            yield from extractor.extract_iter()
+
+    @staticmethod
+    def _get_file_extractor(file_path: str, upload_file: Optional[UploadFile], is_automatic: bool) -> BaseExtractor:
+        input_file = Path(file_path)
+        file_extension = input_file.suffix.lower()
+        etl_type = dify_config.ETL_TYPE
+        extractor: BaseExtractor
+        if etl_type == "Unstructured":
+            unstructured_api_url = dify_config.UNSTRUCTURED_API_URL
+            unstructured_api_key = dify_config.UNSTRUCTURED_API_KEY or ""
+
+            if file_extension in {".xlsx", ".xls"}:
+                extractor = ExcelExtractor(file_path)
+            elif file_extension == ".pdf":
+                extractor = PdfExtractor(file_path)
+            elif file_extension in {".md", ".markdown", ".mdx"}:
+                extractor = (
+                    UnstructuredMarkdownExtractor(file_path, unstructured_api_url, unstructured_api_key)
+                    if is_automatic
+                    else MarkdownExtractor(file_path, autodetect_encoding=True)
+                )
+            elif file_extension in {".htm", ".html"}:
+                extractor = HtmlExtractor(file_path)
+            elif file_extension == ".docx":
+                assert upload_file is not None, "upload_file is required"
+                extractor = WordExtractor(file_path, upload_file.tenant_id, upload_file.created_by)
+            elif file_extension == ".csv":
+                extractor = CSVExtractor(file_path, autodetect_encoding=True)
+            elif file_extension == ".msg":
+                extractor = UnstructuredMsgExtractor(file_path, unstructured_api_url, unstructured_api_key)
+            elif file_extension == ".eml":
+                extractor = UnstructuredEmailExtractor(file_path, unstructured_api_url, unstructured_api_key)
+            elif file_extension == ".ppt":
+                extractor = UnstructuredPPTExtractor(file_path, unstructured_api_url, unstructured_api_key)
+                # You must first specify the API key
+                # because unstructured_api_key is necessary to parse .ppt documents
+            elif file_extension == ".pptx":
+                extractor = UnstructuredPPTXExtractor(file_path, unstructured_api_url, unstructured_api_key)
+            elif file_extension == ".xml":
+                extractor = UnstructuredXmlExtractor(file_path, unstructured_api_url, unstructured_api_key)
+            elif file_extension == ".epub":
+                extractor = UnstructuredEpubExtractor(file_path, unstructured_api_url, unstructured_api_key)
+            else:
+                # txt
+                extractor = TextExtractor(file_path, autodetect_encoding=True)
+        else:
+            if file_extension in {".xlsx", ".xls"}:
+                extractor = ExcelExtractor(file_path)
+            elif file_extension == ".pdf":
+                extractor = PdfExtractor(file_path)
+            elif file_extension in {".md", ".markdown", ".mdx"}:
+                extractor = MarkdownExtractor(file_path, autodetect_encoding=True)
+            elif file_extension in {".htm", ".html"}:
+                extractor = HtmlExtractor(file_path)
+            elif file_extension == ".docx":
+                assert upload_file is not None, "upload_file is required"
+                extractor = WordExtractor(file_path, upload_file.tenant_id, upload_file.created_by)
+            elif file_extension == ".csv":
+                extractor = CSVExtractor(file_path, autodetect_encoding=True)
+            elif file_extension == ".epub":
+                extractor = UnstructuredEpubExtractor(file_path)
+            else:
+                # txt
+                extractor = TextExtractor(file_path, autodetect_encoding=True)
+        return extractor
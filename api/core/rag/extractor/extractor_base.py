@@ -1,6 +1,7 @@
 """Abstract interface for document loader implementations."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
 
 class BaseExtractor(ABC):
@@ -9,3 +10,10 @@ class BaseExtractor(ABC):
     @abstractmethod
     def extract(self):
         raise NotImplementedError
+
+    def extract_iter(self) -> Iterator:
+        """
+        Lazily extract the documents, extractors able to parse a file incrementally
+        override it to yield the documents without loading the whole file.
+        """
+        yield from self.extract()
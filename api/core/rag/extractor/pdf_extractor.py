@@ -23,26 +23,28 @@ class PdfExtractor(BaseExtractor):
         self._file_cache_key = file_cache_key
 
     def extract(self) -> list[Document]:
-        plaintext_file_exists = False
+        return list(self.extract_iter())
+
+    def extract_iter(self) -> Iterator[Document]:
+        """Lazily extract the pages, the plaintext of the pages is cached once all of them are extracted."""
         if self._file_cache_key:
             try:
                 text = cast(bytes, storage.load(self._file_cache_key)).decode("utf-8")
-                plaintext_file_exists = True
-                return [Document(page_content=text)]
+                yield Document(page_content=text)
+                return
             except FileNotFoundError:
                 pass
-        documents = list(self.load())
         text_list = []
-        for document in documents:
-            text_list.append(document.page_content)
-        text = "\n\n".join(text_list)
+        for document in self.load():
+            if self._file_cache_key:
+                text_list.append(document.page_content)
+            yield document
 
         # save plaintext file for caching
-        if not plaintext_file_exists and self._file_cache_key:
+        if self._file_cache_key:
+            text = "\n\n".join(text_list)
             storage.save(self._file_cache_key, text.encode("utf-8"))
 
-        return documents
-
     def load(
         self,
     ) -> Iterator[Document]:
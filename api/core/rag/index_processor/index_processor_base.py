@@ -1,6 +1,7 @@
 """Abstract interface for document loader implementations."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from typing import Optional
 
 from configs import dify_config
@@ -22,10 +23,21 @@ class BaseIndexProcessor(ABC):
     def extract(self, extract_setting: ExtractSetting, **kwargs) -> list[Document]:
         raise NotImplementedError
 
+    def extract_iter(self, extract_setting: ExtractSetting, **kwargs) -> Iterator[Document]:
+        """Lazily extract the documents, processors extracting files incrementally override it."""
+        yield from self.extract(extract_setting, **kwargs)
+
     @abstractmethod
     def transform(self, documents: list[Document], **kwargs) -> list[Document]:
         raise NotImplementedError
 
+    def supports_batch_transform(self, process_rule: dict) -> bool:
+        """
+        Whether the extracted documents can be transformed batch by batch,
+        i.e. the transform of a document does not depend on the other documents.
+        """
+        return True
+
     @abstractmethod
     def load(self, dataset: Dataset, documents: list[Document], with_keywords: bool = True, **kwargs):
         raise NotImplementedError
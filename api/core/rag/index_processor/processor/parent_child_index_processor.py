@@ -1,6 +1,7 @@
 """Paragraph index processor."""
 
 import uuid
+from collections.abc import Iterator
 from typing import Optional
 
 from configs import dify_config
@@ -29,6 +30,14 @@ class ParentChildIndexProcessor(BaseIndexProcessor):
 
         return text_docs
 
+    def extract_iter(self, extract_setting: ExtractSetting, **kwargs) -> Iterator[Document]:
+        yield from ExtractProcessor.extract_iter(
+            extract_setting=extract_setting,
+            is_automatic=(
+                kwargs.get("process_rule_mode") == "automatic" or kwargs.get("process_rule_mode") == "hierarchical"
+            ),
+        )
+
     def transform(self, documents: list[Document], **kwargs) -> list[Document]:
         process_rule = kwargs.get("process_rule")
         if not process_rule:
@@ -94,6 +103,11 @@ class ParentChildIndexProcessor(BaseIndexProcessor):
 
         return all_documents
 
+    def supports_batch_transform(self, process_rule: dict) -> bool:
+        # the full doc mode makes a single parent chunk of all the extracted documents
+        rules = Rule(**process_rule.get("rules") or {})
+        return rules.parent_mode != ParentMode.FULL_DOC
+
     def load(self, dataset: Dataset, documents: list[Document], with_keywords: bool = True, **kwargs):
         if dataset.indexing_technique == "high_quality":
             vector = Vector(dataset)
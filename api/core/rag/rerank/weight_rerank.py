@@ -1,9 +1,11 @@
-import math
+import threading
 from collections import Counter
 from typing import Optional
 
 import numpy as np
 
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
@@ -11,6 +13,12 @@ from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import VectorSetting, Weights
 from core.rag.rerank.rerank_base import BaseRerankRunner
+from extensions.ext_database import db
+from models.dataset import DocumentSegment
+
+# jieba keywords of documents whose segments have no stored keywords, keyed by document hash
+_keywords_cache = LRUCache(capacity=dify_config.WEIGHT_RERANK_KEYWORDS_CACHE_SIZE)
+_keywords_cache_lock = threading.Lock()
 
 
 class WeightRerankRunner(BaseRerankRunner):
@@ -65,7 +73,7 @@ class WeightRerankRunner(BaseRerankRunner):
 
     def _calculate_keyword_score(self, query: str, documents: list[Document]) -> list[float]:
         """
-        Calculate BM25 scores
+        Calculate TF-IDF cosine similarity scores
         :param query: search query
         :param documents: documents for reranking
 
@@ -73,72 +81,72 @@ class WeightRerankRunner(BaseRerankRunner):
         """
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
-        documents_keywords = []
-        for document in documents:
-            # get the document keywords
-            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
-            if document.metadata is not None:
-                document.metadata["keywords"] = document_keywords
-                documents_keywords.append(document_keywords)
+        documents_keywords = self._get_documents_keywords(keyword_table_handler, documents)
+        if not documents_keywords:
+            return []
+
+        # build the term frequency matrix of all documents' keywords
+        vocabulary: dict[str, int] = {}
+        rows = []
+        columns = []
+        for row, document_keywords in enumerate(documents_keywords):
+            for keyword in document_keywords:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(keyword, len(vocabulary)))
+        term_matrix = np.zeros((len(documents_keywords), len(vocabulary)))
+        np.add.at(term_matrix, (rows, columns), 1)
 
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
+        # calculate all documents' keywords IDF
         total_documents = len(documents)
+        doc_count_containing_keyword = np.count_nonzero(term_matrix, axis=0)
+        keyword_idf = np.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
+
+        # calculate query and all documents' TF-IDF, keywords not in any document have no IDF
+        query_tfidf = np.zeros(len(vocabulary))
+        for keyword, count in Counter(query_keywords).items():
+            if keyword in vocabulary:
+                query_tfidf[vocabulary[keyword]] = count
+        query_tfidf *= keyword_idf
+        documents_tfidf = term_matrix * keyword_idf
+
+        # calculate cosine similarity of all documents at once
+        numerators = documents_tfidf @ query_tfidf
+        denominators = np.linalg.norm(documents_tfidf, axis=1) * np.linalg.norm(query_tfidf)
+        similarities = np.divide(numerators, denominators, out=np.zeros_like(numerators), where=denominators > 0)
+
+        return similarities.tolist()
+
+    @staticmethod
+    def _get_documents_keywords(
+        keyword_table_handler: JiebaKeywordTableHandler, documents: list[Document]
+    ) -> list[list[str]]:
+        """
+        Get the jieba keywords of documents, the keywords stored in the segments are used if exist
+        :param keyword_table_handler: jieba keyword table handler
+        :param documents: documents for reranking
 
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
-
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
-
-        # for idx, similarity in enumerate(similarities):
-        #     print(f"Document {idx + 1} similarity: {similarity}")
-
-        return similarities
+        :return:
+        """
+        documents = [document for document in documents if document.metadata is not None]
+        segment_keywords = {}
+        index_node_ids = [document.metadata["doc_id"] for document in documents if document.metadata.get("doc_id")]
+        if index_node_ids:
+            segments = (
+                db.session.query(DocumentSegment.index_node_id, DocumentSegment.keywords)
+                .filter(DocumentSegment.index_node_id.in_(index_node_ids))
+                .all()
+            )
+            segment_keywords = {segment.index_node_id: segment.keywords for segment in segments if segment.keywords}
+
+        documents_keywords = []
+        for document in documents:
+            document_keywords = segment_keywords.get(document.metadata.get("doc_id"))
+            if not document_keywords:
+                document_keywords = _get_cached_keywords(keyword_table_handler, document)
+            document.metadata["keywords"] = document_keywords
+            documents_keywords.append(list(document_keywords))
+
+        return documents_keywords
 
     def _calculate_cosine(
         self, tenant_id: str, query: str, documents: list[Document], vector_setting: VectorSetting
@@ -150,7 +158,18 @@ class WeightRerankRunner(BaseRerankRunner):
 
         :return:
         """
-        query_vector_scores = []
+        query_vector_scores = [0.0] * len(documents)
+
+        # documents from vector search already have the similarity score
+        unscored_indexes = []
+        for index, document in enumerate(documents):
+            if document.metadata and "score" in document.metadata:
+                query_vector_scores[index] = document.metadata["score"]
+            elif document.vector:
+                unscored_indexes.append(index)
+
+        if not unscored_indexes:
+            return query_vector_scores
 
         model_manager = ModelManager()
 
@@ -161,25 +180,30 @@ class WeightRerankRunner(BaseRerankRunner):
             model=vector_setting.embedding_model_name,
         )
         cache_embedding = CacheEmbedding(embedding_model)
-        query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
-            if document.metadata and "score" in document.metadata:
-                query_vector_scores.append(document.metadata["score"])
-            else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
+        query_vector = np.array(cache_embedding.embed_query(query))
 
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
+        # calculate cosine similarity of all documents with one matrix-vector product
+        document_vectors = np.array([documents[index].vector for index in unscored_indexes])
+        dot_products = document_vectors @ query_vector
+        norms = np.linalg.norm(document_vectors, axis=1) * np.linalg.norm(query_vector)
+        cosine_sims = dot_products / norms
 
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+        for index, cosine_sim in zip(unscored_indexes, cosine_sims.tolist()):
+            query_vector_scores[index] = cosine_sim
 
         return query_vector_scores
+
+
+def _get_cached_keywords(keyword_table_handler: JiebaKeywordTableHandler, document: Document) -> set[str]:
+    cache_key = document.metadata.get("doc_hash") if document.metadata else None
+    if not cache_key or not dify_config.WEIGHT_RERANK_KEYWORDS_CACHE_SIZE:
+        return keyword_table_handler.extract_keywords(document.page_content, None)
+
+    with _keywords_cache_lock:
+        keywords = _keywords_cache.get(cache_key)
+    if keywords is None:
+        keywords = keyword_table_handler.extract_keywords(document.page_content, None)
+        with _keywords_cache_lock:
+            _keywords_cache.capacity = dify_config.WEIGHT_RERANK_KEYWORDS_CACHE_SIZE
+            _keywords_cache.put(cache_key, keywords)
+    return keywords
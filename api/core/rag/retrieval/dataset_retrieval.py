@@ -1,10 +1,12 @@
+import logging
 import math
-import threading
 from collections import Counter
+from functools import partial
 from typing import Any, Optional, cast
 
 from flask import Flask, current_app
 
+from configs import dify_config
 from core.app.app_config.entities import DatasetEntity, DatasetRetrieveConfigEntity
 from core.app.entities.app_invoke_entities import InvokeFrom, ModelConfigWithCredentialsEntity
 from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCallbackHandler
@@ -19,11 +21,14 @@ from core.ops.ops_trace_manager import TraceQueueManager, TraceTask
 from core.ops.utils import measure_time
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.retrieval_context import RetrievalContext
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.entities.context_entities import DocumentContext
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
+from core.rag.retrieval.retrieval_executor import dataset_retrieval_executor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
+from core.rag.retrieval.retrieval_stats_buffer import RetrievalStatsBuffer
 from core.rag.retrieval.router.multi_dataset_function_call_router import FunctionCallMultiDatasetRouter
 from core.rag.retrieval.router.multi_dataset_react_route import ReactMultiDatasetRouter
 from core.tools.tool.dataset_retriever.dataset_multi_retriever_tool import DatasetMultiRetrieverTool
@@ -34,6 +39,8 @@ from models.dataset import Dataset, DatasetQuery, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model: dict[str, Any] = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -351,7 +358,6 @@ class DatasetRetrieval:
     ):
         if not available_datasets:
             return []
-        threads = []
         all_documents: list[Document] = []
         dataset_ids = [dataset.id for dataset in available_datasets]
         index_type_check = all(
@@ -385,22 +391,33 @@ class DatasetRetrieval:
                     ].embedding_model_provider
                     weights["vector_setting"]["embedding_model_name"] = available_datasets[0].embedding_model
 
+        # datasets sharing an embedding model embed the query once
+        retrieval_context = RetrievalContext()
+        branches = {}
         for dataset in available_datasets:
             index_type = dataset.indexing_technique
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset.id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                },
+            branches[dataset.id] = partial(
+                self._retriever,
+                flask_app=current_app._get_current_object(),  # type: ignore
+                dataset_id=dataset.id,
+                query=query,
+                top_k=top_k,
+                retrieval_context=retrieval_context,
             )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+        # a dataset waits for its own search deadline first, then its reranking
+        for branch_result in dataset_retrieval_executor.run(
+            branches, timeout=dify_config.DATASET_RETRIEVAL_BRANCH_TIMEOUT * 2
+        ):
+            if branch_result.timed_out:
+                logger.warning(f"Retrieval of dataset {branch_result.name} timed out, its results are dropped")
+            elif branch_result.rejected:
+                logger.warning(
+                    f"Retrieval of dataset {branch_result.name} rejected, it is still running for earlier requests"
+                )
+            elif branch_result.error is not None:
+                logger.error(f"Retrieval of dataset {branch_result.name} failed", exc_info=branch_result.error)
+            elif branch_result.result:
+                all_documents.extend(branch_result.result)
 
         with measure_time() as timer:
             if reranking_enable:
@@ -428,20 +445,24 @@ class DatasetRetrieval:
     ) -> None:
         """Handle retrieval end."""
         dify_documents = [document for document in documents if document.provider == "dify"]
-        for document in dify_documents:
-            if document.metadata is not None:
-                query = db.session.query(DocumentSegment).filter(
-                    DocumentSegment.index_node_id == document.metadata["doc_id"]
-                )
+        if dify_config.DATASET_RETRIEVAL_STATS_BUFFER_ENABLED:
+            # hit counts are written to the database by the flush_dataset_retrieval_stats_task beat task
+            RetrievalStatsBuffer.add_segment_hits(dify_documents)
+        else:
+            for document in dify_documents:
+                if document.metadata is not None:
+                    query = db.session.query(DocumentSegment).filter(
+                        DocumentSegment.index_node_id == document.metadata["doc_id"]
+                    )
 
-                # if 'dataset_id' in document.metadata:
-                if "dataset_id" in document.metadata:
-                    query = query.filter(DocumentSegment.dataset_id == document.metadata["dataset_id"])
+                    # if 'dataset_id' in document.metadata:
+                    if "dataset_id" in document.metadata:
+                        query = query.filter(DocumentSegment.dataset_id == document.metadata["dataset_id"])
 
-                # add hit count to document segment
-                query.update({DocumentSegment.hit_count: DocumentSegment.hit_count + 1}, synchronize_session=False)
+                    # add hit count to document segment
+                    query.update({DocumentSegment.hit_count: DocumentSegment.hit_count + 1}, synchronize_session=False)
 
-                db.session.commit()
+                    db.session.commit()
 
         # get tracing instance
         trace_manager: Optional[TraceQueueManager] = (
@@ -460,6 +481,21 @@ class DatasetRetrieval:
         """
         if not query:
             return
+        if dify_config.DATASET_RETRIEVAL_STATS_BUFFER_ENABLED:
+            RetrievalStatsBuffer.add_dataset_queries(
+                [
+                    {
+                        "dataset_id": dataset_id,
+                        "content": query,
+                        "source": "app",
+                        "source_app_id": app_id,
+                        "created_by_role": user_from,
+                        "created_by": user_id,
+                    }
+                    for dataset_id in dataset_ids
+                ]
+            )
+            return
         dataset_queries = []
         for dataset_id in dataset_ids:
             dataset_query = DatasetQuery(
@@ -475,12 +511,21 @@ class DatasetRetrieval:
             db.session.add_all(dataset_queries)
         db.session.commit()
 
-    def _retriever(self, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list):
+    def _retriever(
+        self,
+        flask_app: Flask,
+        dataset_id: str,
+        query: str,
+        top_k: int,
+        retrieval_context: Optional[RetrievalContext] = None,
+    ) -> list[Document]:
+        all_documents: list[Document] = []
         with flask_app.app_context():
-            dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+            retrieval_context = retrieval_context or RetrievalContext()
+            dataset = retrieval_context.get_dataset(dataset_id)
 
             if not dataset:
-                return []
+                return all_documents
 
             if dataset.provider == "external":
                 external_documents = ExternalDatasetService.fetch_external_knowledge_retrieval(
@@ -508,7 +553,11 @@ class DatasetRetrieval:
                 if dataset.indexing_technique == "economy":
                     # use keyword table query
                     documents = RetrievalService.retrieve(
-                        retrieval_method="keyword_search", dataset_id=dataset.id, query=query, top_k=top_k
+                        retrieval_method="keyword_search",
+                        dataset_id=dataset.id,
+                        query=query,
+                        top_k=top_k,
+                        retrieval_context=retrieval_context,
                     )
                     if documents:
                         all_documents.extend(documents)
@@ -528,10 +577,13 @@ class DatasetRetrieval:
                             else None,
                             reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                             weights=retrieval_model.get("weights", None),
+                            retrieval_context=retrieval_context,
                         )
 
                         all_documents.extend(documents)
 
+        return all_documents
+
     def to_dataset_retriever_tool(
         self,
         tenant_id: str,
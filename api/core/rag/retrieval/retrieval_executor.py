@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Mapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Generic, Optional, TypeVar
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class BranchResult(Generic[T]):
+    name: str
+    result: Optional[T] = None
+    error: Optional[Exception] = None
+    timed_out: bool = False
+    rejected: bool = False
+    latency: float = 0.0
+
+
+class RetrievalExecutor:
+    """
+    Process-wide bounded thread pool to fan out retrieval branches with a deadline.
+
+    Branches that do not finish before the deadline are cancelled if they have not started yet,
+    running ones are abandoned and their results dropped, so one stalled vector store only
+    drops its own results instead of blocking the whole retrieval.
+
+    Abandoned branches keep their worker until they return, so the branches of a bulkhead
+    (a dataset or a vector store) may hold at most max_workers_per_bulkhead workers. Branches
+    of a full bulkhead are rejected at once instead of queueing behind the stalled ones.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str, max_workers_per_bulkhead: int) -> None:
+        self._thread_name_prefix = thread_name_prefix
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._max_workers_per_bulkhead = max_workers_per_bulkhead
+        # bulkhead key to the number of its branches queued or running, abandoned ones included
+        self._in_flight: defaultdict[Hashable, int] = defaultdict(int)
+        self._in_flight_lock = threading.Lock()
+
+    def run(
+        self,
+        branches: Mapping[str, Callable[[], T]],
+        timeout: float,
+        bulkheads: Optional[Mapping[str, Hashable]] = None,
+    ) -> list[BranchResult[T]]:
+        """
+        Run the branches concurrently and wait for them until the deadline.
+
+        :param branches: branch name to branch function
+        :param timeout: deadline in seconds, counted from the submission of the branches
+        :param bulkheads: branch name to bulkhead key, the branch name by default
+        :return: results of the branches in the order of the branches
+        """
+        if not branches:
+            return []
+
+        started_at = time.perf_counter()
+        results = {name: BranchResult[T](name=name) for name in branches}
+        futures = {}
+        for name, branch in branches.items():
+            bulkhead = bulkheads.get(name, name) if bulkheads else name
+            if not self._acquire(bulkhead):
+                results[name].rejected = True
+                logger.warning(
+                    f"{self._thread_name_prefix} branch {name} rejected,"
+                    f" {self._max_workers_per_bulkhead} branches of {bulkhead} are still running"
+                )
+                continue
+            future = self._executor.submit(self._run_branch, results[name], branch, started_at)
+            future.add_done_callback(lambda _, bulkhead=bulkhead: self._release(bulkhead))
+            futures[future] = name
+
+        _, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+            result = results[futures[future]]
+            result.timed_out = True
+            result.latency = time.perf_counter() - started_at
+            logger.warning(f"{self._thread_name_prefix} branch {result.name} timed out after {timeout}s")
+
+        return list(results.values())
+
+    def _acquire(self, bulkhead: Hashable) -> bool:
+        with self._in_flight_lock:
+            if self._in_flight[bulkhead] >= self._max_workers_per_bulkhead:
+                return False
+            self._in_flight[bulkhead] += 1
+            return True
+
+    def _release(self, bulkhead: Hashable) -> None:
+        with self._in_flight_lock:
+            self._in_flight[bulkhead] -= 1
+            if not self._in_flight[bulkhead]:
+                del self._in_flight[bulkhead]
+
+    @staticmethod
+    def _run_branch(result: BranchResult[T], branch: Callable[[], T], submitted_at: float) -> None:
+        started_at = time.perf_counter()
+        try:
+            result.result = branch()
+        except Exception as e:
+            result.error = e
+        finally:
+            finished_at = time.perf_counter()
+            if not result.timed_out:
+                result.latency = finished_at - submitted_at
+            logger.debug(
+                f"Retrieval branch {result.name} finished in {finished_at - started_at:.3f}s,"
+                f" queued for {started_at - submitted_at:.3f}s"
+            )
+
+
+# datasets and the search branches of a dataset use separate pools,
+# a dataset waiting for its search branches can not starve them of workers
+dataset_retrieval_executor = RetrievalExecutor(
+    max_workers=dify_config.DATASET_RETRIEVAL_MAX_WORKERS,
+    thread_name_prefix="dataset_retrieval",
+    max_workers_per_bulkhead=dify_config.DATASET_RETRIEVAL_MAX_WORKERS_PER_BULKHEAD,
+)
+search_retrieval_executor = RetrievalExecutor(
+    max_workers=dify_config.DATASET_RETRIEVAL_MAX_WORKERS,
+    thread_name_prefix="search_retrieval",
+    max_workers_per_bulkhead=dify_config.DATASET_RETRIEVAL_MAX_WORKERS_PER_BULKHEAD,
+)
@@ -0,0 +1,139 @@
+import json
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Optional
+
+from redis.exceptions import ResponseError
+from sqlalchemy import insert, tuple_, update
+
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import DatasetQuery, DocumentSegment
+
+
+class RetrievalStatsBuffer:
+    """
+    Buffer of segment hit counts and dataset queries in Redis.
+
+    Retrieval only writes to Redis, the buffered stats are written to the database in aggregated
+    bulk statements by the `flush_dataset_retrieval_stats_task` beat task.
+    """
+
+    SEGMENT_HIT_COUNT_KEY = "retrieval_stats_buffer:segment_hit_count"
+    DATASET_QUERY_KEY = "retrieval_stats_buffer:dataset_query"
+    FLUSH_LOCK_KEY = "retrieval_stats_buffer:flush_lock"
+    FLUSH_BATCH_SIZE = 1000
+
+    @classmethod
+    def add_segment_hits(cls, documents: list[Document]) -> None:
+        hit_counts: dict[str, int] = defaultdict(int)
+        for document in documents:
+            if document.metadata is not None:
+                dataset_id = document.metadata.get("dataset_id") or ""
+                hit_counts[f"{dataset_id}:{document.metadata['doc_id']}"] += 1
+        if not hit_counts:
+            return
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for field, count in hit_counts.items():
+            pipeline.hincrby(cls.SEGMENT_HIT_COUNT_KEY, field, count)
+        pipeline.execute()
+
+    @classmethod
+    def add_dataset_queries(cls, dataset_queries: list[dict]) -> None:
+        if not dataset_queries:
+            return
+
+        created_at = datetime.now(UTC).replace(tzinfo=None).isoformat()
+        redis_client.rpush(
+            cls.DATASET_QUERY_KEY,
+            *[json.dumps({**dataset_query, "created_at": created_at}) for dataset_query in dataset_queries],
+        )
+
+    @classmethod
+    def flush(cls) -> tuple[int, int]:
+        """
+        Write the buffered stats to the database.
+
+        :return: number of updated segment keys and number of inserted dataset queries
+        """
+        with redis_client.lock(cls.FLUSH_LOCK_KEY, timeout=600):
+            return cls._flush_segment_hits(), cls._flush_dataset_queries()
+
+    @classmethod
+    def _flush_segment_hits(cls) -> int:
+        flushing_key = cls._take(cls.SEGMENT_HIT_COUNT_KEY)
+        if not flushing_key:
+            return 0
+
+        # group the segments by their hit count, one update statement per distinct count
+        segments_by_hit_count: dict[int, list[tuple[str, str]]] = defaultdict(list)
+        index_node_ids_by_hit_count: dict[int, list[str]] = defaultdict(list)
+        hit_counts = redis_client.hgetall(flushing_key)
+        for field, count in hit_counts.items():
+            dataset_id, _, index_node_id = field.decode().partition(":")
+            if dataset_id:
+                segments_by_hit_count[int(count)].append((dataset_id, index_node_id))
+            else:
+                index_node_ids_by_hit_count[int(count)].append(index_node_id)
+
+        for hit_count, segments in segments_by_hit_count.items():
+            for i in range(0, len(segments), cls.FLUSH_BATCH_SIZE):
+                db.session.execute(
+                    update(DocumentSegment)
+                    .where(
+                        tuple_(DocumentSegment.dataset_id, DocumentSegment.index_node_id).in_(
+                            sorted(segments[i : i + cls.FLUSH_BATCH_SIZE])
+                        )
+                    )
+                    .values(hit_count=DocumentSegment.hit_count + hit_count)
+                    .execution_options(synchronize_session=False)
+                )
+        for hit_count, index_node_ids in index_node_ids_by_hit_count.items():
+            for i in range(0, len(index_node_ids), cls.FLUSH_BATCH_SIZE):
+                db.session.execute(
+                    update(DocumentSegment)
+                    .where(DocumentSegment.index_node_id.in_(sorted(index_node_ids[i : i + cls.FLUSH_BATCH_SIZE])))
+                    .values(hit_count=DocumentSegment.hit_count + hit_count)
+                    .execution_options(synchronize_session=False)
+                )
+        db.session.commit()
+        redis_client.delete(flushing_key)
+
+        return len(hit_counts)
+
+    @classmethod
+    def _flush_dataset_queries(cls) -> int:
+        flushing_key = cls._take(cls.DATASET_QUERY_KEY)
+        if not flushing_key:
+            return 0
+
+        dataset_queries = []
+        for item in redis_client.lrange(flushing_key, 0, -1):
+            dataset_query = json.loads(item)
+            dataset_query["created_at"] = datetime.fromisoformat(dataset_query["created_at"])
+            dataset_queries.append(dataset_query)
+
+        for i in range(0, len(dataset_queries), cls.FLUSH_BATCH_SIZE):
+            db.session.execute(insert(DatasetQuery), dataset_queries[i : i + cls.FLUSH_BATCH_SIZE])
+        db.session.commit()
+        redis_client.delete(flushing_key)
+
+        return len(dataset_queries)
+
+    @staticmethod
+    def _take(key: str) -> Optional[str]:
+        """
+        Move the buffered stats to a flushing key, new stats are buffered under the original key meanwhile.
+        Stats left by a failed flush are flushed again before taking new ones.
+        """
+        flushing_key = f"{key}:flushing"
+        if redis_client.exists(flushing_key):
+            return flushing_key
+        try:
+            redis_client.rename(key, flushing_key)
+        except ResponseError:
+            # nothing is buffered
+            return None
+        return flushing_key
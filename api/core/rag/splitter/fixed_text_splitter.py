@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import re
+from bisect import bisect_left
+from threading import Lock
 from typing import Any, Optional
 
 from core.model_manager import ModelInstance
@@ -14,14 +17,69 @@ from core.rag.splitter.text_splitter import (
     Set,
     TokenTextSplitter,
     Union,
+    _split_text_with_regex,
 )
 
+_local_tokenizers: dict[str, Any] = {}
+_local_tokenizers_lock = Lock()
+
+
+def _get_local_tokenizer(model_name: Optional[str]) -> Any:
+    """
+    Get the local tokenizer used to size the chunks of an embedding model, it is loaded once per model.
+    tiktoken encodings are used for the models known by tiktoken, the GPT-2 tokenizer for the others.
+    """
+    key = model_name or "gpt2"
+    with _local_tokenizers_lock:
+        tokenizer = _local_tokenizers.get(key)
+        if tokenizer is None:
+            if model_name:
+                try:
+                    import tiktoken
+
+                    tokenizer = tiktoken.encoding_for_model(model_name)
+                except Exception:
+                    tokenizer = None
+            if tokenizer is None:
+                tokenizer = GPT2Tokenizer.get_encoder()
+            _local_tokenizers[key] = tokenizer
+
+    return tokenizer
+
+
+def _encode(tokenizer: Any, text: str) -> list[int]:
+    # special tokens are regular text in documents
+    if hasattr(tokenizer, "encode_ordinary"):
+        return tokenizer.encode_ordinary(text)
+    return tokenizer.encode(text)
+
+
+class TokenOffsets:
+    """
+    Start offsets of the tokens of a text, a text is tokenized once and the token count
+    of any of its substrings is looked up from the offsets.
+    """
+
+    def __init__(self, tokenizer: Any, text: str) -> None:
+        _, self._token_starts = tokenizer.decode_with_offsets(_encode(tokenizer, text))
+
+    @staticmethod
+    def supports(tokenizer: Any) -> bool:
+        return hasattr(tokenizer, "decode_with_offsets")
+
+    def count(self, start: int, end: int) -> int:
+        """Count the tokens starting in text[start:end]."""
+        return bisect_left(self._token_starts, end) - bisect_left(self._token_starts, start)
+
 
 class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
     """
-    This class is used to implement from_gpt2_encoder, to prevent using of tiktoken
+    Recursive character splitter sizing the chunks with a local tokenizer instead of the model provider,
+    the tiktoken encoding of the embedding model when tiktoken knows it, the GPT-2 tokenizer otherwise.
     """
 
+    _tokenizer: Any = None
+
     @classmethod
     def from_encoder(
         cls: type[TS],
@@ -30,14 +88,13 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
         disallowed_special: Union[Literal["all"], Collection[str]] = "all",  # noqa: UP037
         **kwargs: Any,
     ):
+        tokenizer = _get_local_tokenizer(embedding_model_instance.model if embedding_model_instance else None)
+
         def _token_encoder(text: str) -> int:
             if not text:
                 return 0
 
-            if embedding_model_instance:
-                return embedding_model_instance.get_text_embedding_num_tokens(texts=[text])
-            else:
-                return GPT2Tokenizer.get_num_tokens(text)
+            return len(_encode(tokenizer, text))
 
         if issubclass(cls, TokenTextSplitter):
             extra_kwargs = {
@@ -47,7 +104,79 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
             }
             kwargs = {**kwargs, **extra_kwargs}
 
-        return cls(length_function=_token_encoder, **kwargs)
+        text_splitter = cls(length_function=_token_encoder, **kwargs)
+        if isinstance(text_splitter, EnhanceRecursiveCharacterTextSplitter) and TokenOffsets.supports(tokenizer):
+            text_splitter._tokenizer = tokenizer
+        return text_splitter
+
+    def split_text(self, text: str) -> list[str]:
+        return self._split_text(text, self._separators, self._get_token_offsets(text))
+
+    def _split_text(
+        self, text: str, separators: list[str], token_offsets: Optional[TokenOffsets] = None, offset: int = 0
+    ) -> list[str]:
+        final_chunks = []
+        separator = separators[-1]
+        new_separators = []
+
+        for i, _s in enumerate(separators):
+            if _s == "":
+                separator = _s
+                break
+            if re.search(_s, text):
+                separator = _s
+                new_separators = separators[i + 1 :]
+                break
+
+        splits = _split_text_with_regex(text, separator, self._keep_separator)
+        _good_splits = []
+        _good_splits_lengths = []  # cache the lengths of the splits
+        _separator = "" if self._keep_separator else separator
+
+        for s, s_start, s_len in self._measure_splits(text, splits, token_offsets, offset):
+            if s_len < self._chunk_size:
+                _good_splits.append(s)
+                _good_splits_lengths.append(s_len)
+            else:
+                if _good_splits:
+                    merged_text = self._merge_splits(_good_splits, _separator, _good_splits_lengths)
+                    final_chunks.extend(merged_text)
+                    _good_splits = []
+                    _good_splits_lengths = []
+                if not new_separators:
+                    final_chunks.append(s)
+                else:
+                    other_info = self._split_text(s, new_separators, token_offsets, s_start)
+                    final_chunks.extend(other_info)
+
+        if _good_splits:
+            merged_text = self._merge_splits(_good_splits, _separator, _good_splits_lengths)
+            final_chunks.extend(merged_text)
+
+        return final_chunks
+
+    def _get_token_offsets(self, text: str) -> Optional[TokenOffsets]:
+        if self._tokenizer is None or not text:
+            return None
+        return TokenOffsets(self._tokenizer, text)
+
+    def _measure_splits(
+        self, text: str, splits: list[str], token_offsets: Optional[TokenOffsets], offset: int
+    ) -> list[tuple[str, int, int]]:
+        """
+        Get the start offset in the document and the length of the splits of text,
+        text starts at offset of the document the token offsets belong to.
+        """
+        measured_splits = []
+        cursor = 0
+        for s in splits:
+            start = text.find(s, cursor)
+            if token_offsets is None or start < 0:
+                measured_splits.append((s, offset, self._length_function(s)))
+                continue
+            cursor = start + len(s)
+            measured_splits.append((s, offset + start, token_offsets.count(offset + start, offset + cursor)))
+        return measured_splits
 
 
 class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter):
@@ -64,16 +193,19 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
         else:
             chunks = [text]
 
+        token_offsets = self._get_token_offsets(text)
         final_chunks = []
-        for chunk in chunks:
-            if self._length_function(chunk) > self._chunk_size:
-                final_chunks.extend(self.recursive_split_text(chunk))
+        for chunk, chunk_start, chunk_len in self._measure_splits(text, chunks, token_offsets, 0):
+            if chunk_len > self._chunk_size:
+                final_chunks.extend(self.recursive_split_text(chunk, token_offsets, chunk_start))
             else:
                 final_chunks.append(chunk)
 
         return final_chunks
 
-    def recursive_split_text(self, text: str) -> list[str]:
+    def recursive_split_text(
+        self, text: str, token_offsets: Optional[TokenOffsets] = None, offset: int = 0
+    ) -> list[str]:
         """Split incoming text and return chunks."""
         final_chunks = []
         # Get appropriate separator to use
@@ -93,8 +225,7 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
         # Now go merging things, recursively splitting longer texts.
         _good_splits = []
         _good_splits_lengths = []  # cache the lengths of the splits
-        for s in splits:
-            s_len = self._length_function(s)
+        for s, s_start, s_len in self._measure_splits(text, splits, token_offsets, offset):
             if s_len < self._chunk_size:
                 _good_splits.append(s)
                 _good_splits_lengths.append(s_len)
@@ -104,7 +235,7 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
                     final_chunks.extend(merged_text)
                     _good_splits = []
                     _good_splits_lengths = []
-                other_info = self.recursive_split_text(s)
+                other_info = self.recursive_split_text(s, token_offsets, s_start)
                 final_chunks.extend(other_info)
         if _good_splits:
             merged_text = self._merge_splits(_good_splits, separator, _good_splits_lengths)
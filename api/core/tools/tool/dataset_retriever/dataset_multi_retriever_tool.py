@@ -1,20 +1,26 @@
-import threading
-from typing import Any
+import logging
+from functools import partial
+from typing import Any, Optional
 
 from flask import Flask, current_app
 from pydantic import BaseModel, Field
 
+from configs import dify_config
 from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCallbackHandler
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.retrieval_context import RetrievalContext
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.models.document import Document as RagDocument
 from core.rag.rerank.rerank_model import RerankModelRunner
+from core.rag.retrieval.retrieval_executor import dataset_retrieval_executor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from core.tools.tool.dataset_retriever.dataset_retriever_base_tool import DatasetRetrieverBaseTool
 from extensions.ext_database import db
 from models.dataset import Dataset, Document, DocumentSegment
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model: dict[str, Any] = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -45,23 +51,33 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
         )
 
     def _run(self, query: str) -> str:
-        threads = []
         all_documents: list[RagDocument] = []
-        for dataset_id in self.dataset_ids:
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "all_documents": all_documents,
-                    "hit_callbacks": self.hit_callbacks,
-                },
+        # datasets sharing an embedding model embed the query once
+        retrieval_context = RetrievalContext()
+        branches = {
+            dataset_id: partial(
+                self._retriever,
+                flask_app=current_app._get_current_object(),  # type: ignore
+                dataset_id=dataset_id,
+                query=query,
+                hit_callbacks=self.hit_callbacks,
+                retrieval_context=retrieval_context,
             )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+            for dataset_id in self.dataset_ids
+        }
+        for branch_result in dataset_retrieval_executor.run(
+            branches, timeout=dify_config.DATASET_RETRIEVAL_BRANCH_TIMEOUT * 2
+        ):
+            if branch_result.timed_out:
+                logger.warning(f"Retrieval of dataset {branch_result.name} timed out, its results are dropped")
+            elif branch_result.rejected:
+                logger.warning(
+                    f"Retrieval of dataset {branch_result.name} rejected, it is still running for earlier requests"
+                )
+            elif branch_result.error is not None:
+                logger.error(f"Retrieval of dataset {branch_result.name} failed", exc_info=branch_result.error)
+            elif branch_result.result:
+                all_documents.extend(branch_result.result)
         # do rerank for searched documents
         model_manager = ModelManager()
         rerank_model_instance = model_manager.get_model_instance(
@@ -148,16 +164,20 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
         flask_app: Flask,
         dataset_id: str,
         query: str,
-        all_documents: list,
         hit_callbacks: list[DatasetIndexToolCallbackHandler],
-    ):
+        retrieval_context: Optional[RetrievalContext] = None,
+    ) -> list[RagDocument]:
+        all_documents: list[RagDocument] = []
         with flask_app.app_context():
             dataset = (
                 db.session.query(Dataset).filter(Dataset.tenant_id == self.tenant_id, Dataset.id == dataset_id).first()
             )
 
             if not dataset:
-                return []
+                return all_documents
+
+            retrieval_context = retrieval_context or RetrievalContext()
+            retrieval_context.add_dataset(dataset)
 
             for hit_callback in hit_callbacks:
                 hit_callback.on_query(query, dataset.id)
@@ -172,6 +192,7 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                     dataset_id=dataset.id,
                     query=query,
                     top_k=retrieval_model.get("top_k") or 2,
+                    retrieval_context=retrieval_context,
                 )
                 if documents:
                     all_documents.extend(documents)
@@ -191,6 +212,9 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                         else None,
                         reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                         weights=retrieval_model.get("weights", None),
+                        retrieval_context=retrieval_context,
                     )
 
                     all_documents.extend(documents)
+
+        return all_documents
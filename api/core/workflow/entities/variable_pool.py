@@ -1,9 +1,9 @@
 import re
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
-from typing import Any, Union
+from typing import Any, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from core.file import File, FileAttribute, file_manager
 from core.variables import Segment, SegmentGroup, Variable
@@ -43,6 +43,8 @@ class VariablePool(BaseModel):
         description="Conversation variables.",
         default_factory=list,
     )
+    # Parent pool of a child pool created by `create_child`, variables not written in the child are read from it.
+    _parent: Optional["VariablePool"] = PrivateAttr(default=None)
 
     def __init__(
         self,
@@ -104,7 +106,7 @@ class VariablePool(BaseModel):
             variable = variable_factory.segment_to_variable(segment=segment, selector=selector)
 
         hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]][hash_key] = variable
+        self._get_writable_node_variables(selector[0])[hash_key] = variable
 
     def get(self, selector: Sequence[str], /) -> Segment | None:
         """
@@ -123,7 +125,7 @@ class VariablePool(BaseModel):
             return None
 
         hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        value = self._get_node_variables(selector[0]).get(hash_key)
 
         if value is None:
             selector, attr = selector[:-1], selector[-1]
@@ -155,7 +157,42 @@ class VariablePool(BaseModel):
             self.variable_dictionary[selector[0]] = {}
             return
         hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]].pop(hash_key, None)
+        self._get_writable_node_variables(selector[0]).pop(hash_key, None)
+
+    def create_child(self) -> "VariablePool":
+        """
+        Create a copy-on-write child of the variable pool.
+
+        The child reads variables through to this pool and only stores its own writes, so
+        creating it does not copy any variable. This pool is never changed by the child, the
+        first write to the variables of a node copies the variable mapping of that node.
+
+        Returns:
+            VariablePool: The child variable pool.
+        """
+        child = VariablePool.model_construct(
+            variable_dictionary=defaultdict(dict),
+            user_inputs=self.user_inputs,
+            system_variables=self.system_variables,
+            environment_variables=self.environment_variables,
+            conversation_variables=self.conversation_variables,
+        )
+        child._parent = self
+        return child
+
+    def _get_node_variables(self, node_id: str, /) -> Mapping[int, Segment]:
+        pool: Optional[VariablePool] = self
+        while pool is not None:
+            node_variables = pool.variable_dictionary.get(node_id)
+            if node_variables is not None:
+                return node_variables
+            pool = pool._parent
+        return {}
+
+    def _get_writable_node_variables(self, node_id: str, /) -> dict[int, Segment]:
+        if node_id not in self.variable_dictionary and self._parent is not None:
+            self.variable_dictionary[node_id] = dict(self._parent._get_node_variables(node_id))
+        return self.variable_dictionary[node_id]
 
     def convert_template(self, template: str, /):
         parts = VARIABLE_PATTERN.split(template)
@@ -1,18 +1,21 @@
 import uuid
 from collections import defaultdict
 from collections.abc import Mapping
-from typing import Any, Optional, cast
+from typing import Any, Optional, TypeVar, cast
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from configs import dify_config
 from core.workflow.graph_engine.entities.run_condition import RunCondition
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.answer.answer_stream_generate_router import AnswerStreamGeneratorRouter
 from core.workflow.nodes.answer.entities import AnswerStreamGenerateRoute
+from core.workflow.nodes.base.entities import BaseNodeData
 from core.workflow.nodes.end.end_stream_generate_router import EndStreamGeneratorRouter
 from core.workflow.nodes.end.entities import EndStreamParam
 
+NodeDataT = TypeVar("NodeDataT", bound=BaseNodeData)
+
 
 class GraphEdge(BaseModel):
     source_node_id: str = Field(..., description="source node id")
@@ -36,7 +39,7 @@ class Graph(BaseModel):
     root_node_id: str = Field(..., description="root node id of the graph")
     node_ids: list[str] = Field(default_factory=list, description="graph node ids")
     node_id_config_mapping: dict[str, dict] = Field(
-        default_factory=list, description="node configs mapping (node id: node config)"
+        default_factory=dict, description="node configs mapping (node id: node config)"
     )
     edge_mapping: dict[str, list[GraphEdge]] = Field(
         default_factory=dict, description="graph edge mapping (source node id: edges)"
@@ -53,6 +56,9 @@ class Graph(BaseModel):
     answer_stream_generate_routes: AnswerStreamGenerateRoute = Field(..., description="answer stream generate routes")
     end_stream_param: EndStreamParam = Field(..., description="end stream param")
 
+    # validated node data (node id: node data), shared by the node instances of the graph
+    _node_data_mapping: dict[str, BaseNodeData] = PrivateAttr(default_factory=dict)
+
     @classmethod
     def init(cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> "Graph":
         """
@@ -229,6 +235,22 @@ class Graph(BaseModel):
 
         self.edge_mapping[source_node_id].append(graph_edge)
 
+    def get_node_data(self, node_id: str, node_data_cls: type[NodeDataT]) -> NodeDataT:
+        """
+        Get the node data of a node, validated once per graph instead of once per node instance.
+        The node data is shared by the runs of the graph and must not be modified.
+
+        :param node_id: node id
+        :param node_data_cls: node data class of the node
+        :return: node data
+        """
+        node_data = self._node_data_mapping.get(node_id)
+        if not isinstance(node_data, node_data_cls):
+            node_data = node_data_cls.model_validate(self.node_id_config_mapping[node_id].get("data", {}))
+            self._node_data_mapping[node_id] = node_data
+
+        return node_data
+
     def get_leaf_node_ids(self) -> list[str]:
         """
         Get leaf node ids of the graph
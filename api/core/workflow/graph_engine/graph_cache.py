@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from configs import dify_config
+from core.workflow.graph_engine.entities.graph import Graph
+
+
+class _CompiledGraph:
+    def __init__(self, graph_config: Mapping[str, Any]) -> None:
+        self.graph_config = graph_config
+        # root node id (None for the start node) to graph, iterations compile their sub graphs on first run
+        self.graphs: dict[Optional[str], Graph] = {}
+
+
+class GraphCache:
+    """
+    Process-wide LRU cache of the parsed graph configs and compiled graphs of workflows, keyed by the hash
+    of the graph, so a workflow version is parsed and compiled once per process instead of once per run.
+
+    The cached graph configs and graphs are shared by concurrent runs and must not be modified.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._compiled_graphs: OrderedDict[str, _CompiledGraph] = OrderedDict()
+        # id of the cached graph configs, the cache holds them so their ids are not reused while cached
+        self._graph_config_keys: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def get_graph_config(self, graph: Optional[str]) -> Mapping[str, Any]:
+        """
+        Get the parsed graph config of a workflow graph
+        :param graph: graph json of the workflow
+        :return: graph config, shared by the runs of the workflow
+        """
+        if not graph:
+            return {}
+        if not self._max_size:
+            return json.loads(graph)
+
+        key = hashlib.sha256(graph.encode()).hexdigest()
+        with self._lock:
+            compiled_graph = self._compiled_graphs.get(key)
+            if compiled_graph is not None:
+                self._compiled_graphs.move_to_end(key)
+                return compiled_graph.graph_config
+
+        graph_config = json.loads(graph)
+        with self._lock:
+            compiled_graph = self._compiled_graphs.get(key)
+            if compiled_graph is None:
+                compiled_graph = _CompiledGraph(graph_config)
+                self._compiled_graphs[key] = compiled_graph
+                self._graph_config_keys[id(graph_config)] = key
+                while len(self._compiled_graphs) > self._max_size:
+                    _, evicted = self._compiled_graphs.popitem(last=False)
+                    self._graph_config_keys.pop(id(evicted.graph_config), None)
+            return compiled_graph.graph_config
+
+    def get_graph(self, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> Graph:
+        """
+        Get the compiled graph of a graph config, graph configs not got from the cache are compiled on each call
+        :param graph_config: graph config
+        :param root_node_id: root node id
+        :return: graph
+        """
+        with self._lock:
+            key = self._graph_config_keys.get(id(graph_config))
+            compiled_graph = self._compiled_graphs.get(key) if key else None
+            if compiled_graph is None or compiled_graph.graph_config is not graph_config:
+                compiled_graph = None
+            elif root_node_id in compiled_graph.graphs:
+                return compiled_graph.graphs[root_node_id]
+
+        graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        if compiled_graph is None:
+            return graph
+
+        with self._lock:
+            return compiled_graph.graphs.setdefault(root_node_id, graph)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._compiled_graphs.clear()
+            self._graph_config_keys.clear()
+
+
+graph_cache = GraphCache(max_size=dify_config.WORKFLOW_GRAPH_CACHE_SIZE)
@@ -1,11 +1,13 @@
 import logging
 import queue
+import threading
 import time
 import uuid
-from collections.abc import Generator, Mapping
-from concurrent.futures import ThreadPoolExecutor, wait
-from copy import copy, deepcopy
+from collections.abc import Callable, Generator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
 from datetime import UTC, datetime
+from functools import partial
 from typing import Any, Optional, cast
 
 from flask import Flask, current_app
@@ -81,6 +83,96 @@ class GraphEngineThreadPool(ThreadPoolExecutor):
             raise ValueError(f"Max submit count {self.max_submit_count} of workflow thread pool reached.")
 
 
+class _ParallelJoin:
+    """
+    Join of the branches of a parallel started in a parallel branch.
+
+    The branch starting the parallel does not wait for its branches in a thread of the pool,
+    the last branch to succeed resumes it from the end node of the parallel and the first
+    branch to fail fails it.
+    """
+
+    def __init__(self, branch_count: int, on_succeeded: Callable[[], None], on_failed: Callable[[str], None]) -> None:
+        self._pending_count = branch_count
+        self._on_succeeded = on_succeeded
+        self._on_failed = on_failed
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def branch_succeeded(self) -> None:
+        with self._lock:
+            self._pending_count -= 1
+            if self._pending_count > 0 or self._failed:
+                return
+
+        self._on_succeeded()
+
+    def branch_failed(self, error: str) -> None:
+        with self._lock:
+            if self._failed:
+                return
+            self._failed = True
+
+        self._on_failed(error)
+
+    def cancel(self) -> None:
+        """
+        Cancel the join when the branch starting the parallel failed to start it
+        """
+        with self._lock:
+            self._failed = True
+
+
+class _ParallelBranch:
+    """
+    Parallel branch run in the thread pool, the events of the branches of nested parallels are
+    put in the queue of the outermost parallel.
+    """
+
+    def __init__(
+        self,
+        q: queue.Queue,
+        parallel_id: str,
+        parallel_start_node_id: str,
+        parent_parallel_id: Optional[str] = None,
+        parent_parallel_start_node_id: Optional[str] = None,
+        join: Optional[_ParallelJoin] = None,
+    ) -> None:
+        self.q = q
+        self.parallel_id = parallel_id
+        self.parallel_start_node_id = parallel_start_node_id
+        self.parent_parallel_id = parent_parallel_id
+        self.parent_parallel_start_node_id = parent_parallel_start_node_id
+        self.join = join
+        # set when the branch started a parallel, the branch is resumed by the join of the parallel
+        self.suspended = False
+
+    def succeed(self) -> None:
+        self.q.put(
+            ParallelBranchRunSucceededEvent(
+                parallel_id=self.parallel_id,
+                parallel_start_node_id=self.parallel_start_node_id,
+                parent_parallel_id=self.parent_parallel_id,
+                parent_parallel_start_node_id=self.parent_parallel_start_node_id,
+            )
+        )
+        if self.join:
+            self.join.branch_succeeded()
+
+    def fail(self, error: str) -> None:
+        self.q.put(
+            ParallelBranchRunFailedEvent(
+                parallel_id=self.parallel_id,
+                parallel_start_node_id=self.parallel_start_node_id,
+                parent_parallel_id=self.parent_parallel_id,
+                parent_parallel_start_node_id=self.parent_parallel_start_node_id,
+                error=error,
+            )
+        )
+        if self.join:
+            self.join.branch_failed(error)
+
+
 class GraphEngine:
     workflow_thread_pool_mapping: dict[str, GraphEngineThreadPool] = {}
 
@@ -223,13 +315,14 @@ class GraphEngine:
         parent_parallel_id: Optional[str] = None,
         parent_parallel_start_node_id: Optional[str] = None,
         handle_exceptions: list[str] = [],
+        branch: Optional[_ParallelBranch] = None,
+        previous_route_node_state: Optional[RouteNodeState] = None,
     ) -> Generator[GraphEngineEvent, None, None]:
         parallel_start_node_id = None
         if in_parallel_id:
-            parallel_start_node_id = start_node_id
+            parallel_start_node_id = branch.parallel_start_node_id if branch else start_node_id
 
         next_node_id = start_node_id
-        previous_route_node_state: Optional[RouteNodeState] = None
         while True:
             # max steps reached
             if self.graph_runtime_state.node_run_steps > self.max_execution_steps:
@@ -390,6 +483,8 @@ class GraphEngine:
                                 in_parallel_id=in_parallel_id,
                                 parallel_start_node_id=parallel_start_node_id,
                                 handle_exceptions=handle_exceptions,
+                                branch=branch,
+                                previous_route_node_state=previous_route_node_state,
                             )
 
                             for parallel_result in parallel_generator:
@@ -398,6 +493,9 @@ class GraphEngine:
                                 else:
                                     yield parallel_result
 
+                            if branch and branch.suspended:
+                                return
+
                         break
 
                     if not final_node_id:
@@ -416,6 +514,8 @@ class GraphEngine:
                         in_parallel_id=in_parallel_id,
                         parallel_start_node_id=parallel_start_node_id,
                         handle_exceptions=handle_exceptions,
+                        branch=branch,
+                        previous_route_node_state=previous_route_node_state,
                     )
 
                     for generated_item in parallel_generator:
@@ -424,6 +524,9 @@ class GraphEngine:
                         else:
                             yield generated_item
 
+                    if branch and branch.suspended:
+                        return
+
                     if not final_node_id:
                         break
 
@@ -438,6 +541,8 @@ class GraphEngine:
         in_parallel_id: Optional[str] = None,
         parallel_start_node_id: Optional[str] = None,
         handle_exceptions: list[str] = [],
+        branch: Optional[_ParallelBranch] = None,
+        previous_route_node_state: Optional[RouteNodeState] = None,
     ) -> Generator[GraphEngineEvent | str, None, None]:
         # if nodes has no run conditions, parallel run all nodes
         parallel_id = self.graph.node_parallel_mapping.get(edge_mappings[0].target_node_id)
@@ -458,65 +563,115 @@ class GraphEngine:
         if not parallel:
             raise GraphRunFailedError(f"Parallel {parallel_id} not found.")
 
-        # run parallel nodes, run in new thread and use queue to get results
-        q: queue.Queue = queue.Queue()
-
-        # Create a list to store the threads
-        futures = []
+        branch_start_node_ids = [
+            edge.target_node_id
+            for edge in edge_mappings
+            if self.graph.node_parallel_mapping.get(edge.target_node_id, "") == parallel_id
+        ]
+        if not branch_start_node_ids:
+            if parallel.end_to_node_id:
+                yield parallel.end_to_node_id
+            return
 
-        # new thread
-        for edge in edge_mappings:
-            if (
-                edge.target_node_id not in self.graph.node_parallel_mapping
-                or self.graph.node_parallel_mapping.get(edge.target_node_id, "") != parallel_id
-            ):
-                continue
-
-            future = self.thread_pool.submit(
-                self._run_parallel_node,
-                **{
-                    "flask_app": current_app._get_current_object(),  # type: ignore[attr-defined]
-                    "q": q,
-                    "parallel_id": parallel_id,
-                    "parallel_start_node_id": edge.target_node_id,
-                    "parent_parallel_id": in_parallel_id,
-                    "parent_parallel_start_node_id": parallel_start_node_id,
-                    "handle_exceptions": handle_exceptions,
-                },
+        flask_app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+        if branch:
+            # parallel nested in a parallel branch, the branches put their events in the queue of the outermost
+            # parallel and the thread of this branch is released instead of waiting for them
+            join = _ParallelJoin(
+                branch_count=len(branch_start_node_ids),
+                on_succeeded=partial(
+                    self._resume_parallel_branch,
+                    flask_app=flask_app,
+                    branch=branch,
+                    final_node_id=parallel.end_to_node_id,
+                    previous_route_node_state=previous_route_node_state,
+                    handle_exceptions=handle_exceptions,
+                ),
+                on_failed=branch.fail,
             )
-
-            future.add_done_callback(self.thread_pool.task_done_callback)
-
-            futures.append(future)
-
-        succeeded_count = 0
-        while True:
             try:
-                event = q.get(timeout=1)
-                if event is None:
-                    break
+                for branch_start_node_id in branch_start_node_ids:
+                    self._submit_parallel_node(
+                        flask_app=flask_app,
+                        q=branch.q,
+                        parallel_id=parallel_id,
+                        parallel_start_node_id=branch_start_node_id,
+                        parent_parallel_id=in_parallel_id,
+                        parent_parallel_start_node_id=parallel_start_node_id,
+                        handle_exceptions=handle_exceptions,
+                        join=join,
+                    )
+            except Exception:
+                join.cancel()
+                raise
 
-                yield event
-                if event.parallel_id == parallel_id:
-                    if isinstance(event, ParallelBranchRunSucceededEvent):
-                        succeeded_count += 1
-                        if succeeded_count == len(futures):
-                            q.put(None)
+            branch.suspended = True
+            return
 
-                        continue
-                    elif isinstance(event, ParallelBranchRunFailedEvent):
-                        raise GraphRunFailedError(event.error)
-            except queue.Empty:
-                continue
+        # run parallel nodes, run in new thread and use queue to get results
+        q: queue.Queue = queue.Queue()
 
-        # wait all threads
-        wait(futures)
+        for branch_start_node_id in branch_start_node_ids:
+            self._submit_parallel_node(
+                flask_app=flask_app,
+                q=q,
+                parallel_id=parallel_id,
+                parallel_start_node_id=branch_start_node_id,
+                parent_parallel_id=in_parallel_id,
+                parent_parallel_start_node_id=parallel_start_node_id,
+                handle_exceptions=handle_exceptions,
+            )
+
+        # a branch succeeds once the branches of the parallels nested in it have succeeded
+        succeeded_count = 0
+        while succeeded_count < len(branch_start_node_ids):
+            event = q.get()
+            yield event
+            if event.parallel_id == parallel_id:
+                if isinstance(event, ParallelBranchRunSucceededEvent):
+                    succeeded_count += 1
+                elif isinstance(event, ParallelBranchRunFailedEvent):
+                    raise GraphRunFailedError(event.error)
 
         # get final node id
         final_node_id = parallel.end_to_node_id
         if final_node_id:
             yield final_node_id
 
+    def _submit_parallel_node(self, **kwargs: Any) -> None:
+        future = self.thread_pool.submit(self._run_parallel_node, **kwargs)
+        future.add_done_callback(self.thread_pool.task_done_callback)
+
+    def _resume_parallel_branch(
+        self,
+        flask_app: Flask,
+        branch: _ParallelBranch,
+        final_node_id: Optional[str],
+        previous_route_node_state: Optional[RouteNodeState],
+        handle_exceptions: list[str],
+    ) -> None:
+        """
+        Resume a parallel branch from the end node of the parallel it started, once the branches of the parallel
+        have succeeded. Runs in the thread of the last branch to succeed.
+        """
+        if not final_node_id or self.graph.node_parallel_mapping.get(final_node_id, "") != branch.parallel_id:
+            branch.succeed()
+            return
+
+        self._run_parallel_node(
+            flask_app=flask_app,
+            q=branch.q,
+            parallel_id=branch.parallel_id,
+            parallel_start_node_id=branch.parallel_start_node_id,
+            parent_parallel_id=branch.parent_parallel_id,
+            parent_parallel_start_node_id=branch.parent_parallel_start_node_id,
+            handle_exceptions=handle_exceptions,
+            join=branch.join,
+            start_node_id=final_node_id,
+            previous_route_node_state=previous_route_node_state,
+        )
+
     def _run_parallel_node(
         self,
         flask_app: Flask,
@@ -526,66 +681,62 @@ class GraphEngine:
         parent_parallel_id: Optional[str] = None,
         parent_parallel_start_node_id: Optional[str] = None,
         handle_exceptions: list[str] = [],
+        join: Optional[_ParallelJoin] = None,
+        start_node_id: Optional[str] = None,
+        previous_route_node_state: Optional[RouteNodeState] = None,
     ) -> None:
         """
-        Run parallel nodes
+        Run parallel nodes, from the start node of the branch or from the node the branch is resumed at
         """
+        branch = _ParallelBranch(
+            q=q,
+            parallel_id=parallel_id,
+            parallel_start_node_id=parallel_start_node_id,
+            parent_parallel_id=parent_parallel_id,
+            parent_parallel_start_node_id=parent_parallel_start_node_id,
+            join=join,
+        )
+        error: Optional[str] = None
         with flask_app.app_context():
             try:
-                q.put(
-                    ParallelBranchRunStartedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
+                if not start_node_id:
+                    q.put(
+                        ParallelBranchRunStartedEvent(
+                            parallel_id=parallel_id,
+                            parallel_start_node_id=parallel_start_node_id,
+                            parent_parallel_id=parent_parallel_id,
+                            parent_parallel_start_node_id=parent_parallel_start_node_id,
+                        )
                     )
-                )
 
                 # run node
                 generator = self._run(
-                    start_node_id=parallel_start_node_id,
+                    start_node_id=start_node_id or parallel_start_node_id,
                     in_parallel_id=parallel_id,
                     parent_parallel_id=parent_parallel_id,
                     parent_parallel_start_node_id=parent_parallel_start_node_id,
                     handle_exceptions=handle_exceptions,
+                    branch=branch,
+                    previous_route_node_state=previous_route_node_state,
                 )
 
                 for item in generator:
                     q.put(item)
-
-                # trigger graph run success event
-                q.put(
-                    ParallelBranchRunSucceededEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                    )
-                )
             except GraphRunFailedError as e:
-                q.put(
-                    ParallelBranchRunFailedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                        error=e.error,
-                    )
-                )
+                error = e.error
             except Exception as e:
                 logger.exception("Unknown Error when generating in parallel")
-                q.put(
-                    ParallelBranchRunFailedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                        error=str(e),
-                    )
-                )
+                error = str(e)
             finally:
                 db.session.remove()
 
+        # outside of the app context, succeeding may resume the parent branch in this thread
+        if error is not None:
+            branch.fail(error)
+        elif not branch.suspended:
+            # trigger graph run success event
+            branch.succeed()
+
     def _run_node(
         self,
         node_instance: BaseNode[BaseNodeData],
@@ -848,11 +999,11 @@ class GraphEngine:
     def create_copy(self):
         """
         create a graph engine copy
-        :return: with a new variable pool instance of graph engine
+        :return: with a copy-on-write child of the variable pool of graph engine
         """
         new_instance = copy(self)
         new_instance.graph_runtime_state = copy(self.graph_runtime_state)
-        new_instance.graph_runtime_state.variable_pool = deepcopy(self.graph_runtime_state.variable_pool)
+        new_instance.graph_runtime_state.variable_pool = self.graph_runtime_state.variable_pool.create_child()
         return new_instance
 
     def _handle_continue_on_error(
@@ -56,7 +56,11 @@ class BaseNode(Generic[GenericNodeData]):
 
         self.node_id = node_id
 
-        node_data = self._node_data_cls.model_validate(config.get("data", {}))
+        if graph.node_id_config_mapping.get(node_id) is config:
+            # node data of the nodes of a graph is validated once per graph
+            node_data = graph.get_node_data(node_id, self._node_data_cls)
+        else:
+            node_data = self._node_data_cls.model_validate(config.get("data", {}))
         self.node_data = cast(GenericNodeData, node_data)
 
     @abstractmethod
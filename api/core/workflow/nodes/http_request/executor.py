@@ -74,17 +74,19 @@ class Executor:
         variable_pool: VariablePool,
         max_retries: int = dify_config.SSRF_DEFAULT_MAX_RETRIES,
     ):
+        self.auth = node_data.authorization
         # If authorization API key is present, convert the API key using the variable pool
-        if node_data.authorization.type == "api-key":
-            if node_data.authorization.config is None:
+        # on a copy of the authorization, the node data is shared by the runs of the graph
+        if self.auth.type == "api-key":
+            if self.auth.config is None:
                 raise AuthorizationConfigError("authorization config is required")
-            node_data.authorization.config.api_key = variable_pool.convert_template(
-                node_data.authorization.config.api_key
-            ).text
+            api_key = variable_pool.convert_template(self.auth.config.api_key).text
+            self.auth = self.auth.model_copy(
+                update={"config": self.auth.config.model_copy(update={"api_key": api_key})}
+            )
 
         self.url: str = node_data.url
         self.method = node_data.method
-        self.auth = node_data.authorization
         self.timeout = timeout
         self.params = []
         self.headers = {}
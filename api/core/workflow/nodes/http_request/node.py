@@ -114,10 +114,14 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
         if timeout is None:
             return HTTP_REQUEST_DEFAULT_TIMEOUT
 
-        timeout.connect = timeout.connect or HTTP_REQUEST_DEFAULT_TIMEOUT.connect
-        timeout.read = timeout.read or HTTP_REQUEST_DEFAULT_TIMEOUT.read
-        timeout.write = timeout.write or HTTP_REQUEST_DEFAULT_TIMEOUT.write
-        return timeout
+        # on a copy, the node data is shared by the runs of the graph
+        return timeout.model_copy(
+            update={
+                "connect": timeout.connect or HTTP_REQUEST_DEFAULT_TIMEOUT.connect,
+                "read": timeout.read or HTTP_REQUEST_DEFAULT_TIMEOUT.read,
+                "write": timeout.write or HTTP_REQUEST_DEFAULT_TIMEOUT.write,
+            }
+        )
 
     @classmethod
     def _extract_variable_selector_to_variable_mapping(
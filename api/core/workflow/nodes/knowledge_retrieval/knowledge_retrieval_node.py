@@ -317,11 +317,9 @@ class KnowledgeRetrievalNode(BaseNode[KnowledgeRetrievalNodeData]):
             raise ModelQuotaExceededError(f"Model provider {provider_name} quota exceeded.")
 
         # model config
-        completion_params = node_data.single_retrieval_config.model.completion_params
-        stop = []
-        if "stop" in completion_params:
-            stop = completion_params["stop"]
-            del completion_params["stop"]
+        # on a copy, the node data is shared by the runs of the graph
+        completion_params = dict(node_data.single_retrieval_config.model.completion_params)
+        stop = completion_params.pop("stop", [])
 
         # get model mode
         model_mode = node_data.single_retrieval_config.model.mode
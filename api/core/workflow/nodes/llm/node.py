@@ -94,14 +94,16 @@ class LLMNode(BaseNode[LLMNodeData]):
         process_data = None
 
         try:
-            # init messages template
-            self.node_data.prompt_template = self._transform_chat_messages(self.node_data.prompt_template)
+            # init messages template, on a copy of the node data shared by the runs of the graph
+            node_data = self.node_data.model_copy(
+                update={"prompt_template": self._transform_chat_messages(self.node_data.prompt_template)}
+            )
 
             # fetch variables and fetch values from variable pool
-            inputs = self._fetch_inputs(node_data=self.node_data)
+            inputs = self._fetch_inputs(node_data=node_data)
 
             # fetch jinja2 inputs
-            jinja_inputs = self._fetch_jinja_inputs(node_data=self.node_data)
+            jinja_inputs = self._fetch_jinja_inputs(node_data=node_data)
 
             # merge inputs
             inputs.update(jinja_inputs)
@@ -110,8 +112,8 @@ class LLMNode(BaseNode[LLMNodeData]):
 
             # fetch files
             files = (
-                self._fetch_files(selector=self.node_data.vision.configs.variable_selector)
-                if self.node_data.vision.enabled
+                self._fetch_files(selector=node_data.vision.configs.variable_selector)
+                if node_data.vision.enabled
                 else []
             )
 
@@ -119,7 +121,7 @@ class LLMNode(BaseNode[LLMNodeData]):
                 node_inputs["#files#"] = [file.to_dict() for file in files]
 
             # fetch context value
-            generator = self._fetch_context(node_data=self.node_data)
+            generator = self._fetch_context(node_data=node_data)
             context = None
             for event in generator:
                 if isinstance(event, RunRetrieverResourceEvent):
@@ -130,14 +132,14 @@ class LLMNode(BaseNode[LLMNodeData]):
                 node_inputs["#context#"] = context
 
             # fetch model config
-            model_instance, model_config = self._fetch_model_config(self.node_data.model)
+            model_instance, model_config = self._fetch_model_config(node_data.model)
 
             # fetch memory
-            memory = self._fetch_memory(node_data_memory=self.node_data.memory, model_instance=model_instance)
+            memory = self._fetch_memory(node_data_memory=node_data.memory, model_instance=model_instance)
 
             query = None
-            if self.node_data.memory:
-                query = self.node_data.memory.query_prompt_template
+            if node_data.memory:
+                query = node_data.memory.query_prompt_template
                 if not query and (
                     query_variable := self.graph_runtime_state.variable_pool.get(
                         (SYSTEM_VARIABLE_NODE_ID, SystemVariableKey.QUERY)
@@ -151,12 +153,12 @@ class LLMNode(BaseNode[LLMNodeData]):
                 context=context,
                 memory=memory,
                 model_config=model_config,
-                prompt_template=self.node_data.prompt_template,
-                memory_config=self.node_data.memory,
-                vision_enabled=self.node_data.vision.enabled,
-                vision_detail=self.node_data.vision.configs.detail,
+                prompt_template=node_data.prompt_template,
+                memory_config=node_data.memory,
+                vision_enabled=node_data.vision.enabled,
+                vision_detail=node_data.vision.configs.detail,
                 variable_pool=self.graph_runtime_state.variable_pool,
-                jinja2_variables=self.node_data.prompt_config.jinja2_variables,
+                jinja2_variables=node_data.prompt_config.jinja2_variables,
             )
 
             process_data = {
@@ -170,7 +172,7 @@ class LLMNode(BaseNode[LLMNodeData]):
 
             # handle invoke result
             generator = self._invoke_llm(
-                node_data_model=self.node_data.model,
+                node_data_model=node_data.model,
                 model_instance=model_instance,
                 prompt_messages=prompt_messages,
                 stop=stop,
@@ -237,7 +239,8 @@ class LLMNode(BaseNode[LLMNodeData]):
 
         invoke_result = model_instance.invoke_llm(
             prompt_messages=prompt_messages,
-            model_parameters=node_data_model.completion_params,
+            # stop words are passed apart
+            model_parameters={k: v for k, v in node_data_model.completion_params.items() if k != "stop"},
             stop=stop,
             stream=True,
             user=self.user_id,
@@ -282,15 +285,16 @@ class LLMNode(BaseNode[LLMNodeData]):
     ) -> Sequence[LLMNodeChatModelMessage] | LLMNodeCompletionModelPromptTemplate:
         if isinstance(messages, LLMNodeCompletionModelPromptTemplate):
             if messages.edition_type == "jinja2" and messages.jinja2_text:
-                messages.text = messages.jinja2_text
+                return messages.model_copy(update={"text": messages.jinja2_text})
 
             return messages
 
-        for message in messages:
-            if message.edition_type == "jinja2" and message.jinja2_text:
-                message.text = message.jinja2_text
-
-        return messages
+        return [
+            message.model_copy(update={"text": message.jinja2_text})
+            if message.edition_type == "jinja2" and message.jinja2_text
+            else message
+            for message in messages
+        ]
 
     def _fetch_jinja_inputs(self, node_data: LLMNodeData) -> dict[str, str]:
         variables: dict[str, Any] = {}
@@ -478,11 +482,9 @@ class LLMNode(BaseNode[LLMNodeData]):
             raise QuotaExceededError(f"Model provider {provider_name} quota exceeded.")
 
         # model config
-        completion_params = node_data_model.completion_params
-        stop = []
-        if "stop" in completion_params:
-            stop = completion_params["stop"]
-            del completion_params["stop"]
+        # on a copy, the node data is shared by the runs of the graph
+        completion_params = dict(node_data_model.completion_params)
+        stop = completion_params.pop("stop", [])
 
         # get model mode
         model_mode = node_data_model.mode
@@ -233,7 +233,8 @@ class ParameterExtractorNode(LLMNode):
 
         invoke_result = model_instance.invoke_llm(
             prompt_messages=prompt_messages,
-            model_parameters=node_data_model.completion_params,
+            # stop words are passed apart
+            model_parameters={k: v for k, v in node_data_model.completion_params.items() if k != "stop"},
             tools=tools,
             stop=stop,
             stream=False,
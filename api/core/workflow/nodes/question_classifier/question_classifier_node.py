@@ -54,9 +54,10 @@ class QuestionClassifierNode(LLMNode):
             node_data_memory=node_data.memory,
             model_instance=model_instance,
         )
-        # fetch instruction
-        node_data.instruction = node_data.instruction or ""
-        node_data.instruction = variable_pool.convert_template(node_data.instruction).text
+        # fetch instruction, the node data is shared by the runs of the graph
+        node_data = node_data.model_copy(
+            update={"instruction": variable_pool.convert_template(node_data.instruction or "").text}
+        )
 
         files = (
             self._fetch_files(
@@ -60,7 +60,8 @@ class VariableAssignerNode(BaseNode[VariableAssignerNodeData]):
                 ):
                     raise InputTypeNotSupportedError(input_type=InputType.CONSTANT, operation=item.operation)
 
-                # Get value from variable pool
+                # Get value from variable pool, the node data is shared by the runs of the graph
+                input_value = item.value
                 if (
                     item.input_type == InputType.VARIABLE
                     and item.operation != Operation.CLEAR
@@ -72,31 +73,31 @@ class VariableAssignerNode(BaseNode[VariableAssignerNodeData]):
                     # Skip if value is NoneSegment
                     if value.value_type == SegmentType.NONE:
                         continue
-                    item.value = value.value
+                    input_value = value.value
 
                 # If set string / bytes / bytearray to object, try convert string to object.
                 if (
                     item.operation == Operation.SET
                     and variable.value_type == SegmentType.OBJECT
-                    and isinstance(item.value, str | bytes | bytearray)
+                    and isinstance(input_value, str | bytes | bytearray)
                 ):
                     try:
-                        item.value = json.loads(item.value)
+                        input_value = json.loads(input_value)
                     except json.JSONDecodeError:
-                        raise InvalidInputValueError(value=item.value)
+                        raise InvalidInputValueError(value=input_value)
 
                 # Check if input value is valid
                 if not helpers.is_input_value_valid(
-                    variable_type=variable.value_type, operation=item.operation, value=item.value
+                    variable_type=variable.value_type, operation=item.operation, value=input_value
                 ):
-                    raise InvalidInputValueError(value=item.value)
+                    raise InvalidInputValueError(value=input_value)
 
                 # ==================== Execution Part
 
                 updated_value = self._handle_item(
                     variable=variable,
                     operation=item.operation,
-                    value=item.value,
+                    value=input_value,
                 )
                 variable = variable.model_copy(update={"value": updated_value})
                 self.graph_runtime_state.variable_pool.add(variable.selector, variable)
@@ -7,6 +7,7 @@ def init_app(app: DifyApp):
         convert_to_agent_apps,
         create_tenant,
         fix_app_site_missing,
+        migrate_keyword_index,
         reset_email,
         reset_encrypt_key_pair,
         reset_password,
@@ -24,6 +25,7 @@ def init_app(app: DifyApp):
         create_tenant,
         upgrade_db,
         fix_app_site_missing,
+        migrate_keyword_index,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
@@ -11,7 +11,7 @@ import time
 from json import JSONDecodeError
 from typing import Any, cast
 
-from sqlalchemy import func
+from sqlalchemy import and_, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped
 
@@ -95,8 +95,93 @@ class Dataset(db.Model):  # type: ignore[name-defined]
             .first()
         )
 
+    @property
+    def _loaded_aggregates(self) -> dict[str, Any]:
+        return cast(dict[str, Any], self.__dict__.get("_aggregates", {}))
+
+    @classmethod
+    def load_aggregates(cls, datasets: list["Dataset"]) -> None:
+        """
+        Load the counts, word count, doc form and tags of datasets with one grouped query each,
+        the properties return the loaded values instead of querying them per dataset.
+        """
+        dataset_ids = [dataset.id for dataset in datasets]
+        if not dataset_ids:
+            return
+
+        document_aggregates = {
+            row.dataset_id: row
+            for row in db.session.query(
+                Document.dataset_id,
+                func.count(Document.id).label("document_count"),
+                func.count(Document.id)
+                .filter(Document.indexing_status == "completed", Document.enabled == True, Document.archived == False)
+                .label("available_document_count"),
+                func.sum(Document.word_count).label("word_count"),
+                func.min(Document.doc_form).label("doc_form"),
+            )
+            .filter(Document.dataset_id.in_(dataset_ids))
+            .group_by(Document.dataset_id)
+            .all()
+        }
+        app_counts = dict(
+            db.session.query(AppDatasetJoin.dataset_id, func.count(AppDatasetJoin.id))
+            .filter(AppDatasetJoin.dataset_id.in_(dataset_ids), App.id == AppDatasetJoin.app_id)
+            .group_by(AppDatasetJoin.dataset_id)
+            .all()
+        )
+        tags: dict[str, list[Tag]] = {}
+        for target_id, tag in (
+            db.session.query(TagBinding.target_id, Tag)
+            .join(Tag, Tag.id == TagBinding.tag_id)
+            .filter(
+                TagBinding.target_id.in_(dataset_ids),
+                TagBinding.tenant_id == Tag.tenant_id,
+                Tag.type == "knowledge",
+            )
+            .all()
+        ):
+            tags.setdefault(target_id, []).append(tag)
+
+        for dataset in datasets:
+            document_aggregate = document_aggregates.get(dataset.id)
+            dataset.__dict__["_aggregates"] = {
+                "app_count": app_counts.get(dataset.id, 0),
+                "document_count": document_aggregate.document_count if document_aggregate else 0,
+                "available_document_count": document_aggregate.available_document_count if document_aggregate else 0,
+                "word_count": document_aggregate.word_count if document_aggregate else None,
+                "doc_form": document_aggregate.doc_form if document_aggregate else None,
+                "tags": [tag for tag in tags.get(dataset.id, []) if tag.tenant_id == dataset.tenant_id],
+            }
+
+    @property
+    def available_for_retrieval(self) -> bool:
+        """Whether the dataset has available documents and segments, checked in one query."""
+        available_document_exists = (
+            db.session.query(Document.id)
+            .filter(
+                Document.dataset_id == self.id,
+                Document.indexing_status == "completed",
+                Document.enabled == True,
+                Document.archived == False,
+            )
+            .exists()
+        )
+        available_segment_exists = (
+            db.session.query(DocumentSegment.id)
+            .filter(
+                DocumentSegment.dataset_id == self.id,
+                DocumentSegment.status == "completed",
+                DocumentSegment.enabled == True,
+            )
+            .exists()
+        )
+        return bool(db.session.query(and_(available_document_exists, available_segment_exists)).scalar())
+
     @property
     def app_count(self):
+        if "app_count" in self._loaded_aggregates:
+            return self._loaded_aggregates["app_count"]
         return (
             db.session.query(func.count(AppDatasetJoin.id))
             .filter(AppDatasetJoin.dataset_id == self.id, App.id == AppDatasetJoin.app_id)
@@ -105,10 +190,14 @@ class Dataset(db.Model):  # type: ignore[name-defined]
 
     @property
     def document_count(self):
+        if "document_count" in self._loaded_aggregates:
+            return self._loaded_aggregates["document_count"]
         return db.session.query(func.count(Document.id)).filter(Document.dataset_id == self.id).scalar()
 
     @property
     def available_document_count(self):
+        if "available_document_count" in self._loaded_aggregates:
+            return self._loaded_aggregates["available_document_count"]
         return (
             db.session.query(func.count(Document.id))
             .filter(
@@ -134,6 +223,8 @@ class Dataset(db.Model):  # type: ignore[name-defined]
 
     @property
     def word_count(self):
+        if "word_count" in self._loaded_aggregates:
+            return self._loaded_aggregates["word_count"]
         return (
             Document.query.with_entities(func.coalesce(func.sum(Document.word_count)))
             .filter(Document.dataset_id == self.id)
@@ -142,6 +233,8 @@ class Dataset(db.Model):  # type: ignore[name-defined]
 
     @property
     def doc_form(self):
+        if "doc_form" in self._loaded_aggregates:
+            return self._loaded_aggregates["doc_form"]
         document = db.session.query(Document).filter(Document.dataset_id == self.id).first()
         if document:
             return document.doc_form
@@ -160,6 +253,8 @@ class Dataset(db.Model):  # type: ignore[name-defined]
 
     @property
     def tags(self):
+        if "tags" in self._loaded_aggregates:
+            return self._loaded_aggregates["tags"]
         tags = (
             db.session.query(Tag)
             .join(TagBinding, Tag.id == TagBinding.tag_id)
@@ -384,12 +479,48 @@ class Document(db.Model):  # type: ignore[name-defined]
     def dataset(self):
         return db.session.query(Dataset).filter(Dataset.id == self.dataset_id).one_or_none()
 
+    @property
+    def _loaded_aggregates(self) -> dict[str, Any]:
+        return cast(dict[str, Any], self.__dict__.get("_aggregates", {}))
+
+    @classmethod
+    def load_aggregates(cls, documents: list["Document"]) -> None:
+        """
+        Load the segment counts and hit counts of documents with one grouped query,
+        the properties return the loaded values instead of querying them per document.
+        """
+        document_ids = [document.id for document in documents]
+        if not document_ids:
+            return
+
+        segment_aggregates = {
+            row.document_id: row
+            for row in db.session.query(
+                DocumentSegment.document_id,
+                func.count(DocumentSegment.id).label("segment_count"),
+                func.sum(DocumentSegment.hit_count).label("hit_count"),
+            )
+            .filter(DocumentSegment.document_id.in_(document_ids))
+            .group_by(DocumentSegment.document_id)
+            .all()
+        }
+        for document in documents:
+            segment_aggregate = segment_aggregates.get(document.id)
+            document.__dict__["_aggregates"] = {
+                "segment_count": segment_aggregate.segment_count if segment_aggregate else 0,
+                "hit_count": segment_aggregate.hit_count if segment_aggregate else None,
+            }
+
     @property
     def segment_count(self):
+        if "segment_count" in self._loaded_aggregates:
+            return self._loaded_aggregates["segment_count"]
         return DocumentSegment.query.filter(DocumentSegment.document_id == self.id).count()
 
     @property
     def hit_count(self):
+        if "hit_count" in self._loaded_aggregates:
+            return self._loaded_aggregates["hit_count"]
         return (
             DocumentSegment.query.with_entities(func.coalesce(func.sum(DocumentSegment.hit_count)))
             .filter(DocumentSegment.document_id == self.id)
@@ -749,6 +880,21 @@ class DatasetKeywordTable(db.Model):  # type: ignore[name-defined]
                 return None
 
 
+class DatasetKeywordPosting(db.Model):  # type: ignore[name-defined]
+    __tablename__ = "dataset_keyword_postings"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("id", name="dataset_keyword_posting_pkey"),
+        db.UniqueConstraint("dataset_id", "keyword", "index_node_id", name="dataset_keyword_posting_unique_idx"),
+        db.Index("dataset_keyword_posting_node_idx", "dataset_id", "index_node_id"),
+    )
+
+    id = db.Column(StringUUID, primary_key=True, server_default=db.text("uuid_generate_v4()"))
+    dataset_id = db.Column(StringUUID, nullable=False)
+    keyword = db.Column(db.String(255), nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
 class Embedding(db.Model):  # type: ignore[name-defined]
     __tablename__ = "embeddings"
     __table_args__ = (
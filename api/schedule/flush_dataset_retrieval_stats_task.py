@@ -0,0 +1,26 @@
+import time
+
+import click
+
+import app
+from core.rag.retrieval.retrieval_stats_buffer import RetrievalStatsBuffer
+
+
+@app.celery.task(queue="dataset")
+def flush_dataset_retrieval_stats_task():
+    start_at = time.perf_counter()
+    try:
+        segment_count, dataset_query_count = RetrievalStatsBuffer.flush()
+    except Exception as e:
+        click.echo(click.style(f"Flush dataset retrieval stats failed: {e}", fg="red"))
+        return
+
+    end_at = time.perf_counter()
+    if segment_count or dataset_query_count:
+        click.echo(
+            click.style(
+                f"Flushed hit counts of {segment_count} segments and {dataset_query_count} dataset queries,"
+                f" latency: {end_at - start_at}",
+                fg="green",
+            )
+        )
@@ -37,7 +37,7 @@ class AppGenerateService:
         :return:
         """
         max_active_request = AppGenerateService._get_max_active_requests(app_model)
-        rate_limit = RateLimit(app_model.id, max_active_request)
+        rate_limit = RateLimit(app_model.id, max_active_request, int(dify_config.APP_MAX_REQUESTS_PER_SECOND))
         request_id = RateLimit.gen_request_key()
         try:
             request_id = rate_limit.enter(request_id)
@@ -29,7 +29,7 @@ class HitTestingService:
         external_retrieval_model: dict,
         limit: int = 10,
     ) -> dict:
-        if dataset.available_document_count == 0 or dataset.available_segment_count == 0:
+        if not dataset.available_for_retrieval:
             return {
                 "query": {
                     "content": query,
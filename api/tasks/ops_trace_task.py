@@ -1,10 +1,11 @@
 import json
 import logging
+from collections.abc import Iterable, Iterator
 
 from celery import shared_task  # type: ignore
 from flask import current_app
 
-from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
+from core.ops.entities.config_entity import OPS_BATCH_FILE_PATH, OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
 from core.ops.entities.trace_entity import trace_info_info_map
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -17,19 +18,45 @@ from models.workflow import WorkflowRun
 def process_trace_tasks(file_info):
     """
     Async process trace tasks
-    :param tasks_data: List of dictionaries containing task data
+    :param file_info: file id and app id of the trace task file,
+        or file id of a NDJSON batch file when batch is True
 
-    Usage: process_trace_tasks.delay(tasks_data)
+    Usage: process_trace_tasks.delay(file_info)
     """
     from core.ops.ops_trace_manager import OpsTraceManager
 
+    if file_info.get("batch"):
+        file_path = f"{OPS_BATCH_FILE_PATH}{file_info.get('file_id')}.ndjson"
+        try:
+            # stream through the batch, trace instances are shared by the trace tasks of an app
+            trace_instances: dict = {}
+            for line in _iter_lines(storage.load_stream(file_path)):
+                try:
+                    file_data = json.loads(line)
+                    app_id = file_data.get("app_id")
+                    if app_id not in trace_instances:
+                        trace_instances[app_id] = OpsTraceManager.get_ops_trace_instance(app_id)
+                    _process_trace_task(app_id, file_data, trace_instances[app_id])
+                except Exception:
+                    logging.exception("Processing trace task of batch failed")
+        finally:
+            storage.delete(file_path)
+        return
+
     app_id = file_info.get("app_id")
     file_id = file_info.get("file_id")
     file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.json"
-    file_data = json.loads(storage.load(file_path))
+    try:
+        file_data = json.loads(storage.load(file_path))
+        trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+        _process_trace_task(app_id, file_data, trace_instance)
+    finally:
+        storage.delete(file_path)
+
+
+def _process_trace_task(app_id, file_data, trace_instance):
     trace_info = file_data.get("trace_info")
     trace_info_type = file_data.get("trace_info_type")
-    trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
 
     if trace_info.get("message_data"):
         trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
@@ -50,5 +77,13 @@ def process_trace_tasks(file_info):
         failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
         redis_client.incr(failed_key)
         logging.info(f"Processing trace tasks failed, app_id: {app_id}")
-    finally:
-        storage.delete(file_path)
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        yield from (line for line in lines if line.strip())
+    if buffer.strip():
+        yield buffer
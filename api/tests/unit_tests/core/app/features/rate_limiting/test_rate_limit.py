@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from redis.crc import key_slot
+
+from core.app.features.rate_limiting.rate_limit import RateLimit
+from core.errors.error import AppInvokeQuotaExceededError
+
+
+@pytest.fixture
+def redis_client():
+    redis_client = MagicMock()
+    with (
+        patch("core.app.features.rate_limiting.rate_limit.redis_client", new=redis_client),
+        patch.dict(RateLimit._instance_dict, clear=True),
+    ):
+        yield redis_client
+
+
+def test_enter_admits_in_one_script_call(redis_client):
+    enter_script = redis_client.register_script.return_value
+    enter_script.return_value = 1
+
+    rate_limit = RateLimit("app-1", max_active_requests=2, max_requests_per_second=5)
+    request_id = rate_limit.enter("request-1")
+
+    assert request_id == "request-1"
+    enter_script.assert_called_once()
+    kwargs = enter_script.call_args.kwargs
+    assert kwargs["keys"] == [
+        "dify:rate_limit:{app-1}:active_request_times",
+        "dify:rate_limit:{app-1}:request_tokens",
+    ]
+    assert kwargs["args"][1:5] == ["request-1", 2, RateLimit._REQUEST_MAX_ALIVE_TIME, 5]
+    redis_client.hlen.assert_not_called()
+    redis_client.hgetall.assert_not_called()
+
+    rate_limit.exit(request_id)
+    redis_client.zrem.assert_called_once_with("dify:rate_limit:{app-1}:active_request_times", "request-1")
+
+
+@pytest.mark.parametrize(
+    ("result", "message"),
+    [(0, "concurrent requests allowed is 2"), (-1, "requests per second allowed is 5")],
+)
+def test_enter_rejects(redis_client, result, message):
+    redis_client.register_script.return_value.return_value = result
+
+    rate_limit = RateLimit("app-1", max_active_requests=2, max_requests_per_second=5)
+    with pytest.raises(AppInvokeQuotaExceededError, match=message):
+        rate_limit.enter()
+
+
+def test_enter_unlimited(redis_client):
+    enter_script = redis_client.register_script.return_value
+    enter_script.return_value = 1
+
+    rate_limit = RateLimit("app-1", max_active_requests=0)
+    assert rate_limit.enter() == RateLimit._UNLIMITED_REQUEST_ID
+    enter_script.assert_not_called()
+
+    # only the requests per second are limited, no active request to exit
+    rate_limit = RateLimit("app-1", max_active_requests=0, max_requests_per_second=5)
+    assert rate_limit.enter() == RateLimit._UNLIMITED_REQUEST_ID
+    enter_script.assert_called_once()
+    rate_limit.exit(RateLimit._UNLIMITED_REQUEST_ID)
+    redis_client.zrem.assert_not_called()
+
+
+def test_script_keys_share_cluster_slot(redis_client):
+    rate_limit = RateLimit("app-1", max_active_requests=2, max_requests_per_second=5)
+    assert key_slot(rate_limit.active_requests_key.encode()) == key_slot(rate_limit.request_tokens_key.encode())
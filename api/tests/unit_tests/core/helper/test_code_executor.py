@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage, get_client
+
+
+def _response(status_code: int, json_data: dict) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = json_data
+    return response
+
+
+@patch("httpx.Client.post")
+def test_execute_code_reuses_client(mock_post):
+    mock_post.return_value = _response(200, {"code": 0, "message": "success", "data": {"stdout": "ok"}})
+
+    assert CodeExecutor.execute_code(CodeLanguage.PYTHON3, "", "print('ok')") == "ok"
+    assert CodeExecutor.execute_code(CodeLanguage.PYTHON3, "", "print('ok')") == "ok"
+
+    assert mock_post.call_count == 2
+    assert get_client() is get_client()
+    assert mock_post.call_args.kwargs["json"]["language"] == CodeLanguage.PYTHON3
+
+
+@patch("httpx.Client.post")
+def test_execute_code_error(mock_post):
+    mock_post.return_value = _response(200, {"code": 0, "message": "success", "data": {"error": "NameError"}})
+    with pytest.raises(CodeExecutionError, match="NameError"):
+        CodeExecutor.execute_code(CodeLanguage.PYTHON3, "", "print(x)")
+
+    mock_post.return_value = _response(503, {})
+    with pytest.raises(CodeExecutionError, match="unavailable"):
+        CodeExecutor.execute_code(CodeLanguage.PYTHON3, "", "print(x)")
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from core.helper.code_executor.code_executor import CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_sandbox import Jinja2SandboxRenderer
+
+
+def test_render_in_process():
+    template = "{% for item in items %}{{ loop.index }}. {{ item.name | upper }}{{ ', ' if not loop.last }}{% endfor %}"
+    inputs = {"items": [{"name": "a"}, {"name": "b"}]}
+
+    assert Jinja2SandboxRenderer.render(template, inputs) == "1. A, 2. B"
+    assert Jinja2SandboxRenderer.render("{% set n = 1 + 2 %}{{ n }} {{ 'a' + 'b' }}", {}) == "3 ab"
+    assert Jinja2SandboxRenderer._compile(template) is Jinja2SandboxRenderer._compile(template)
+
+
+def test_render_fallback_to_remote_sandbox():
+    # calls, nested loops, repetitions in loops, growing assignments, filters with size arguments, escapes
+    # and unsafe attributes are left to the remote sandbox
+    for template in [
+        "{% set a = 'x'|center(200000000) %}{{ a|length }}",
+        "{% set a = arg %}{% for i in items %}{% set a = a ~ a %}{% endfor %}{{ a|length }}",
+        "{% set a = arg %}{% for i in items %}{% set a = a + a %}{% endfor %}{{ a|length }}",
+        "{{ arg|indent(100000000) }}",
+        "{{ range(3) | list }}",
+        "{% for a in items %}{% for b in items %}{{ a }}{% endfor %}{% endfor %}",
+        "{% for a in items %}{{ a * 3 }}{% endfor %}",
+        "{{ 'a' * 100000 }}",
+        "{{ arg }}\\n",
+        "{{ arg.__class__ }}",
+        "{{ arg.missing.attribute }}",
+    ]:
+        assert Jinja2SandboxRenderer.render(template, {"arg": "x", "items": ["x", "y"]}) is None, template
+
+
+@patch("core.helper.code_executor.code_executor.dify_config.JINJA2_IN_PROCESS_RENDERING_ENABLED", True)
+@patch.object(CodeExecutor, "execute_code")
+def test_execute_workflow_code_template_in_process(mock_execute_code):
+    mock_execute_code.return_value = "<<RESULT>>remote<<RESULT>>"
+
+    result = CodeExecutor.execute_workflow_code_template(CodeLanguage.JINJA2, "Hello {{ arg }}", {"arg": "world"})
+    assert result == {"result": "Hello world"}
+    mock_execute_code.assert_not_called()
+
+    result = CodeExecutor.execute_workflow_code_template(CodeLanguage.JINJA2, "{{ range(1) }}", {})
+    assert result == {"result": "remote"}
+    mock_execute_code.assert_called_once()
@@ -1,9 +1,10 @@
 import random
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
-from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request
+from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, get_client, make_request
 
 
 @patch("httpx.Client.request")
@@ -50,3 +51,17 @@ def test_retry_logic_success(mock_request):
     assert response.status_code == 200
     assert mock_request.call_count == SSRF_DEFAULT_MAX_RETRIES + 1
     assert mock_request.call_args_list[0][1].get("method") == "GET"
+
+
+def test_client_is_reused_between_requests():
+    assert get_client() is get_client()
+
+
+def test_client_does_not_persist_response_cookies():
+    client = get_client()
+    request = httpx.Request("GET", "http://example.com")
+    response = httpx.Response(200, headers={"Set-Cookie": "session=secret; Path=/"}, request=request)
+
+    client.cookies.extract_cookies(response)
+
+    assert len(client.cookies) == 0
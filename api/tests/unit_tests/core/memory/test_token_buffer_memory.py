@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock, patch
+
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities import AssistantPromptMessage, PromptMessageRole, UserPromptMessage
+from models.model import Conversation
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.data[key] = str(value).encode()
+
+
+def _count_tokens(messages):
+    return sum(len(message.content) for message in messages)
+
+
+def _count_tokens_with_request_overhead(messages):
+    return 3 + _count_tokens(messages)
+
+
+def _build_memory(count_tokens=_count_tokens):
+    model_instance = MagicMock(provider="openai", model="gpt-4")
+    model_instance.get_llm_num_tokens.side_effect = count_tokens
+    return TokenBufferMemory(conversation=Conversation(), model_instance=model_instance)
+
+
+def _build_history(memory, num_messages):
+    prompt_messages = []
+    token_cache_keys = []
+    for i in range(num_messages):
+        prompt_messages.append(UserPromptMessage(content=f"q{i}" * 5))
+        prompt_messages.append(AssistantPromptMessage(content=f"a{i}" * 5))
+        token_cache_keys.append(memory._get_token_cache_key(f"message-{i}", PromptMessageRole.USER))
+        token_cache_keys.append(memory._get_token_cache_key(f"message-{i}", PromptMessageRole.ASSISTANT))
+    return prompt_messages, token_cache_keys
+
+
+def test_prune_prompt_messages():
+    fake_redis = FakeRedis()
+    with patch("core.memory.token_buffer_memory.redis_client", new=fake_redis):
+        memory = _build_memory()
+        prompt_messages, token_cache_keys = _build_history(memory, 5)
+
+        pruned = memory._prune_prompt_messages(list(prompt_messages), token_cache_keys, max_token_limit=35)
+
+        # the oldest messages are dropped and the result matches popping one message at a time
+        assert pruned == prompt_messages[-3:]
+        assert _count_tokens(pruned) <= 35
+        # only the pruned messages were counted one by one, plus the request overhead,
+        # the two total counts and the check that the last pruned message does not fit
+        assert memory.model_instance.get_llm_num_tokens.call_count == 11
+        assert len(fake_redis.data) == 7
+
+        memory.model_instance.get_llm_num_tokens.reset_mock()
+        pruned = memory._prune_prompt_messages(list(prompt_messages), token_cache_keys, max_token_limit=35)
+
+        assert pruned == prompt_messages[-3:]
+        assert memory.model_instance.get_llm_num_tokens.call_count == 3
+
+
+def test_prune_prompt_messages_keeps_last_message():
+    with patch("core.memory.token_buffer_memory.redis_client", new=FakeRedis()):
+        memory = _build_memory()
+        prompt_messages, token_cache_keys = _build_history(memory, 2)
+
+        pruned = memory._prune_prompt_messages(list(prompt_messages), token_cache_keys, max_token_limit=1)
+
+        assert pruned == prompt_messages[-1:]
+
+
+def test_prune_prompt_messages_subtracts_request_overhead_once():
+    with patch("core.memory.token_buffer_memory.redis_client", new=FakeRedis()):
+        memory = _build_memory(_count_tokens_with_request_overhead)
+        prompt_messages, token_cache_keys = _build_history(memory, 5)
+
+        # a history just under the limit keeps all its messages
+        assert memory._prune_prompt_messages(list(prompt_messages), token_cache_keys, max_token_limit=103) == (
+            prompt_messages
+        )
+        # 20 tokens over the limit drops two messages of 10 tokens, not more
+        pruned = memory._prune_prompt_messages(list(prompt_messages), token_cache_keys, max_token_limit=83)
+        assert pruned == prompt_messages[2:]
+
+
+def test_prune_prompt_messages_puts_back_messages_dropped_on_underestimated_counts():
+    fake_redis = FakeRedis()
+    with patch("core.memory.token_buffer_memory.redis_client", new=fake_redis):
+        memory = _build_memory(_count_tokens_with_request_overhead)
+        prompt_messages, token_cache_keys = _build_history(memory, 5)
+        for key in token_cache_keys:
+            fake_redis.setex(key, 60, 1)
+
+        pruned = memory._prune_prompt_messages(list(prompt_messages), token_cache_keys, max_token_limit=83)
+
+        assert pruned == prompt_messages[2:]
@@ -0,0 +1,55 @@
+import json
+
+from core.model_runtime.model_providers.model_schema_registry import ModelSchemaRegistry
+
+
+def _create_provider(model_providers_path):
+    provider_path = model_providers_path / "mock_provider"
+    llm_path = provider_path / "llm"
+    llm_path.mkdir(parents=True)
+    (provider_path / "mock_provider.yaml").write_text("provider: mock_provider\nsupported_model_types:\n  - llm\n")
+    (llm_path / "_position.yaml").write_text("- model-b\n- model-a\n")
+    (llm_path / "model-a.yaml").write_text("model: model-a\nmodel_type: llm\n")
+    (llm_path / "model-b.yaml").write_text("model: model-b\nmodel_type: llm\n")
+    return provider_path
+
+
+def test_get_schemas(tmp_path):
+    _create_provider(tmp_path / "model_providers")
+    registry = ModelSchemaRegistry(str(tmp_path / "model_providers"), str(tmp_path / "artifacts"))
+
+    assert registry.get_provider_schema("mock_provider") == {
+        "provider": "mock_provider",
+        "supported_model_types": ["llm"],
+    }
+    model_schemas, position_map = registry.get_model_schemas("mock_provider", "llm")
+    assert model_schemas == [
+        ("model-a.yaml", {"model": "model-a", "model_type": "llm"}),
+        ("model-b.yaml", {"model": "model-b", "model_type": "llm"}),
+    ]
+    assert position_map == {"model-b": 0, "model-a": 1}
+    assert registry.get_model_schemas("mock_provider", "rerank") == ([], {})
+
+    # every call returns new objects
+    model_schemas[0][1]["model"] = "changed"
+    assert registry.get_model_schemas("mock_provider", "llm")[0][0][1]["model"] == "model-a"
+
+
+def test_artifact_is_reused_until_yaml_changes(tmp_path):
+    provider_path = _create_provider(tmp_path / "model_providers")
+    ModelSchemaRegistry(str(tmp_path / "model_providers"), str(tmp_path / "artifacts")).build()
+
+    artifact_file_path = tmp_path / "artifacts" / "mock_provider.json"
+    artifact = json.loads(artifact_file_path.read_text())
+    artifact["provider_schema"]["provider"] = "from_artifact"
+    artifact_file_path.write_text(json.dumps(artifact))
+
+    registry = ModelSchemaRegistry(str(tmp_path / "model_providers"), str(tmp_path / "artifacts"))
+    assert registry.get_provider_schema("mock_provider")["provider"] == "from_artifact"
+
+    (provider_path / "llm" / "model-a.yaml").write_text("model: model-a\nmodel_type: llm\nfeatures:\n  - vision\n")
+
+    registry = ModelSchemaRegistry(str(tmp_path / "model_providers"), str(tmp_path / "artifacts"))
+    assert registry.get_provider_schema("mock_provider")["provider"] == "mock_provider"
+    model_schemas, _ = registry.get_model_schemas("mock_provider", "llm")
+    assert model_schemas[0][1]["features"] == ["vision"]
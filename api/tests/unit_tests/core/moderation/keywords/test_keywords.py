@@ -0,0 +1,58 @@
+import pytest
+
+from core.moderation.keywords.keywords import KeywordsModeration
+from core.moderation.keywords.keywords_matcher import KeywordsMatcher
+
+CONFIG = {
+    "inputs_config": {"enabled": True, "preset_response": "inputs flagged"},
+    "outputs_config": {"enabled": True, "preset_response": "outputs flagged"},
+    "keywords": "he\nshe\nhis\nhers\n\nBad Word",
+}
+
+
+@pytest.mark.parametrize(
+    ("text", "matched"),
+    [
+        ("ushers", True),
+        ("ahis", True),
+        ("xhxexs", False),
+        ("this is a BAD word", True),
+        ("bad words", True),
+        ("bad wor", False),
+        ("", False),
+    ],
+)
+def test_search(text, matched):
+    matcher = KeywordsMatcher(CONFIG["keywords"].split("\n"))
+    assert matcher.search(text) is matched
+    # same as checking each keyword
+    assert matched is any(keyword and keyword.lower() in text.lower() for keyword in CONFIG["keywords"].split("\n"))
+
+
+def test_feed_matches_across_chunks():
+    matcher = KeywordsMatcher(["bad word"])
+    matched, state = matcher.feed("this is a ba")
+    assert not matched
+    matched, state = matcher.feed("d w", state)
+    assert not matched
+    matched, _ = matcher.feed("ord", state)
+    assert matched
+
+
+def test_moderation_for_inputs():
+    moderation = KeywordsModeration("app_id", "tenant_id", CONFIG)
+    assert not moderation.moderation_for_inputs({"name": "world"}, "").flagged
+    assert moderation.moderation_for_inputs({"name": "world"}, "her car").flagged
+
+
+def test_moderation_for_growing_outputs():
+    moderation = KeywordsModeration("app_id", "tenant_id", CONFIG)
+    assert not moderation.moderation_for_outputs("it is a ba").flagged
+    assert not moderation.moderation_for_outputs("it is a bad").flagged
+    result = moderation.moderation_for_outputs("it is a bad word")
+    assert result.flagged
+    assert result.preset_response == "outputs flagged"
+
+    # the output is not the continuation of the scanned one
+    assert not moderation.moderation_for_outputs("it is fine").flagged
+    assert moderation.moderation_for_outputs("it is fine, bad word").flagged
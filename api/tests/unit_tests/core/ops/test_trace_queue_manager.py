@@ -0,0 +1,58 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+from core.ops.entities.trace_entity import GenerateNameTraceInfo
+from core.ops.ops_trace_manager import TraceQueueManager
+from tasks.ops_trace_task import _iter_lines
+
+
+def _build_task(app_id, conversation_id):
+    task = MagicMock(app_id=app_id)
+    task.execute.return_value = GenerateNameTraceInfo(conversation_id=conversation_id, tenant_id="tenant", metadata={})
+    return task
+
+
+def test_send_batch_to_celery():
+    trace_queue_manager = TraceQueueManager.__new__(TraceQueueManager)
+    trace_queue_manager.flask_app = Flask(__name__)
+    tasks = [
+        _build_task("app-1", "conversation-1"),
+        _build_task(None, "skipped"),
+        _build_task("app-2", "conversation-2"),
+    ]
+
+    with (
+        patch("core.ops.ops_trace_manager.storage") as storage,
+        patch("core.ops.ops_trace_manager.process_trace_tasks") as process_trace_tasks,
+        patch("core.ops.ops_trace_manager.trace_manager_batch_max_bytes", 10 * 1024 * 1024),
+    ):
+        trace_queue_manager.send_batch_to_celery(tasks)
+
+    storage.save.assert_called_once()
+    file_path, content = storage.save.call_args.args
+    lines = [json.loads(line) for line in _iter_lines([content[:10], content[10:]])]
+    assert [line["app_id"] for line in lines] == ["app-1", "app-2"]
+    assert [line["trace_info"]["conversation_id"] for line in lines] == ["conversation-1", "conversation-2"]
+
+    process_trace_tasks.delay.assert_called_once()
+    file_info = process_trace_tasks.delay.call_args.args[0]
+    assert file_info["batch"] is True
+    assert file_path == f"ops_trace/batch/{file_info['file_id']}.ndjson"
+
+
+def test_send_batch_to_celery_splits_batches_by_size():
+    trace_queue_manager = TraceQueueManager.__new__(TraceQueueManager)
+    trace_queue_manager.flask_app = Flask(__name__)
+    tasks = [_build_task("app-1", f"conversation-{i}") for i in range(3)]
+
+    with (
+        patch("core.ops.ops_trace_manager.storage") as storage,
+        patch("core.ops.ops_trace_manager.process_trace_tasks") as process_trace_tasks,
+        patch("core.ops.ops_trace_manager.trace_manager_batch_max_bytes", 1),
+    ):
+        trace_queue_manager.send_batch_to_celery(tasks)
+
+    assert storage.save.call_count == 3
+    assert process_trace_tasks.delay.call_count == 3
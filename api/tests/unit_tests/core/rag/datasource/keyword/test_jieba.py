@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+
+def _segment(node_id: str) -> MagicMock:
+    segment = MagicMock()
+    segment.index_node_id = node_id
+    segment.content = f"content of {node_id}"
+    return segment
+
+
+@patch("core.rag.datasource.keyword.jieba.jieba.db")
+@patch("core.rag.datasource.keyword.jieba.jieba.redis_client", new=FakeRedis())
+def test_search_reuses_parsed_keyword_table_until_version_changes(mock_db):
+    dataset = MagicMock()
+    dataset.id = "dataset-cache-test"
+    mock_db.session.query.return_value.filter.return_value.all.return_value = [_segment("node-2"), _segment("node-1")]
+    keyword_table = {"dify": {"node-1", "node-2"}, "rag": {"node-2"}}
+
+    jieba = Jieba(dataset)
+    with (
+        patch.object(Jieba, "_get_dataset_keyword_table", return_value=keyword_table) as mock_get_table,
+        patch.object(Jieba, "_retrieve_ids_by_query", return_value=["node-2", "node-1"]),
+    ):
+        documents = jieba.search("dify rag", top_k=2)
+        jieba.search("dify rag", top_k=2)
+        assert mock_get_table.call_count == 1
+
+        jieba._bump_keyword_table_version()
+        jieba.search("dify rag", top_k=2)
+        assert mock_get_table.call_count == 2
+
+    # segments are hydrated with one query per search and keep the keyword rank order
+    assert mock_db.session.query.call_count == 3
+    assert [document.metadata["doc_id"] for document in documents] == ["node-2", "node-1"]
+
+
+def test_retrieve_ids_by_query_ranks_by_matching_keywords():
+    jieba = Jieba(MagicMock())
+    keyword_table = {"dify": {"node-1", "node-2"}, "rag": {"node-2"}}
+
+    with patch(
+        "core.rag.datasource.keyword.jieba.jieba.JiebaKeywordTableHandler.extract_keywords",
+        return_value={"dify", "rag", "unknown"},
+    ):
+        assert jieba._retrieve_ids_by_query(keyword_table, "dify rag", k=1) == ["node-2"]
@@ -0,0 +1,168 @@
+from unittest.mock import MagicMock, patch
+
+from click.testing import CliRunner
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+from werkzeug.exceptions import NotFound
+
+from commands import migrate_keyword_index
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+from core.rag.models.document import Document
+
+
+class FakeResult:
+    def __init__(self, rows: list):
+        self._rows = rows
+        self._attributes: dict = {}
+
+    def all(self) -> list:
+        return self._rows
+
+
+class RecordingSession:
+    """Session building real statements, recording them instead of running them on a database."""
+
+    def __init__(self, results: list[list] | None = None):
+        self.statements: list = []
+        self.commit_count = 0
+        self._results = list(results or [])
+
+    def query(self, *entities) -> Query:
+        return Query(entities, session=self)  # type: ignore[arg-type]
+
+    def execute(self, statement, *args, **kwargs) -> FakeResult:
+        self.statements.append(statement)
+        return FakeResult(self._results.pop(0) if self._results else [])
+
+    def commit(self) -> None:
+        self.commit_count += 1
+
+    def rollback(self) -> None:
+        pass
+
+
+def _compile(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+def _dataset() -> MagicMock:
+    dataset = MagicMock()
+    dataset.id = "dataset-1"
+    return dataset
+
+
+def _inserted_rows(session: RecordingSession) -> set[tuple[str, str]]:
+    rows = set()
+    for statement in session.statements:
+        compiled = _compile(statement)
+        assert "ON CONFLICT (dataset_id, keyword, index_node_id) DO NOTHING" in str(compiled)
+        params = compiled.params
+        row_count = len([key for key in params if key.startswith("keyword_m")])
+        rows.update((params[f"keyword_m{i}"], params[f"index_node_id_m{i}"]) for i in range(row_count))
+    return rows
+
+
+def test_add_texts_inserts_postings_in_batches():
+    session = RecordingSession()
+    texts = [
+        Document(page_content="dify rag", metadata={"doc_id": "node-1"}),
+        Document(page_content="rag", metadata={"doc_id": "node-2"}),
+    ]
+    with (
+        patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db", MagicMock(session=session)),
+        patch.object(JiebaInvertedIndex, "_update_segments_keywords") as mock_update_segments_keywords,
+    ):
+        keyword_index = JiebaInvertedIndex(_dataset())
+        keyword_index._config.insert_batch_size = 2
+        keyword_index.add_texts(texts, keywords_list=[["dify", "rag", "dify"], ["rag", "x" * 256]])
+
+    mock_update_segments_keywords.assert_called_once_with(
+        {"node-1": ["dify", "rag", "dify"], "node-2": ["rag", "x" * 256]}
+    )
+    # duplicated and too long keywords are skipped, 3 postings in batches of 2
+    assert len(session.statements) == 2
+    assert _inserted_rows(session) == {("dify", "node-1"), ("rag", "node-1"), ("rag", "node-2")}
+    assert session.commit_count == 1
+
+
+def test_search_ranks_by_matching_keywords_and_limits_top_k():
+    segment_1 = MagicMock(index_node_id="node-1", content="content 1")
+    segment_2 = MagicMock(index_node_id="node-2", content="content 2")
+    session = RecordingSession(
+        results=[
+            # postings grouped by node, ranked by the database
+            [MagicMock(index_node_id="node-2", match_count=2), MagicMock(index_node_id="node-1", match_count=1)],
+            # segments come back in any order
+            [segment_1, segment_2],
+        ]
+    )
+    with (
+        patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db", MagicMock(session=session)),
+        patch(
+            "core.rag.datasource.keyword.jieba.jieba_inverted_index.JiebaKeywordTableHandler.extract_keywords",
+            return_value={"dify", "rag"},
+        ),
+    ):
+        documents = JiebaInvertedIndex(_dataset()).search("dify rag", top_k=2)
+
+    assert [document.metadata["doc_id"] for document in documents] == ["node-2", "node-1"]
+    assert [document.page_content for document in documents] == ["content 2", "content 1"]
+
+    compiled = _compile(session.statements[0])
+    sql = " ".join(str(compiled).split())
+    assert "GROUP BY dataset_keyword_postings.index_node_id" in sql
+    assert "ORDER BY match_count DESC, dataset_keyword_postings.index_node_id" in sql
+    assert compiled.params["param_1"] == 2
+    assert set(compiled.params["keyword_1"]) == {"dify", "rag"}
+
+
+def test_search_without_keywords():
+    session = RecordingSession()
+    with (
+        patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db", MagicMock(session=session)),
+        patch(
+            "core.rag.datasource.keyword.jieba.jieba_inverted_index.JiebaKeywordTableHandler.extract_keywords",
+            return_value=set(),
+        ),
+    ):
+        assert JiebaInvertedIndex(_dataset()).search("", top_k=2) == []
+    assert session.statements == []
+
+
+def test_delete_by_ids():
+    session = RecordingSession()
+    with patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db", MagicMock(session=session)):
+        keyword_index = JiebaInvertedIndex(_dataset())
+        keyword_index.delete_by_ids([])
+        assert session.statements == []
+
+        keyword_index.delete_by_ids(["node-1", "node-2"])
+
+    compiled = _compile(session.statements[0])
+    assert str(compiled).startswith("DELETE FROM dataset_keyword_postings")
+    assert compiled.params["dataset_id_1"] == "dataset-1"
+    assert compiled.params["index_node_id_1"] == ["node-1", "node-2"]
+    assert session.commit_count == 1
+
+
+def test_migrate_keyword_index_to_postings():
+    session = RecordingSession()
+    dataset_keyword_table = MagicMock(
+        dataset_id="dataset-1",
+        keyword_table_dict={"__data__": {"table": {"dify": ["node-1", "node-2"], "rag": ["node-2"]}}},
+    )
+    mock_keyword_table_cls = MagicMock()
+    mock_keyword_table_cls.query.order_by.return_value.paginate.side_effect = [[dataset_keyword_table], NotFound()]
+    mock_dataset_cls = MagicMock()
+    mock_dataset_cls.query.filter_by.return_value.first.return_value = _dataset()
+
+    with (
+        patch("commands.DatasetKeywordTable", mock_keyword_table_cls),
+        patch("commands.Dataset", mock_dataset_cls),
+        patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db", MagicMock(session=session)),
+    ):
+        result = CliRunner().invoke(migrate_keyword_index)
+
+    assert result.exit_code == 0, result.output
+    assert "Migrated 1 datasets" in result.output
+    assert _inserted_rows(session) == {("dify", "node-1"), ("dify", "node-2"), ("rag", "node-2")}
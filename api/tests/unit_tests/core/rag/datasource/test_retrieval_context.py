@@ -0,0 +1,93 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import inspect
+
+from core.rag.datasource.retrieval_context import QueryCachedEmbeddings, RetrievalContext
+from models.dataset import Dataset
+
+
+def _dataset(dataset_id, embedding_model="text-embedding-3-small"):
+    return Dataset(
+        id=dataset_id, tenant_id="tenant-1", embedding_model_provider="openai", embedding_model=embedding_model
+    )
+
+
+def test_embedding_model_is_resolved_once_per_model():
+    retrieval_context = RetrievalContext()
+    datasets = [_dataset("dataset-1"), _dataset("dataset-2"), _dataset("dataset-3", embedding_model="other")]
+
+    with (
+        patch("core.rag.datasource.retrieval_context.ModelManager") as model_manager,
+        patch("core.rag.datasource.retrieval_context.CacheEmbedding"),
+        patch("core.rag.datasource.retrieval_context.Vector") as vector,
+    ):
+        for dataset in [*datasets, datasets[0]]:
+            retrieval_context.create_vector(dataset)
+
+    assert model_manager.return_value.get_model_instance.call_count == 2
+    # every search branch gets its own vector
+    assert vector.call_count == 4
+    embeddings = [call.kwargs["embeddings"] for call in vector.call_args_list]
+    assert embeddings[0] is embeddings[1]
+    assert embeddings[0] is not embeddings[2]
+    assert embeddings[0] is embeddings[3]
+
+
+def test_datasets_are_shared_as_copies_bound_to_no_session():
+    retrieval_context = RetrievalContext()
+    loaded_dataset = _dataset("dataset-1")
+    loaded_dataset.index_struct = '{"type": "pgvector"}'
+
+    with patch("core.rag.datasource.retrieval_context.db") as db:
+        db.session.query.return_value.filter.return_value.first.return_value = loaded_dataset
+        dataset = retrieval_context.get_dataset("dataset-1")
+        assert retrieval_context.get_dataset("dataset-1") is dataset
+
+    db.session.query.assert_called_once()
+    assert dataset is not loaded_dataset
+    assert inspect(dataset).transient
+    assert (dataset.id, dataset.tenant_id, dataset.index_struct_dict) == ("dataset-1", "tenant-1", {"type": "pgvector"})
+
+
+def test_query_is_embedded_once():
+    embeddings = MagicMock()
+    embeddings.embed_query.side_effect = lambda text: [float(len(text))]
+    query_cached_embeddings = QueryCachedEmbeddings(embeddings)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(query_cached_embeddings.embed_query("query"))) for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[5.0]] * 5
+    embeddings.embed_query.assert_called_once_with("query")
+
+
+def test_different_queries_are_embedded_concurrently():
+    # both calls must be in flight together to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def embed_query(text):
+        barrier.wait()
+        return [float(len(text))]
+
+    embeddings = MagicMock()
+    embeddings.embed_query.side_effect = embed_query
+    query_cached_embeddings = QueryCachedEmbeddings(embeddings)
+
+    results = {}
+    threads = [
+        threading.Thread(target=lambda text=text: results.update({text: query_cached_embeddings.embed_query(text)}))
+        for text in ["query", "other query"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"query": [5.0], "other query": [11.0]}
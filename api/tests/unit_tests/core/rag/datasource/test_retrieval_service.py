@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+from models.dataset import ChildChunk, DocumentSegment
+
+
+def _query(results):
+    query = MagicMock()
+    query.filter.return_value.all.return_value = results
+    query.join.return_value.filter.return_value.all.return_value = results
+    return query
+
+
+def _segment(segment_id, index_node_id, dataset_id="dataset-1"):
+    return DocumentSegment(id=segment_id, index_node_id=index_node_id, dataset_id=dataset_id)
+
+
+def _child_chunk(child_chunk_id, index_node_id, position):
+    return ChildChunk(id=child_chunk_id, index_node_id=index_node_id, content=child_chunk_id, position=position)
+
+
+def test_format_retrieval_documents():
+    documents = [
+        Document(page_content="", metadata={"document_id": "paragraph-doc", "doc_id": "node-1", "score": 0.9}),
+        Document(page_content="", metadata={"document_id": "parent-child-doc", "doc_id": "child-1", "score": 0.7}),
+        Document(page_content="", metadata={"document_id": "missing-doc", "doc_id": "node-2", "score": 0.6}),
+        Document(page_content="", metadata={"document_id": "parent-child-doc", "doc_id": "child-2", "score": 0.8}),
+        Document(page_content="", metadata={"document_id": "paragraph-doc", "doc_id": "node-3", "score": 0.5}),
+    ]
+    dataset_documents = [
+        MagicMock(id="paragraph-doc", dataset_id="dataset-1", doc_form=IndexType.PARAGRAPH_INDEX),
+        MagicMock(id="parent-child-doc", dataset_id="dataset-1", doc_form=IndexType.PARENT_CHILD_INDEX),
+    ]
+    parent_segment = _segment("segment-2", "parent-node")
+    child_chunks = [
+        (_child_chunk("chunk-1", "child-1", 1), parent_segment),
+        (_child_chunk("chunk-2", "child-2", 2), parent_segment),
+    ]
+    segments = [_segment("segment-1", "node-1"), _segment("segment-3", "node-3", dataset_id="dataset-2")]
+
+    with patch("core.rag.datasource.retrieval_service.db") as db:
+        db.session.query.side_effect = [_query(dataset_documents), _query(child_chunks), _query(segments)]
+        retrieval_segments = RetrievalService.format_retrieval_documents(documents)
+
+    # one query each for documents, child chunks and segments
+    assert db.session.query.call_count == 3
+    # segments of other datasets are ignored and the retrieval order is kept
+    assert [record.segment.id for record in retrieval_segments] == ["segment-1", "segment-2"]
+    assert retrieval_segments[0].score == 0.9
+    assert retrieval_segments[0].child_chunks is None
+    # child chunks are merged into their parent segment with the max score
+    assert retrieval_segments[1].score == 0.8
+    assert [child_chunk.id for child_chunk in retrieval_segments[1].child_chunks] == ["chunk-1", "chunk-2"]
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import psycopg2.pool
+
+from core.rag.datasource.vdb.vector_client_registry import (
+    RetirableConnectionPool,
+    VectorClientRegistry,
+    check_connection_pool,
+)
+
+
+def test_get_or_create_reuses_client_for_same_key():
+    registry = VectorClientRegistry()
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = registry.get_or_create(key=("pgvector", "dsn-a"), factory=factory)
+    second = registry.get_or_create(key=("pgvector", "dsn-a"), factory=factory)
+    other = registry.get_or_create(key=("pgvector", "dsn-b"), factory=factory)
+
+    assert first is second
+    assert other is not first
+    assert factory.call_count == 2
+
+
+def test_unhealthy_client_is_closed_and_recreated(monkeypatch):
+    monkeypatch.setattr(
+        "core.rag.datasource.vdb.vector_client_registry.dify_config.VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL", 0
+    )
+    registry = VectorClientRegistry()
+    close = MagicMock()
+    health_check = MagicMock(side_effect=[False, True])
+
+    first = registry.get_or_create(key="qdrant", factory=object, health_check=health_check, close=close)
+    second = registry.get_or_create(key="qdrant", factory=object, health_check=health_check, close=close)
+    third = registry.get_or_create(key="qdrant", factory=object, health_check=health_check, close=close)
+
+    assert second is not first
+    assert third is second
+    close.assert_called_once_with(first)
+
+
+def test_clear_closes_all_clients():
+    registry = VectorClientRegistry()
+    close = MagicMock()
+    client = registry.get_or_create(key="milvus", factory=object, close=close)
+
+    registry.clear()
+
+    close.assert_called_once_with(client)
+    assert registry.get_or_create(key="milvus", factory=object, close=close) is not client
+
+
+def test_check_connection_pool_keeps_busy_pool():
+    pool = MagicMock(closed=False)
+    pool.getconn.side_effect = psycopg2.pool.PoolError("connection pool exhausted")
+
+    assert check_connection_pool(pool) is True
+    pool.closeall.assert_not_called()
+
+
+def test_check_connection_pool_discards_stale_connection():
+    pool = MagicMock(closed=False)
+    conn = pool.getconn.return_value
+    conn.cursor.side_effect = psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    assert check_connection_pool(pool) is True
+    pool.putconn.assert_called_once_with(conn, close=True)
+    pool.closeall.assert_not_called()
+
+
+def test_retired_pool_closes_when_connections_are_returned():
+    with patch("psycopg2.connect", side_effect=lambda *args, **kwargs: MagicMock(closed=False)):
+        pool = RetirableConnectionPool(0, 2)
+        conn = pool.getconn()
+
+        pool.retire()
+        # the connection is still used by another thread
+        assert not pool.closed
+        conn.close.assert_not_called()
+
+        pool.putconn(conn)
+        assert pool.closed
+        conn.close.assert_called_once()
+
+
+def test_retired_idle_pool_closes_immediately():
+    pool = RetirableConnectionPool(0, 2)
+
+    pool.retire()
+
+    assert pool.closed
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.docstore.dataset_docstore import DatasetDocumentStore
+from core.rag.models.document import ChildDocument, Document
+from models.dataset import ChildChunk, DocumentSegment
+
+
+def test_add_documents_bulk_inserts_segments_and_child_chunks():
+    dataset = MagicMock(id="dataset-1", tenant_id="tenant-1", indexing_technique="high_quality")
+    doc_store = DatasetDocumentStore(dataset=dataset, user_id="user-1", document_id="document-1")
+    existing_segment = DocumentSegment(id="segment-1", index_node_id="node-1", content="old")
+    docs = [
+        Document(
+            page_content="updated",
+            metadata={"doc_id": "node-1", "doc_hash": "hash-1"},
+            children=[ChildDocument(page_content="child", metadata={"doc_id": "child-1", "doc_hash": "c1"})],
+        ),
+        Document(
+            page_content="new",
+            metadata={"doc_id": "node-2", "doc_hash": "hash-2", "answer": "answer"},
+            children=[
+                ChildDocument(page_content="child a", metadata={"doc_id": "child-2", "doc_hash": "c2"}),
+                ChildDocument(page_content="child b", metadata={"doc_id": "child-3", "doc_hash": "c3"}),
+            ],
+        ),
+    ]
+
+    with (
+        patch("core.rag.docstore.dataset_docstore.db") as db,
+        patch("core.rag.docstore.dataset_docstore.ModelManager") as model_manager,
+    ):
+        db.session.query.return_value.filter.return_value.scalar.return_value = 3
+        db.session.query.return_value.filter.return_value.all.return_value = [existing_segment]
+        embedding_model = model_manager.return_value.get_model_instance.return_value
+        embedding_model.get_text_embedding_num_tokens.side_effect = lambda texts: len(texts[0])
+        doc_store.add_documents(docs, save_child=True)
+
+    assert existing_segment.content == "updated"
+    assert existing_segment.tokens == len("updated")
+    # segments and child chunks are inserted with one statement each
+    inserts = [call.args for call in db.session.execute.call_args_list]
+    segment_rows = next(rows for statement, rows in inserts if statement.table.name == DocumentSegment.__tablename__)
+    child_rows = next(rows for statement, rows in inserts if statement.table.name == ChildChunk.__tablename__)
+    assert [(row["index_node_id"], row["position"], row["answer"], row["tokens"]) for row in segment_rows] == [
+        ("node-2", 4, "answer", len("new"))
+    ]
+    assert [(row["index_node_id"], row["segment_id"]) for row in child_rows] == [
+        ("child-1", "segment-1"),
+        ("child-2", segment_rows[0]["id"]),
+        ("child-3", segment_rows[0]["id"]),
+    ]
+    db.session.commit.assert_called_once()
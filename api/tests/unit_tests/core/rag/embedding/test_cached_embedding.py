@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock, patch
+
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from libs import helper
+
+
+def _model_instance(vectors: list[list[float]]) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = "text-embedding-3-small"
+    model_instance.model_type_instance.get_model_schema.return_value.model_properties = {
+        ModelPropertyKey.MAX_CHUNKS: 10
+    }
+    model_instance.invoke_text_embedding.return_value.embeddings = vectors
+    return model_instance
+
+
+@patch("core.rag.embedding.cached_embedding.db")
+def test_embed_documents_looks_up_cache_in_single_query(mock_db):
+    cached = MagicMock()
+    cached.hash = helper.generate_text_hash("cached")
+    cached.get_embedding.return_value = [1.0, 0.0]
+    mock_db.session.query.return_value.filter.return_value.all.return_value = [cached]
+
+    model_instance = _model_instance([[0.0, 2.0], [3.0, 0.0]])
+    embeddings = CacheEmbedding(model_instance).embed_documents(["cached", "new", "cached", "other"])
+
+    assert embeddings == [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [1.0, 0.0]]
+    assert mock_db.session.query.call_count == 1
+    model_instance.invoke_text_embedding.assert_called_once()
+    assert model_instance.invoke_text_embedding.call_args.kwargs["texts"] == ["new", "other"]
+    # both misses are written back with one bulk insert
+    assert mock_db.session.execute.call_count == 1
+    mock_db.session.commit.assert_called_once()
+
+
+@patch("core.rag.embedding.cached_embedding.db")
+def test_embed_documents_skips_write_back_when_all_cached(mock_db):
+    cached = MagicMock()
+    cached.hash = helper.generate_text_hash("cached")
+    cached.get_embedding.return_value = [1.0, 0.0]
+    mock_db.session.query.return_value.filter.return_value.all.return_value = [cached]
+
+    model_instance = _model_instance([])
+    embeddings = CacheEmbedding(model_instance).embed_documents(["cached"])
+
+    assert embeddings == [[1.0, 0.0]]
+    model_instance.invoke_text_embedding.assert_not_called()
+    mock_db.session.execute.assert_not_called()
@@ -0,0 +1,26 @@
+from core.rag.extractor.csv_extractor import CSVExtractor
+
+
+def test_extract_csv_in_chunks(tmp_path, monkeypatch):
+    file_path = tmp_path / "test.csv"
+    file_path.write_text("name,count\na,1\nb,2\nc,3\n")
+    monkeypatch.setattr(CSVExtractor, "CHUNK_SIZE", 2)
+
+    documents = CSVExtractor(str(file_path), autodetect_encoding=True).extract()
+
+    assert [document.page_content for document in documents] == [
+        "name: a;count: 1",
+        "name: b;count: 2",
+        "name: c;count: 3",
+    ]
+    assert [document.metadata["row"] for document in documents] == [0, 1, 2]
+
+
+def test_extract_csv_with_detected_encoding(tmp_path, monkeypatch):
+    file_path = tmp_path / "test.csv"
+    file_path.write_bytes(b"name\n" + b"a\n" * 3 + "é\n".encode("latin-1"))
+    monkeypatch.setattr(CSVExtractor, "CHUNK_SIZE", 1)
+
+    documents = CSVExtractor(str(file_path), encoding="utf-8", autodetect_encoding=True).extract()
+
+    assert [document.page_content for document in documents] == ["name: a", "name: a", "name: a", "name: é"]
@@ -0,0 +1,54 @@
+import re
+import zipfile
+
+from openpyxl import Workbook
+
+from core.rag.extractor.excel_extractor import ExcelExtractor
+
+
+def test_extract_xlsx_rows_with_hyperlinks(tmp_path):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(["name", "url", "count"])
+    sheet.append(["a", "link", 1])
+    sheet["B2"].hyperlink = "https://example.com"
+    sheet.append([None, None, None])
+    sheet.append(["b", None, 2.5])
+    other_sheet = wb.create_sheet("other")
+    other_sheet.append(["header"])
+    other_sheet.append(["value"])
+    wb.create_sheet("empty")
+    file_path = str(tmp_path / "test.xlsx")
+    wb.save(file_path)
+
+    extractor = ExcelExtractor(file_path)
+    documents = extractor.extract_iter()
+
+    assert next(documents).page_content == '"name":"a";"url":"[link](https://example.com)";"count":"1"'
+    assert [document.page_content for document in documents] == ['"name":"b";"count":"2.5"', '"header":"value"']
+
+
+def test_extract_xlsx_with_stale_dimension(tmp_path):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(["name", "count", "note"])
+    sheet.append(["a", 1, "x"])
+    sheet.append(["b", 2, "y"])
+    saved_path = tmp_path / "saved.xlsx"
+    wb.save(saved_path)
+
+    # generators often leave the dimension of the sheet to its first cell
+    file_path = tmp_path / "stale.xlsx"
+    with zipfile.ZipFile(saved_path) as source, zipfile.ZipFile(file_path, "w") as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                content = re.sub(rb'<dimension ref="[^"]+"', b'<dimension ref="A1"', content)
+            target.writestr(item, content)
+
+    documents = ExcelExtractor(str(file_path)).extract()
+
+    assert [document.page_content for document in documents] == [
+        '"name":"a";"count":"1";"note":"x"',
+        '"name":"b";"count":"2";"note":"y"',
+    ]
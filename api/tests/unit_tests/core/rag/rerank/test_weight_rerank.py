@@ -0,0 +1,87 @@
+import math
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.models.document import Document
+from core.rag.rerank.entity.weight import KeywordSetting, VectorSetting, Weights
+from core.rag.rerank.weight_rerank import WeightRerankRunner
+
+
+@pytest.fixture
+def runner():
+    return WeightRerankRunner(
+        tenant_id="tenant_id",
+        weights=Weights(
+            vector_setting=VectorSetting(
+                vector_weight=0.7, embedding_provider_name="openai", embedding_model_name="text-embedding-3-small"
+            ),
+            keyword_setting=KeywordSetting(keyword_weight=0.3),
+        ),
+    )
+
+
+def _mock_segments(db, segment_keywords):
+    segments = [MagicMock(index_node_id=node_id, keywords=keywords) for node_id, keywords in segment_keywords.items()]
+    db.session.query.return_value.filter.return_value.all.return_value = segments
+
+
+def test_calculate_keyword_score_uses_segment_keywords(runner):
+    documents = [
+        Document(page_content="doc 1", metadata={"doc_id": "node-1"}),
+        Document(page_content="doc 2", metadata={"doc_id": "node-2"}),
+        Document(page_content="doc 3", metadata={"doc_id": "node-3"}),
+    ]
+    handler = MagicMock()
+    handler.extract_keywords.return_value = {"apple", "banana"}
+
+    with (
+        patch("core.rag.rerank.weight_rerank.db") as db,
+        patch("core.rag.rerank.weight_rerank.JiebaKeywordTableHandler", return_value=handler),
+    ):
+        _mock_segments(db, {"node-1": ["apple", "cherry"], "node-2": ["banana"], "node-3": ["durian"]})
+        scores = runner._calculate_keyword_score("apple banana", documents)
+
+    # only the query is tokenized, the documents' keywords come from their segments
+    handler.extract_keywords.assert_called_once_with("apple banana", None)
+    assert documents[0].metadata["keywords"] == ["apple", "cherry"]
+
+    idf = math.log(4 / 2) + 1
+    query_norm = math.sqrt(2) * idf
+    assert scores[0] == pytest.approx(idf * idf / (query_norm * math.sqrt(2) * idf))
+    assert scores[1] == pytest.approx(idf * idf / (query_norm * idf))
+    assert scores[2] == 0.0
+
+
+def test_calculate_keyword_score_caches_extracted_keywords(runner):
+    documents = [Document(page_content="doc", metadata={"doc_id": "node-1", "doc_hash": "hash-1"})]
+    handler = MagicMock()
+    handler.extract_keywords.return_value = {"apple"}
+
+    with (
+        patch("core.rag.rerank.weight_rerank.db") as db,
+        patch("core.rag.rerank.weight_rerank.JiebaKeywordTableHandler", return_value=handler),
+    ):
+        _mock_segments(db, {})
+        assert runner._calculate_keyword_score("apple", documents) == [pytest.approx(1.0)]
+        assert runner._calculate_keyword_score("apple", documents) == [pytest.approx(1.0)]
+
+    # the query is tokenized twice, the document only once
+    assert handler.extract_keywords.call_count == 3
+
+
+def test_calculate_cosine(runner):
+    documents = [
+        Document(page_content="doc 1", metadata={"doc_id": "node-1", "score": 0.5}),
+        Document(page_content="doc 2", metadata={"doc_id": "node-2"}, vector=[1.0, 0.0]),
+        Document(page_content="doc 3", metadata={"doc_id": "node-3"}, vector=[1.0, 1.0]),
+    ]
+
+    with (
+        patch("core.rag.rerank.weight_rerank.ModelManager"),
+        patch("core.rag.rerank.weight_rerank.CacheEmbedding") as cache_embedding,
+    ):
+        cache_embedding.return_value.embed_query.return_value = [2.0, 0.0]
+        scores = runner._calculate_cosine("tenant_id", "query", documents, runner.weights.vector_setting)
+
+    assert scores == [0.5, pytest.approx(1.0), pytest.approx(math.sqrt(2) / 2)]
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor
+
+
+def test_run_returns_partial_results_when_a_branch_misses_the_deadline():
+    executor = RetrievalExecutor(max_workers=4, thread_name_prefix="test_retrieval", max_workers_per_bulkhead=4)
+    release = threading.Event()
+
+    def stalled():
+        release.wait(5)
+        return ["late"]
+
+    def failing():
+        raise ValueError("vector store error")
+
+    started_at = time.perf_counter()
+    results = executor.run({"fast": lambda: ["doc"], "stalled": stalled, "failing": failing}, timeout=0.2)
+    elapsed = time.perf_counter() - started_at
+    release.set()
+
+    assert elapsed < 2
+    assert [result.name for result in results] == ["fast", "stalled", "failing"]
+    fast, stalled_result, failing_result = results
+    assert (fast.result, fast.timed_out, fast.error) == (["doc"], False, None)
+    assert stalled_result.timed_out
+    assert stalled_result.latency >= 0.2
+    assert isinstance(failing_result.error, ValueError)
+
+
+def test_run_cancels_queued_branches_after_the_deadline():
+    executor = RetrievalExecutor(max_workers=1, thread_name_prefix="test_retrieval", max_workers_per_bulkhead=1)
+    release = threading.Event()
+    calls = []
+
+    def blocking():
+        release.wait(5)
+
+    results = executor.run({"blocking": blocking, "queued": lambda: calls.append("queued")}, timeout=0.1)
+    release.set()
+    time.sleep(0.1)
+
+    assert all(result.timed_out for result in results)
+    # the queued branch never started
+    assert calls == []
+
+
+def test_stalled_bulkhead_does_not_starve_the_other_requests():
+    executor = RetrievalExecutor(max_workers=2, thread_name_prefix="test_retrieval", max_workers_per_bulkhead=1)
+    release = threading.Event()
+
+    def stalled():
+        release.wait(5)
+        return ["late"]
+
+    bulkheads = {"stalled": "stalled_store", "healthy": "healthy_store"}
+    try:
+        # the stalled branch keeps its worker after its deadline
+        (first,) = executor.run({"stalled": stalled}, timeout=0.1, bulkheads=bulkheads)
+        assert first.timed_out
+
+        started_at = time.perf_counter()
+        stalled_result, healthy_result = executor.run(
+            {"stalled": stalled, "healthy": lambda: ["doc"]}, timeout=1, bulkheads=bulkheads
+        )
+        elapsed = time.perf_counter() - started_at
+    finally:
+        release.set()
+
+    # the second stalled branch is rejected instead of taking the last worker
+    assert stalled_result.rejected
+    assert not stalled_result.timed_out
+    assert (healthy_result.result, healthy_result.timed_out) == (["doc"], False)
+    assert elapsed < 1
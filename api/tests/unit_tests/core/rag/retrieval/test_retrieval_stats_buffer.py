@@ -0,0 +1,107 @@
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+from redis.exceptions import ResponseError
+
+from core.rag.models.document import Document
+from core.rag.retrieval.retrieval_stats_buffer import RetrievalStatsBuffer
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def hincrby(self, key, field, amount):
+        hash_value = self.data.setdefault(key, {})
+        hash_value[field.encode()] = hash_value.get(field.encode(), 0) + amount
+
+    def hgetall(self, key):
+        return {field: str(value).encode() for field, value in self.data.get(key, {}).items()}
+
+    def rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(value.encode() for value in values)
+
+    def lrange(self, key, start, end):
+        return self.data.get(key, [])
+
+    def exists(self, key):
+        return key in self.data
+
+    def rename(self, key, new_key):
+        if key not in self.data:
+            raise ResponseError("no such key")
+        self.data[new_key] = self.data.pop(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def lock(self, name, timeout=None):
+        return nullcontext()
+
+
+def test_flush_aggregates_segment_hits_and_dataset_queries():
+    fake_redis = FakeRedis()
+    documents = [
+        Document(page_content="", metadata={"doc_id": "node-1", "dataset_id": "dataset-1"}),
+        Document(page_content="", metadata={"doc_id": "node-2", "dataset_id": "dataset-1"}),
+        Document(page_content="", metadata={"doc_id": "node-3"}),
+    ]
+
+    with (
+        patch("core.rag.retrieval.retrieval_stats_buffer.redis_client", new=fake_redis),
+        patch("core.rag.retrieval.retrieval_stats_buffer.db") as db,
+    ):
+        RetrievalStatsBuffer.add_segment_hits(documents)
+        RetrievalStatsBuffer.add_segment_hits(documents[:1])
+        RetrievalStatsBuffer.add_dataset_queries(
+            [
+                {
+                    "dataset_id": "dataset-1",
+                    "content": "query",
+                    "source": "app",
+                    "source_app_id": "app-1",
+                    "created_by_role": "end_user",
+                    "created_by": "user-1",
+                }
+            ]
+        )
+
+        assert RetrievalStatsBuffer.flush() == (3, 1)
+        # one update per distinct hit count and kind of key, one insert for the queries
+        assert db.session.execute.call_count == 4
+        db.session.commit.assert_called()
+        inserted_dataset_queries = db.session.execute.call_args_list[-1].args[1]
+        assert inserted_dataset_queries[0]["content"] == "query"
+        assert "created_at" in inserted_dataset_queries[0]
+
+        assert fake_redis.data == {}
+        db.session.execute.reset_mock()
+        assert RetrievalStatsBuffer.flush() == (0, 0)
+        db.session.execute.assert_not_called()
+
+
+def test_flush_retries_stats_left_by_failed_flush():
+    fake_redis = FakeRedis()
+
+    with (
+        patch("core.rag.retrieval.retrieval_stats_buffer.redis_client", new=fake_redis),
+        patch("core.rag.retrieval.retrieval_stats_buffer.db", MagicMock()) as db,
+    ):
+        RetrievalStatsBuffer.add_segment_hits([Document(page_content="", metadata={"doc_id": "node-1"})])
+        db.session.commit.side_effect = Exception("database error")
+        with pytest.raises(Exception, match="database error"):
+            RetrievalStatsBuffer.flush()
+        db.session.commit.side_effect = None
+        RetrievalStatsBuffer.add_segment_hits([Document(page_content="", metadata={"doc_id": "node-2"})])
+
+        # the failed stats are flushed first, the new ones on the next flush
+        assert RetrievalStatsBuffer.flush() == (1, 0)
+        assert RetrievalStatsBuffer.flush() == (1, 0)
+        assert fake_redis.data == {}
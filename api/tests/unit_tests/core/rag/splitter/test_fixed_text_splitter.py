@@ -0,0 +1,52 @@
+import re
+from unittest.mock import patch
+
+import pytest
+
+from core.rag.splitter.fixed_text_splitter import (
+    EnhanceRecursiveCharacterTextSplitter,
+    FixedRecursiveCharacterTextSplitter,
+)
+
+
+class WordTokenizer:
+    """One token per word including its leading whitespace, token counts of adjacent texts add up."""
+
+    def __init__(self):
+        self.encoded_texts = []
+
+    def encode_ordinary(self, text):
+        self.encoded_texts.append(text)
+        return [(match.start(), match.group()) for match in re.finditer(r"\s*\S+|\s+", text)]
+
+    def decode_with_offsets(self, tokens):
+        return "".join(token for _, token in tokens), [start for start, _ in tokens]
+
+
+TEXT = (
+    "\n\n".join("\n".join(" ".join(f"word{p}{line}{w}" for w in range(7)) for line in range(5)) for p in range(4))
+    + "\n\n"
+    + "x" * 30
+)
+
+
+@pytest.mark.parametrize("splitter_class", [EnhanceRecursiveCharacterTextSplitter, FixedRecursiveCharacterTextSplitter])
+def test_split_text_tokenizes_document_once(splitter_class):
+    tokenizer = WordTokenizer()
+    with patch("core.rag.splitter.fixed_text_splitter._get_local_tokenizer", return_value=tokenizer):
+        splitter = splitter_class.from_encoder(embedding_model_instance=None, chunk_size=12, chunk_overlap=2)
+
+    chunks = splitter.split_text(TEXT)
+
+    # same chunks as counting the tokens of every piece separately
+    counting_splitter = splitter_class(
+        length_function=lambda text: len(tokenizer.encode_ordinary(text)), chunk_size=12, chunk_overlap=2
+    )
+    assert chunks == counting_splitter.split_text(TEXT)
+    assert all(len(tokenizer.encode_ordinary(chunk)) <= 12 for chunk in chunks if not chunk.startswith("x"))
+
+    tokenizer.encoded_texts.clear()
+    splitter.split_text(TEXT)
+    assert tokenizer.encoded_texts[0] == TEXT
+    # only the separators are tokenized besides the document
+    assert set(tokenizer.encoded_texts[1:]) <= {"\n\n", "\n", " "}
@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock, patch
+
+from core.indexing_runner import IndexingRunner
+from core.rag.models.document import Document
+from models.dataset import Document as DatasetDocument
+
+
+def test_batch_text_docs_by_characters():
+    text_docs = (Document(page_content="x" * size) for size in [3, 4, 10, 2, 1])
+
+    batches = list(IndexingRunner._batch_text_docs(text_docs, 7))
+
+    assert [[len(text_doc.page_content) for text_doc in batch] for batch in batches] == [[3, 4], [10], [2, 1]]
+
+
+def _documents(page_contents: list[str]) -> list[Document]:
+    return [Document(page_content=page_content, metadata={"doc_id": page_content}) for page_content in page_contents]
+
+
+@patch("core.indexing_runner.dify_config.INDEXING_BATCH_CHARACTERS", 7)
+@patch("core.indexing_runner.DatasetDocumentStore")
+def test_index_document_in_batches(mock_doc_store_cls):
+    runner = IndexingRunner()
+    index_processor = MagicMock()
+    index_processor.extract_iter.return_value = iter(_documents(["aaa", "bbbb", "cccccccccc", "dd"]))
+    index_processor.transform.side_effect = lambda text_docs, **kwargs: list(text_docs)
+    dataset = MagicMock(id="dataset-1", tenant_id="tenant-1")
+    dataset_document = MagicMock(id="document-1", dataset_id="dataset-1", doc_form="text_model")
+
+    loaded_batches: list[list[str]] = []
+
+    def load_documents_in_context(flask_app, index_processor, dataset_id, dataset_document_id, documents, model):
+        loaded_batches.append([document.page_content for document in documents])
+        return len(documents)
+
+    with (
+        patch.object(runner, "_get_extract_setting", return_value=MagicMock()),
+        patch.object(runner, "_get_embedding_model_instance", return_value=None),
+        patch.object(runner, "_check_document_paused_status"),
+        patch.object(runner, "_update_segments_by_index_node_ids") as mock_update_segments,
+        patch.object(runner, "_update_document_index_status") as mock_update_status,
+        patch.object(runner, "_load_documents_in_context", side_effect=load_documents_in_context),
+    ):
+        runner._index_document_in_batches(index_processor, dataset, dataset_document, {"mode": "automatic"})
+
+    # each batch is transformed, saved and loaded on its own
+    assert loaded_batches == [["aaa", "bbbb"], ["cccccccccc"], ["dd"]]
+    assert index_processor.transform.call_count == 3
+    assert mock_doc_store_cls.return_value.add_documents.call_count == 3
+    assert [call.args[1] for call in mock_update_segments.call_args_list] == [["aaa", "bbbb"], ["cccccccccc"], ["dd"]]
+
+    statuses = [call.kwargs["after_indexing_status"] for call in mock_update_status.call_args_list]
+    assert statuses == ["splitting", "indexing", "completed"]
+    completed_params = mock_update_status.call_args_list[-1].kwargs["extra_update_params"]
+    assert completed_params[DatasetDocument.tokens] == 4
+    indexing_params = mock_update_status.call_args_list[1].kwargs["extra_update_params"]
+    assert indexing_params[DatasetDocument.word_count] == 19
+
+
+@patch("core.indexing_runner.db")
+@patch("core.indexing_runner.IndexProcessorFactory")
+@patch("core.indexing_runner.DocumentSegment")
+@patch("core.indexing_runner.Dataset")
+def test_run_in_splitting_status_cleans_loaded_batches(
+    mock_dataset_cls, mock_document_segment_cls, mock_index_processor_factory, mock_db
+):
+    runner = IndexingRunner()
+    dataset = MagicMock(id="dataset-1")
+    mock_dataset_cls.query.filter_by.return_value.first.return_value = dataset
+    document_segments = [
+        MagicMock(id="segment-1", index_node_id="node-1"),
+        MagicMock(id="segment-2", index_node_id="node-2"),
+    ]
+    mock_document_segment_cls.query.filter_by.return_value.all.return_value = document_segments
+    index_processor = mock_index_processor_factory.return_value.init_index_processor.return_value
+    dataset_document = MagicMock(id="document-1", dataset_id="dataset-1", doc_form="text_model")
+
+    calls = MagicMock()
+    index_processor.clean.side_effect = lambda *args, **kwargs: calls.clean()
+    mock_db.session.delete.side_effect = lambda *args: calls.delete()
+
+    with patch.object(runner, "_index_document") as mock_index_document:
+        runner.run_in_splitting_status(dataset_document)
+
+    # vectors and keywords of the batches loaded before the interruption are removed before their segments
+    index_processor.clean.assert_called_once_with(
+        dataset, ["node-1", "node-2"], with_keywords=True, delete_child_chunks=True
+    )
+    assert [call[0] for call in calls.mock_calls] == ["clean", "delete", "delete"]
+    mock_index_document.assert_called_once()
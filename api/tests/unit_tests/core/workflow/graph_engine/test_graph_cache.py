@@ -0,0 +1,54 @@
+import json
+
+from core.workflow.graph_engine.graph_cache import GraphCache
+
+GRAPH = json.dumps(
+    {
+        "edges": [
+            {"id": "start-source-answer-target", "source": "start", "target": "answer"},
+            {"id": "iteration-start-source-code-target", "source": "iteration-start", "target": "code"},
+        ],
+        "nodes": [
+            {"data": {"type": "start"}, "id": "start"},
+            {"data": {"type": "answer", "title": "answer", "answer": "1"}, "id": "answer"},
+            {"data": {"type": "iteration-start"}, "id": "iteration-start"},
+            {"data": {"type": "code"}, "id": "code"},
+        ],
+    }
+)
+
+
+def test_graph_compiled_once_per_graph():
+    cache = GraphCache(max_size=2)
+
+    graph_config = cache.get_graph_config(GRAPH)
+    assert cache.get_graph_config(GRAPH) is graph_config
+
+    graph = cache.get_graph(graph_config)
+    assert graph.node_ids == ["start", "answer"]
+    assert cache.get_graph(graph_config) is graph
+
+    sub_graph = cache.get_graph(graph_config, root_node_id="iteration-start")
+    assert sub_graph.node_ids == ["iteration-start", "code"]
+    assert cache.get_graph(graph_config, root_node_id="iteration-start") is sub_graph
+
+    # graph configs not got from the cache are compiled on each call
+    uncached_graph_config = json.loads(GRAPH)
+    assert cache.get_graph(uncached_graph_config) is not cache.get_graph(uncached_graph_config)
+
+
+def test_graph_cache_eviction():
+    cache = GraphCache(max_size=1)
+
+    graph_config = cache.get_graph_config(GRAPH)
+    graph = cache.get_graph(graph_config)
+    cache.get_graph_config(json.dumps({"nodes": [{"data": {"type": "start"}, "id": "start"}]}))
+
+    assert cache.get_graph_config(GRAPH) is not graph_config
+    assert cache.get_graph(graph_config) is not graph
+
+
+def test_graph_cache_disabled():
+    cache = GraphCache(max_size=0)
+
+    assert cache.get_graph_config(GRAPH) is not cache.get_graph_config(GRAPH)
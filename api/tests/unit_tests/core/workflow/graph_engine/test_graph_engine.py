@@ -13,10 +13,11 @@ from core.workflow.graph_engine.entities.event import (
     NodeRunStartedEvent,
     NodeRunStreamChunkEvent,
     NodeRunSucceededEvent,
+    ParallelBranchRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
-from core.workflow.graph_engine.graph_engine import GraphEngine
+from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineThreadPool
 from core.workflow.nodes.event import RunCompletedEvent, RunStreamChunkEvent
 from core.workflow.nodes.llm.node import LLMNode
 from models.enums import UserFrom
@@ -502,3 +503,93 @@ def test_run_branch(mock_close, mock_remove):
     assert isinstance(items[9], GraphRunSucceededEvent)
 
     # print(graph_engine.graph_runtime_state.model_dump_json(indent=2))
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_run_nested_parallel_in_single_worker_thread_pool(mock_close, mock_remove):
+    edges = [
+        ("start", "answer1"),
+        ("answer1", "answer2"),
+        ("answer1", "answer3"),
+        ("answer2", "answer4"),
+        ("answer2", "answer5"),
+        ("answer4", "answer6"),
+        ("answer5", "answer6"),
+        ("answer6", "answer7"),
+        ("answer3", "answer7"),
+    ]
+    graph_config = {
+        "edges": [{"id": str(i), "source": source, "target": target} for i, (source, target) in enumerate(edges)],
+        "nodes": [{"data": {"type": "start", "title": "start"}, "id": "start"}]
+        + [
+            {"data": {"type": "answer", "title": f"answer{i}", "answer": str(i)}, "id": f"answer{i}"}
+            for i in range(1, 8)
+        ],
+    }
+
+    graph = Graph.init(graph_config=graph_config)
+
+    variable_pool = VariablePool(
+        system_variables={
+            SystemVariableKey.QUERY: "what's the weather in SF",
+            SystemVariableKey.FILES: [],
+            SystemVariableKey.CONVERSATION_ID: "abababa",
+            SystemVariableKey.USER_ID: "aaa",
+        },
+        user_inputs={},
+    )
+
+    # branches starting a nested parallel must not hold the only worker while waiting for its branches
+    thread_pool = GraphEngineThreadPool(max_workers=1)
+    GraphEngine.workflow_thread_pool_mapping["single_worker"] = thread_pool
+    try:
+        graph_engine = GraphEngine(
+            tenant_id="111",
+            app_id="222",
+            workflow_type=WorkflowType.CHAT,
+            workflow_id="333",
+            graph_config=graph_config,
+            user_id="444",
+            user_from=UserFrom.ACCOUNT,
+            invoke_from=InvokeFrom.WEB_APP,
+            call_depth=0,
+            graph=graph,
+            variable_pool=variable_pool,
+            max_execution_steps=500,
+            max_execution_time=1200,
+            thread_pool_id="single_worker",
+        )
+
+        items = list(graph_engine.run())
+    finally:
+        del GraphEngine.workflow_thread_pool_mapping["single_worker"]
+        thread_pool.shutdown()
+
+    assert isinstance(items[-1], GraphRunSucceededEvent)
+    succeeded_node_ids = [item.node_id for item in items if isinstance(item, NodeRunSucceededEvent)]
+    assert sorted(succeeded_node_ids) == [
+        "answer1",
+        "answer2",
+        "answer3",
+        "answer4",
+        "answer5",
+        "answer6",
+        "answer7",
+        "start",
+    ]
+    assert succeeded_node_ids.index("answer6") > succeeded_node_ids.index("answer4")
+    assert succeeded_node_ids.index("answer6") > succeeded_node_ids.index("answer5")
+    assert succeeded_node_ids.index("answer7") > succeeded_node_ids.index("answer6")
+
+    # the branch of the outer parallel succeeds after the nested parallel and the node it ends at
+    answer2_branch_succeeded_index = next(
+        i
+        for i, item in enumerate(items)
+        if isinstance(item, ParallelBranchRunSucceededEvent) and item.parallel_start_node_id == "answer2"
+    )
+    answer6_succeeded_index = next(
+        i for i, item in enumerate(items) if isinstance(item, NodeRunSucceededEvent) and item.node_id == "answer6"
+    )
+    assert answer2_branch_succeeded_index > answer6_succeeded_index
+    assert thread_pool.submit_count == 0
@@ -0,0 +1,142 @@
+import logging
+import time
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.graph_engine import Graph, GraphInitParams, GraphRuntimeState
+from core.workflow.nodes import NodeType
+from core.workflow.nodes.node_mapping import NODE_TYPE_CLASSES_MAPPING
+from models.enums import UserFrom
+from models.workflow import WorkflowType
+
+logger = logging.getLogger(__name__)
+
+ITERATION_ITEM_COUNT = 1000
+
+# 5 nodes sub graph of an iteration
+GRAPH_CONFIG = {
+    "edges": [
+        {"id": "1", "source": "iteration-start", "target": "tt"},
+        {"id": "2", "source": "tt", "target": "code"},
+        {"id": "3", "source": "code", "target": "if-else"},
+        {"id": "4", "source": "if-else", "sourceHandle": "true", "target": "answer"},
+    ],
+    "nodes": [
+        {
+            "data": {"title": "iteration-start", "type": "iteration-start", "iteration_id": "iteration"},
+            "id": "iteration-start",
+        },
+        {
+            "data": {
+                "title": "template transform",
+                "type": "template-transform",
+                "iteration_id": "iteration",
+                "template": "{{ arg1 }} 123",
+                "variables": [{"value_selector": ["iteration", "item"], "variable": "arg1"}],
+            },
+            "id": "tt",
+        },
+        {
+            "data": {
+                "title": "code",
+                "type": "code",
+                "iteration_id": "iteration",
+                "code_language": "python3",
+                "code": "def main(arg1: str) -> dict:\n    return {'result': arg1}",
+                "variables": [{"value_selector": ["tt", "output"], "variable": "arg1"}],
+                "outputs": {"result": {"type": "string"}},
+            },
+            "id": "code",
+        },
+        {
+            "data": {
+                "title": "if else",
+                "type": "if-else",
+                "iteration_id": "iteration",
+                "cases": [
+                    {
+                        "case_id": "true",
+                        "logical_operator": "and",
+                        "conditions": [
+                            {
+                                "comparison_operator": "contains",
+                                "variable_selector": ["code", "result"],
+                                "value": "hi",
+                            }
+                        ],
+                    }
+                ],
+            },
+            "id": "if-else",
+        },
+        {
+            "data": {"title": "answer", "type": "answer", "iteration_id": "iteration", "answer": "{{#code.result#}}"},
+            "id": "answer",
+        },
+    ],
+}
+
+
+def _init_nodes(graph: Graph, graph_init_params: GraphInitParams, graph_runtime_state: GraphRuntimeState) -> list:
+    nodes = []
+    for node_id in graph.node_ids:
+        # same as GraphEngine._run, one node instance per step
+        node_config = graph.node_id_config_mapping[node_id]
+        node_cls = NODE_TYPE_CLASSES_MAPPING[NodeType(node_config["data"]["type"])]["1"]
+        nodes.append(
+            node_cls(
+                id=node_id,
+                config=node_config,
+                graph_init_params=graph_init_params,
+                graph=graph,
+                graph_runtime_state=graph_runtime_state,
+            )
+        )
+
+    return nodes
+
+
+def test_node_data_validated_once_per_graph():
+    graph = Graph.init(graph_config=GRAPH_CONFIG, root_node_id="iteration-start")
+    assert len(graph.node_ids) == 5
+
+    graph_init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=GRAPH_CONFIG,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.SERVICE_API,
+        call_depth=0,
+    )
+    graph_runtime_state = GraphRuntimeState(
+        variable_pool=VariablePool(system_variables={}, user_inputs={}), start_at=time.perf_counter()
+    )
+
+    first_nodes = _init_nodes(graph, graph_init_params, graph_runtime_state)
+
+    # nodes of the graph share their node data
+    start_at = time.perf_counter()
+    for _ in range(ITERATION_ITEM_COUNT):
+        nodes = _init_nodes(graph, graph_init_params, graph_runtime_state)
+    shared_elapsed = time.perf_counter() - start_at
+    for first_node, node in zip(first_nodes, nodes):
+        assert node.node_data is first_node.node_data
+
+    # nodes of a graph compiled per item validate their node data per instance
+    uncached_graph = Graph.init(graph_config=GRAPH_CONFIG, root_node_id="iteration-start")
+    start_at = time.perf_counter()
+    for _ in range(ITERATION_ITEM_COUNT):
+        uncached_graph._node_data_mapping.clear()
+        nodes = _init_nodes(uncached_graph, graph_init_params, graph_runtime_state)
+    validated_elapsed = time.perf_counter() - start_at
+
+    step_count = ITERATION_ITEM_COUNT * len(graph.node_ids)
+    # timing is reported only, wall clock assertions are flaky on loaded runners
+    logger.info(
+        "node init per step: %.1fus shared node data, %.1fus validated node data",
+        shared_elapsed / step_count * 1e6,
+        validated_elapsed / step_count * 1e6,
+    )
@@ -1,10 +1,12 @@
 from collections.abc import Sequence
 from typing import Optional
+from unittest import mock
 
 import pytest
 
 from configs import dify_config
 from core.app.entities.app_invoke_entities import InvokeFrom, ModelConfigWithCredentialsEntity
+from core.entities.model_entities import ModelStatus
 from core.entities.provider_configuration import ProviderConfiguration, ProviderModelBundle
 from core.entities.provider_entities import CustomConfiguration, SystemConfiguration
 from core.file import File, FileTransferMethod, FileType
@@ -467,3 +469,75 @@ def test_handle_list_messages_basic(llm_node):
     assert len(result) == 1
     assert isinstance(result[0], UserPromptMessage)
     assert result[0].content == [TextPromptMessageContent(data="Hello, world")]
+
+
+def test_fetch_model_config_keeps_stop_in_shared_node_data(model_config):
+    graph_config = {
+        "edges": [{"id": "1", "source": "start", "target": "llm"}],
+        "nodes": [
+            {"data": {"title": "start", "type": "start", "variables": []}, "id": "start"},
+            {
+                "data": {
+                    "title": "llm",
+                    "type": "llm",
+                    "model": {
+                        "provider": "openai",
+                        "name": "gpt-3.5-turbo",
+                        "mode": "chat",
+                        "completion_params": {"temperature": 0.7, "stop": ["Human:"]},
+                    },
+                    "prompt_template": [],
+                    "context": {"enabled": False},
+                },
+                "id": "llm",
+            },
+        ],
+    }
+    # the graph is cached across runs, its nodes share their node data
+    graph = Graph.init(graph_config=graph_config)
+    graph_init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.SERVICE_API,
+        call_depth=0,
+    )
+
+    model_instance = mock.MagicMock(provider_model_bundle=model_config.provider_model_bundle, credentials={})
+    model_instance.model_type_instance.get_model_schema.return_value = model_config.model_schema
+    with (
+        mock.patch("core.workflow.nodes.llm.node.ModelManager") as mock_model_manager,
+        mock.patch.object(
+            ProviderConfiguration, "get_provider_model", return_value=mock.MagicMock(status=ModelStatus.ACTIVE)
+        ),
+    ):
+        mock_model_manager.return_value.get_model_instance.return_value = model_instance
+        for _ in range(2):
+            node = LLMNode(
+                id="llm",
+                config=graph.node_id_config_mapping["llm"],
+                graph_init_params=graph_init_params,
+                graph=graph,
+                graph_runtime_state=GraphRuntimeState(
+                    variable_pool=VariablePool(system_variables={}, user_inputs={}), start_at=0
+                ),
+            )
+            _, fetched_model_config = node._fetch_model_config(node.node_data.model)
+            assert fetched_model_config.stop == ["Human:"]
+            assert fetched_model_config.parameters == {"temperature": 0.7}
+
+            list(
+                node._invoke_llm(
+                    node_data_model=node.node_data.model,
+                    model_instance=model_instance,
+                    stop=["Human:"],
+                    prompt_messages=[],
+                )
+            )
+            assert model_instance.invoke_llm.call_args.kwargs["model_parameters"] == {"temperature": 0.7}
+
+    assert graph.get_node_data("llm", LLMNodeData).model.completion_params == {"temperature": 0.7, "stop": ["Human:"]}
@@ -0,0 +1,100 @@
+import time
+import uuid
+from unittest import mock
+from uuid import uuid4
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.variables import StringVariable
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
+from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.nodes.variable_assigner.v2 import VariableAssignerNode
+from core.workflow.nodes.variable_assigner.v2.enums import InputType, Operation
+from models.enums import UserFrom
+from models.workflow import WorkflowNodeExecutionStatus, WorkflowType
+
+DEFAULT_NODE_ID = "node_id"
+
+
+def test_overwrite_with_variable_input_on_shared_node_data():
+    graph_config = {
+        "edges": [
+            {
+                "id": "start-source-assigner-target",
+                "source": "start",
+                "target": "assigner",
+            },
+        ],
+        "nodes": [
+            {"data": {"type": "start"}, "id": "start"},
+            {
+                "data": {
+                    "type": "assigner",
+                    "version": "2",
+                    "title": "test",
+                    "items": [
+                        {
+                            "variable_selector": ["conversation", "test_conversation_variable"],
+                            "input_type": InputType.VARIABLE.value,
+                            "operation": Operation.OVER_WRITE.value,
+                            "value": [DEFAULT_NODE_ID, "test_string_variable"],
+                        }
+                    ],
+                },
+                "id": "assigner",
+            },
+        ],
+    }
+
+    graph = Graph.init(graph_config=graph_config)
+
+    init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.DEBUGGER,
+        call_depth=0,
+    )
+
+    # the node runs twice on the same graph, as on two iteration items or two runs of a cached graph
+    for value in ("the second value", "the third value"):
+        variable_pool = VariablePool(
+            system_variables={SystemVariableKey.CONVERSATION_ID: "conversation_id"},
+            user_inputs={},
+            environment_variables=[],
+            conversation_variables=[
+                StringVariable(
+                    id=str(uuid4()),
+                    name="test_conversation_variable",
+                    value="the first value",
+                    selector=["conversation", "test_conversation_variable"],
+                )
+            ],
+        )
+        variable_pool.add(
+            [DEFAULT_NODE_ID, "test_string_variable"],
+            StringVariable(id=str(uuid4()), name="test_string_variable", value=value),
+        )
+
+        node = VariableAssignerNode(
+            id=str(uuid.uuid4()),
+            graph_init_params=init_params,
+            graph=graph,
+            graph_runtime_state=GraphRuntimeState(variable_pool=variable_pool, start_at=time.perf_counter()),
+            config=graph.node_id_config_mapping["assigner"],
+        )
+
+        with mock.patch("core.workflow.nodes.variable_assigner.common.helpers.update_conversation_variable"):
+            result = node._run()
+
+        assert result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+        got = variable_pool.get(["conversation", "test_conversation_variable"])
+        assert got is not None
+        assert got.value == value
+        assert node.node_data.items[0].value == [DEFAULT_NODE_ID, "test_string_variable"]
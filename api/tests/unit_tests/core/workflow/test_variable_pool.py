@@ -1,3 +1,6 @@
+import tracemalloc
+from copy import deepcopy
+
 import pytest
 
 from core.file import File, FileTransferMethod, FileType
@@ -44,3 +47,54 @@ def test_use_long_selector(pool):
     result = pool.get(("node_1", "part_1", "part_2"))
     assert result is not None
     assert result.value == "test_value"
+
+
+def test_create_child_reads_through_to_parent(pool):
+    pool.add(("node_1", "var_1"), StringSegment(value="parent_value_1"))
+    pool.add(("node_1", "var_2"), StringSegment(value="parent_value_2"))
+
+    child = pool.create_child()
+    child.add(("node_1", "var_1"), StringSegment(value="child_value"))
+    child.add(("node_2", "var_1"), StringSegment(value="child_only"))
+
+    assert child.get(("node_1", "var_1")).value == "child_value"
+    assert child.get(("node_1", "var_2")).value == "parent_value_2"
+    assert child.get(("node_2", "var_1")).value == "child_only"
+    assert pool.get(("node_1", "var_1")).value == "parent_value_1"
+    assert pool.get(("node_2", "var_1")) is None
+
+
+def test_create_child_remove_does_not_change_parent(pool):
+    pool.add(("node_1", "var_1"), StringSegment(value="value_1"))
+    pool.add(("node_2", "var_1"), StringSegment(value="value_2"))
+
+    child = pool.create_child()
+    child.remove(("node_1", "var_1"))
+    child.remove(("node_2",))
+
+    assert child.get(("node_1", "var_1")) is None
+    assert child.get(("node_2", "var_1")) is None
+    assert pool.get(("node_1", "var_1")).value == "value_1"
+    assert pool.get(("node_2", "var_1")).value == "value_2"
+
+
+def test_create_child_uses_less_memory_than_deepcopy(pool):
+    # large upstream outputs are shared by all parallel iteration children instead of being copied
+    pool.add(("node_1", "documents"), [{"content": "x" * 100, "metadata": {"index": i}} for i in range(2000)])
+
+    tracemalloc.start()
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        child = pool.create_child()
+        child.add(("iteration", "item"), "item")
+        child_size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, "filename"))
+
+        snapshot = tracemalloc.take_snapshot()
+        pool_copy = deepcopy(pool)
+        pool_copy.add(("iteration", "item"), "item")
+        deepcopy_size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, "filename"))
+    finally:
+        tracemalloc.stop()
+
+    assert child.get(("node_1", "documents")) is pool.get(("node_1", "documents"))
+    assert child_size * 10 < deepcopy_size
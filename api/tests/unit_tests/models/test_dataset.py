@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from models.dataset import Dataset, Document
+from models.model import Tag
+
+
+def test_dataset_load_aggregates():
+    datasets = [Dataset(id="dataset-1", tenant_id="tenant-1"), Dataset(id="dataset-2", tenant_id="tenant-1")]
+    tag = Tag(id="tag-1", tenant_id="tenant-1", type="knowledge", name="tag")
+    other_tenant_tag = Tag(id="tag-2", tenant_id="tenant-2", type="knowledge", name="tag")
+    document_aggregate = SimpleNamespace(
+        dataset_id="dataset-1", document_count=3, available_document_count=2, word_count=120, doc_form="text_model"
+    )
+
+    with patch("models.dataset.db") as db:
+        document_query, app_query, tag_query = MagicMock(), MagicMock(), MagicMock()
+        document_query.filter.return_value.group_by.return_value.all.return_value = [document_aggregate]
+        app_query.filter.return_value.group_by.return_value.all.return_value = [("dataset-2", 1)]
+        tag_query.join.return_value.filter.return_value.all.return_value = [
+            ("dataset-1", tag),
+            ("dataset-1", other_tenant_tag),
+        ]
+        db.session.query.side_effect = [document_query, app_query, tag_query]
+
+        Dataset.load_aggregates(datasets)
+
+        assert db.session.query.call_count == 3
+        assert (datasets[0].document_count, datasets[0].available_document_count, datasets[0].app_count) == (3, 2, 0)
+        assert (datasets[0].word_count, datasets[0].doc_form, datasets[0].tags) == (120, "text_model", [tag])
+        assert (datasets[1].document_count, datasets[1].app_count, datasets[1].word_count) == (0, 1, None)
+        assert datasets[1].tags == []
+        # the loaded values are returned without querying them again
+        assert db.session.query.call_count == 3
+
+
+def test_document_load_aggregates():
+    documents = [Document(id="document-1", word_count=100), Document(id="document-2", word_count=0)]
+
+    with patch("models.dataset.db") as db:
+        db.session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+            SimpleNamespace(document_id="document-1", segment_count=4, hit_count=7)
+        ]
+
+        Document.load_aggregates(documents)
+
+        assert (documents[0].segment_count, documents[0].hit_count, documents[0].average_segment_length) == (4, 7, 25)
+        assert (documents[1].segment_count, documents[1].hit_count) == (0, None)
+        assert db.session.query.call_count == 1